@@ -4,10 +4,12 @@ from __future__ import annotations
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN, CONF_API_REF
+from .const import DOMAIN, CONF_API_REF, CONF_EVENT_REF
 
 # from .gallagher.GallagherRest import GallagherRest
 from .gcc_rest import *
+from .services import async_unload_services
+from .engine import GCCEngineRegistry
 
 import logging
 
@@ -22,12 +24,27 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    _LOGGER.info("Unloading gcc_rest entry {entry.entry_id}".format)
+    _LOGGER.info("Unloading gcc_rest entry {}".format(entry.entry_id))
+    unload_ok = False
     if DOMAIN in hass.data.keys():  # Check that the DOMAIN exists
         if unload_ok := await hass.config_entries.async_unload_platforms(
             entry, PLATFORMS
         ):
-            hass.data[DOMAIN][entry.entry_id][CONF_API_REF].stop()
+            gallagher = hass.data[DOMAIN][entry.entry_id][CONF_API_REF]
+            elapsed = await hass.async_add_executor_job(gallagher.stop)
+            # Stops the shared engine if this was the last entry using it
+            await hass.async_add_executor_job(
+                GCCEngineRegistry.get(hass).release, entry
+            )
+            _LOGGER.info(
+                "gcc_rest entry {} shut down in {:.1f} ms".format(
+                    entry.entry_id, elapsed * 1000
+                )
+            )
+            bridge = hass.data[DOMAIN][entry.entry_id].get(CONF_EVENT_REF)
+            if bridge is not None:
+                await bridge.async_stop()
             hass.data[DOMAIN].pop(entry.entry_id)
+            async_unload_services(hass)
 
     return unload_ok
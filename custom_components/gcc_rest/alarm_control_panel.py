@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from homeassistant.components.alarm_control_panel import (
@@ -21,6 +21,8 @@ from homeassistant.const import (
 
 from .const import DOMAIN, CONF_API_REF, CONF_USE_ALARM_ZONES
 
+from .entity import GCCControllerMixin, GCCOptimisticMixin, GCCRestoreMixin
+from .discovery import async_add_new_items
 from .gallagher.GallagherRest import GallagherRest
 from .gallagher.ItemAlarmZone import AlarmZoneState, AlarmZoneFenceState
 
@@ -58,18 +60,32 @@ async def async_setup_entry(
         _LOGGER.info("Using GCC alarm zones")
         alarm_panels: list[GCCAlarmControlPanel] = []
 
-        zones = await hass.async_add_executor_job(gallagher.get_available_alarm_zones)
+        zones = gallagher.get_loaded_items("alarmZones")
 
         for zone in zones:
             alarm_panel = GCCAlarmControlPanel(zone, gallagher, entry)
             alarm_panels.append(alarm_panel)
 
         async_add_entities(alarm_panels)
+        async_add_new_items(
+            hass,
+            entry,
+            "alarmZones",
+            lambda items: [
+                GCCAlarmControlPanel(item, gallagher, entry) for item in items
+            ],
+            async_add_entities,
+        )
     else:
         _LOGGER.info("Not using GCC inputs, ceasing setup of alarm control panels")
 
 
-class GCCAlarmControlPanel(AlarmControlPanelEntity):
+class GCCAlarmControlPanel(
+    GCCControllerMixin,
+    GCCOptimisticMixin,
+    GCCRestoreMixin,
+    AlarmControlPanelEntity,
+):
     """GCC REST Control Panel."""
 
     def __init__(self, gallagher_data, gallagher: GallagherRest, entry: ConfigEntry):
@@ -90,6 +106,8 @@ class GCCAlarmControlPanel(AlarmControlPanelEntity):
             "status_text": None,
         }
         self._attr_extra_state_attributes = self._extra_state_attributes
+        self._setup_controller(entry, gallagher_data)
+        self._setup_optimistic(entry, "state", "alarm_control_panel")
 
         self._attr_code_arm_required = False
         self._attr_supported_features = (
@@ -113,25 +131,39 @@ class GCCAlarmControlPanel(AlarmControlPanelEntity):
         """We dont support using codes to change alarm states"""
         return None
 
-    def alarm_disarm(self, code: str | None = None) -> None:
+    async def async_alarm_disarm(self, code: str | None = None) -> None:
         """Send disarm command."""
-        self._gallagher.get_alarm_zone(self._gallagher_id).disarm()
+        await self._async_optimistic_command(
+            self._gallagher.get_alarm_zone(self._gallagher_id).disarm(),
+            AlarmZoneState.DISARMED,
+        )
 
-    def alarm_arm_home(self, code: str | None = None) -> None:
+    async def async_alarm_arm_home(self, code: str | None = None) -> None:
         """Send arm user_1_mode/home command."""
-        self._gallagher.get_alarm_zone(self._gallagher_id).user_1_mode()
+        await self._async_optimistic_command(
+            self._gallagher.get_alarm_zone(self._gallagher_id).user_1_mode(),
+            AlarmZoneState.USER_1,
+        )
 
-    def alarm_arm_away(self, code: str | None = None) -> None:
+    async def async_alarm_arm_away(self, code: str | None = None) -> None:
         """Send arm away command."""
-        self._gallagher.get_alarm_zone(self._gallagher_id).arm()
+        await self._async_optimistic_command(
+            self._gallagher.get_alarm_zone(self._gallagher_id).arm(),
+            AlarmZoneState.ARMED,
+        )
 
-    def alarm_arm_night(self, code: str | None = None) -> None:
+    async def async_alarm_arm_night(self, code: str | None = None) -> None:
         """Send arm user_2_mode/night command."""
-        self._gallagher.get_alarm_zone(self._gallagher_id).user_2_mode()
+        await self._async_optimistic_command(
+            self._gallagher.get_alarm_zone(self._gallagher_id).user_2_mode(),
+            AlarmZoneState.ARMED,
+        )
 
     def proccess_callback(self, gcc_update):
         """Callback processor"""
         # self._is_on = gcc_update["state"]
+        self._live_update()
+        gcc_update = self._optimistic_filter(gcc_update)
 
         self._state = _STATES[gcc_update["state"]]
         self._extra_state_attributes["fence_state"] = _STATES_FENCE[
@@ -144,7 +176,8 @@ class GCCAlarmControlPanel(AlarmControlPanelEntity):
 
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added."""
-        await self.async_base_added_to_hass()
+        self._async_watch_controller()
+        await self._async_added_restoring()
 
     async def async_base_added_to_hass(self) -> None:
         """Handle entity which will be added."""
@@ -152,6 +185,5 @@ class GCCAlarmControlPanel(AlarmControlPanelEntity):
             self._gallagher.get_alarm_zone(self._gallagher_id).get_status()
         )
 
-    async def async_get_last_state(self):
-        """Returns state of alarm panel"""
-        return self._state
+    def _restore_state(self, last_state: State) -> None:
+        self._state = last_state.state
@@ -1,13 +1,28 @@
 """Support for Binary inputs from a command centre server."""
 from __future__ import annotations
 
+from typing import Any
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_ON, EntityCategory
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.components.binary_sensor import BinarySensorEntity
-
-from .const import DOMAIN, CONF_API_REF, CONF_USE_INPUTS
-
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+
+from .const import (
+    DOMAIN,
+    CONF_API_REF,
+    CONF_USE_INPUTS,
+    SIGNAL_CONTROLLER_UPDATED,
+    SIGNAL_ITEMS_ADDED,
+)
+
+from .entity import GCCControllerMixin, GCCRestoreMixin
+from .discovery import async_add_new_items
 from .gallagher.GallagherRest import GallagherRest
 
 
@@ -28,7 +43,7 @@ async def async_setup_entry(
         _LOGGER.info("Using GCC inputs")
         sensors: list[GCCBinarySensor] = []
 
-        inputs = await hass.async_add_executor_job(gallagher.get_available_inputs)
+        inputs = gallagher.get_loaded_items("inputs")
 
         for input in inputs:
             sensor = GCCBinarySensor(input, gallagher, entry)
@@ -37,11 +52,39 @@ async def async_setup_entry(
         # print(inputs)
 
         async_add_entities(sensors)
+        async_add_new_items(
+            hass,
+            entry,
+            "inputs",
+            lambda items: [GCCBinarySensor(item, gallagher, entry) for item in items],
+            async_add_entities,
+        )
     else:
-        _LOGGER.info("Not using GCC inputs, ceasing setup of binary sensors")
+        _LOGGER.info("Not using GCC inputs")
+
+    known = set(gallagher.get_controllers())
+    async_add_entities(
+        [GCCControllerSensor(controller, gallagher, entry) for controller in known]
+    )
+
+    @callback
+    def async_items_added(item_name: str, items: list[dict[str, Any]]) -> None:
+        # Items found by a rescan or a retry may be on a controller not seen yet
+        controllers = [c for c in gallagher.get_controllers() if c not in known]
+        if len(controllers) > 0:
+            known.update(controllers)
+            async_add_entities(
+                [GCCControllerSensor(c, gallagher, entry) for c in controllers]
+            )
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_ITEMS_ADDED.format(entry.entry_id), async_items_added
+        )
+    )
 
 
-class GCCBinarySensor(BinarySensorEntity):
+class GCCBinarySensor(GCCControllerMixin, GCCRestoreMixin, BinarySensorEntity):
     """GCC REST binary sensor."""
 
     def __init__(self, gallagher_data, gallagher: GallagherRest, entry: ConfigEntry):
@@ -65,6 +108,7 @@ class GCCBinarySensor(BinarySensorEntity):
         }
 
         self._attr_extra_state_attributes = self._extra_state_attributes
+        self._setup_controller(entry, gallagher_data)
 
         gallagher.get_input(self._gallagher_id).register_callback(
             self.proccess_callback
@@ -77,6 +121,7 @@ class GCCBinarySensor(BinarySensorEntity):
 
     def proccess_callback(self, gcc_update):
         """Callback processor"""
+        self._live_update()
         self._is_on = gcc_update["state"]
 
         for attr in gcc_update.keys():
@@ -88,7 +133,8 @@ class GCCBinarySensor(BinarySensorEntity):
 
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added."""
-        await self.async_base_added_to_hass()
+        self._async_watch_controller()
+        await self._async_added_restoring()
 
     async def async_base_added_to_hass(self) -> None:
         """Handle entity which will be added."""
@@ -96,8 +142,50 @@ class GCCBinarySensor(BinarySensorEntity):
             self._gallagher.get_input(self._gallagher_id).get_status()
         )
 
-    async def async_get_last_state(self):
-        """Returns item state"""
-        return self._is_on
+    def _restore_state(self, last_state: State) -> None:
+        self._is_on = last_state.state == STATE_ON
+
 
+class GCCControllerSensor(BinarySensorEntity):
+    """GCC REST controller connectivity, pushed when the controller goes offline."""
 
+    _attr_should_poll = False
+    _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, controller_id, gallagher: GallagherRest, entry: ConfigEntry):
+        self._gallagher = gallagher
+        self._controller_id = controller_id
+        self._entry = entry
+
+        name = gallagher.get_controller_health().get_name(controller_id)
+        self._attr_name = "{} {} Connectivity".format(
+            "GCC", name or "Controller {}".format(controller_id)
+        )
+        self._attr_unique_id = "{}_{}_controller_{}".format(
+            "GCC", entry.entry_id, controller_id
+        )
+        self._attr_is_on = None
+        self._attr_extra_state_attributes = {"controller": controller_id, "items": 0}
+
+    async def async_added_to_hass(self) -> None:
+        """Handle entity which will be added."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_CONTROLLER_UPDATED.format(
+                    self._entry.entry_id, self._controller_id
+                ),
+                self._async_controller_updated,
+            )
+        )
+        self._async_controller_updated()
+
+    @callback
+    def _async_controller_updated(self) -> None:
+        health = self._gallagher.get_controller_health()
+        self._attr_is_on = health.is_online(self._controller_id)
+        self._attr_extra_state_attributes["items"] = len(
+            health.get_items(self._controller_id)
+        )
+        self.async_write_ha_state()
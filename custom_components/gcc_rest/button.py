@@ -0,0 +1,95 @@
+"""Support for macros from a command centre server."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from homeassistant.components.button import ButtonEntity
+
+from .const import DOMAIN, CONF_API_REF, CONF_USE_MACROS
+
+from .discovery import async_add_new_items
+from .gallagher.GallagherRest import GallagherRest
+from .gallagher.CommandDispatcher import CommandOutcome
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+):
+    """Set up entry."""
+    _LOGGER.info("Loading buttons")
+    gallagher: GallagherRest = hass.data[DOMAIN][entry.entry_id][CONF_API_REF]
+
+    if entry.data.get(CONF_USE_MACROS) is True:
+        _LOGGER.info("Using GCC macros")
+        buttons: list[GCCMacroButton] = []
+
+        macros = gallagher.get_loaded_items("macros")
+
+        for macro in macros:
+            if gallagher.get_macro(macro["id"]) is None:
+                continue
+            button = GCCMacroButton(macro, gallagher, entry)
+            buttons.append(button)
+
+        async_add_entities(buttons)
+        async_add_new_items(
+            hass,
+            entry,
+            "macros",
+            lambda items: [GCCMacroButton(item, gallagher, entry) for item in items],
+            async_add_entities,
+        )
+    else:
+        _LOGGER.info("Not using GCC macros, ceasing setup of buttons")
+
+
+class GCCMacroButton(ButtonEntity):
+    """GCC REST macro button."""
+
+    def __init__(self, gallagher_data, gallagher: GallagherRest, entry: ConfigEntry):
+        self._gallagher = gallagher
+        self._gallagher_id = gallagher_data["id"]
+
+        self._attr_name = "{} {}".format("GCC", gallagher_data["name"])
+        self._attr_unique_id = "{}_{}_{}".format(
+            "GCC", entry.entry_id, self._gallagher_id
+        )
+
+        self._extra_state_attributes = {
+            "gallagher_id": self._gallagher_id,
+            "description": None,
+            "division": None,
+            "last_outcome": None,
+            "last_latency_ms": None,
+        }
+        self._attr_extra_state_attributes = self._extra_state_attributes
+
+        status = gallagher.get_macro(self._gallagher_id).get_status()
+        self._extra_state_attributes["description"] = status["description"]
+        self._extra_state_attributes["division"] = status["division"]
+
+    async def async_press(self) -> None:
+        """Run the macro, the Command Centre server carries out its actions"""
+        started = time.monotonic()
+        outcome = await asyncio.wrap_future(
+            self._gallagher.get_macro(self._gallagher_id).run()
+        )
+
+        self._extra_state_attributes["last_outcome"] = outcome.value
+        self._extra_state_attributes["last_latency_ms"] = round(
+            (time.monotonic() - started) * 1000, 1
+        )
+        if outcome is not CommandOutcome.SUCCESS:
+            _LOGGER.warning(
+                "Macro {} did not run - {}".format(self._attr_name, outcome.value)
+            )
+        self.async_write_ha_state()
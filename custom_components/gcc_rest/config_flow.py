@@ -7,14 +7,61 @@ from typing import Any
 import voluptuous as vol
 
 from .gallagher.GallagherRest import GallagherRest
+from .gallagher.ItemFilter import parse_rules
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
 
-from .const import DOMAIN, CONF_HOST, CONF_API_KEY
+from .const import (
+    DOMAIN,
+    CONF_HOST,
+    CONF_API_KEY,
+    CONF_STANDBY_HOSTS,
+    CONF_DIVISIONS,
+    CONF_CONTROLLERS,
+    CONF_ITEM_INCLUDE,
+    CONF_ITEM_EXCLUDE,
+    CONF_RESCAN_INTERVAL,
+    CONF_READY_TIMEOUT,
+    CONF_STALL_THRESHOLD,
+    CONF_COMMAND_CONCURRENCY,
+    CONF_COMMAND_TIMEOUT,
+    CONF_OPTIMISTIC,
+    CONF_RECONCILE_TIMEOUT,
+    CONF_USE_EVENTS,
+    CONF_EVENT_GROUPS,
+    CONF_EVENT_TYPES,
+    CONF_EVENT_BUFFER_SIZE,
+    CONF_CARDHOLDER_CACHE_SIZE,
+    CONF_CARDHOLDER_CACHE_TTL,
+    CONF_USE_ALARMS,
+    CONF_USE_OCCUPANCY,
+    CONF_OCCUPANCY_RECONCILE_INTERVAL,
+    DEFAULT_STANDBY_HOSTS,
+    DEFAULT_DIVISIONS,
+    DEFAULT_CONTROLLERS,
+    DEFAULT_ITEM_INCLUDE,
+    DEFAULT_ITEM_EXCLUDE,
+    DEFAULT_RESCAN_INTERVAL,
+    DEFAULT_READY_TIMEOUT,
+    DEFAULT_STALL_THRESHOLD,
+    DEFAULT_COMMAND_CONCURRENCY,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_OPTIMISTIC,
+    DEFAULT_RECONCILE_TIMEOUT,
+    DEFAULT_USE_EVENTS,
+    DEFAULT_EVENT_GROUPS,
+    DEFAULT_EVENT_TYPES,
+    DEFAULT_EVENT_BUFFER_SIZE,
+    DEFAULT_CARDHOLDER_CACHE_SIZE,
+    DEFAULT_CARDHOLDER_CACHE_TTL,
+    DEFAULT_USE_ALARMS,
+    DEFAULT_USE_OCCUPANCY,
+    DEFAULT_OCCUPANCY_RECONCILE_INTERVAL,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,7 +77,12 @@ def validate_host_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     if str(data[CONF_HOST]).endswith("/") is False:
         data[CONF_HOST] += "/"
 
-    gallagher = GallagherRest(data[CONF_HOST], data[CONF_API_KEY])
+    # Any host of the list answering is enough, the first one that does is active
+    gallagher = GallagherRest(
+        data[CONF_HOST],
+        data[CONF_API_KEY],
+        standby_hosts=data.get(CONF_STANDBY_HOSTS, DEFAULT_STANDBY_HOSTS),
+    )
     if gallagher.check_connection(data[CONF_HOST], data[CONF_API_KEY]) is False:
         raise CannotConnect
 
@@ -44,15 +96,29 @@ def validate_host_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
         "title": "Gallagher Command Centre",
         CONF_HOST: data[CONF_HOST],
         CONF_API_KEY: data[CONF_API_KEY],
+        CONF_STANDBY_HOSTS: data.get(CONF_STANDBY_HOSTS, DEFAULT_STANDBY_HOSTS),
         "use_inputs": data["use_inputs"],
         "use_outputs": data["use_outputs"],
         "use_doors": data["use_doors"],
         "use_alarm_zones": data["use_alarm_zones"],
         "use_access_zones": data["use_access_zones"],
         "use_fence_zones": data["use_fence_zones"],
+        "use_macros": data["use_macros"],
+        CONF_DIVISIONS: data.get(CONF_DIVISIONS, DEFAULT_DIVISIONS),
+        CONF_CONTROLLERS: data.get(CONF_CONTROLLERS, DEFAULT_CONTROLLERS),
     }
 
 
+def item_rules(value: Any) -> str:
+    """Validates item include or exclude rules, see ItemFilter"""
+    value = cv.string(value)
+    try:
+        parse_rules(value)
+    except ValueError as e:
+        raise vol.Invalid(str(e)) from e
+    return value
+
+
 def create_host_data_schema(
     host="https://192.168.1.1:8904",
     api_key="xxxx-xxxx-xxxx-xxxx-xxxx-xxxx",
@@ -62,18 +128,124 @@ def create_host_data_schema(
     use_alarm_zones=True,
     use_access_zones=True,
     use_fence_zones=True,
+    use_macros=False,
 ):
     """Returns the schema for the UI configuration interface"""
     return vol.Schema(
         {
             vol.Required(CONF_HOST, description={"suggested_value": host}): str,
             vol.Required(CONF_API_KEY, description={"suggested_value": api_key}): str,
+            vol.Optional(CONF_STANDBY_HOSTS, default=DEFAULT_STANDBY_HOSTS): str,
             vol.Required("use_inputs", default=use_inputs): cv.boolean,
             vol.Required("use_outputs", default=use_outputs): cv.boolean,
             vol.Required("use_doors", default=use_doors): cv.boolean,
             vol.Required("use_alarm_zones", default=use_alarm_zones): cv.boolean,
             vol.Required("use_access_zones", default=use_access_zones): cv.boolean,
             vol.Required("use_fence_zones", default=use_fence_zones): cv.boolean,
+            vol.Required("use_macros", default=use_macros): cv.boolean,
+            vol.Optional(CONF_DIVISIONS, default=DEFAULT_DIVISIONS): str,
+            vol.Optional(CONF_CONTROLLERS, default=DEFAULT_CONTROLLERS): str,
+        }
+    )
+
+
+def create_options_schema(options: dict[str, Any]):
+    """Returns the schema for the options interface"""
+    return vol.Schema(
+        {
+            vol.Optional(
+                CONF_STANDBY_HOSTS,
+                default=options.get(CONF_STANDBY_HOSTS, DEFAULT_STANDBY_HOSTS),
+            ): str,
+            vol.Optional(
+                CONF_DIVISIONS,
+                default=options.get(CONF_DIVISIONS, DEFAULT_DIVISIONS),
+            ): str,
+            vol.Optional(
+                CONF_CONTROLLERS,
+                default=options.get(CONF_CONTROLLERS, DEFAULT_CONTROLLERS),
+            ): str,
+            vol.Optional(
+                CONF_ITEM_INCLUDE,
+                default=options.get(CONF_ITEM_INCLUDE, DEFAULT_ITEM_INCLUDE),
+            ): item_rules,
+            vol.Optional(
+                CONF_ITEM_EXCLUDE,
+                default=options.get(CONF_ITEM_EXCLUDE, DEFAULT_ITEM_EXCLUDE),
+            ): item_rules,
+            vol.Required(
+                CONF_RESCAN_INTERVAL,
+                default=options.get(CONF_RESCAN_INTERVAL, DEFAULT_RESCAN_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Any(0, vol.Range(min=300, max=86400))),
+            vol.Required(
+                CONF_READY_TIMEOUT,
+                default=options.get(CONF_READY_TIMEOUT, DEFAULT_READY_TIMEOUT),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+            vol.Required(
+                CONF_STALL_THRESHOLD,
+                default=options.get(CONF_STALL_THRESHOLD, DEFAULT_STALL_THRESHOLD),
+            ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+            vol.Required(
+                CONF_COMMAND_CONCURRENCY,
+                default=options.get(
+                    CONF_COMMAND_CONCURRENCY, DEFAULT_COMMAND_CONCURRENCY
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+            vol.Required(
+                CONF_COMMAND_TIMEOUT,
+                default=options.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+            vol.Required(
+                CONF_OPTIMISTIC,
+                default=options.get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC),
+            ): cv.boolean,
+            vol.Required(
+                CONF_RECONCILE_TIMEOUT,
+                default=options.get(CONF_RECONCILE_TIMEOUT, DEFAULT_RECONCILE_TIMEOUT),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=300)),
+            vol.Required(
+                CONF_USE_EVENTS,
+                default=options.get(CONF_USE_EVENTS, DEFAULT_USE_EVENTS),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_EVENT_GROUPS,
+                default=options.get(CONF_EVENT_GROUPS, DEFAULT_EVENT_GROUPS),
+            ): str,
+            vol.Optional(
+                CONF_EVENT_TYPES,
+                default=options.get(CONF_EVENT_TYPES, DEFAULT_EVENT_TYPES),
+            ): str,
+            vol.Required(
+                CONF_EVENT_BUFFER_SIZE,
+                default=options.get(CONF_EVENT_BUFFER_SIZE, DEFAULT_EVENT_BUFFER_SIZE),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100000)),
+            vol.Required(
+                CONF_CARDHOLDER_CACHE_SIZE,
+                default=options.get(
+                    CONF_CARDHOLDER_CACHE_SIZE, DEFAULT_CARDHOLDER_CACHE_SIZE
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100000)),
+            vol.Required(
+                CONF_CARDHOLDER_CACHE_TTL,
+                default=options.get(
+                    CONF_CARDHOLDER_CACHE_TTL, DEFAULT_CARDHOLDER_CACHE_TTL
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+            vol.Required(
+                CONF_USE_ALARMS,
+                default=options.get(CONF_USE_ALARMS, DEFAULT_USE_ALARMS),
+            ): cv.boolean,
+            vol.Required(
+                CONF_USE_OCCUPANCY,
+                default=options.get(CONF_USE_OCCUPANCY, DEFAULT_USE_OCCUPANCY),
+            ): cv.boolean,
+            vol.Required(
+                CONF_OCCUPANCY_RECONCILE_INTERVAL,
+                default=options.get(
+                    CONF_OCCUPANCY_RECONCILE_INTERVAL,
+                    DEFAULT_OCCUPANCY_RECONCILE_INTERVAL,
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=30, max=86400)),
         }
     )
 
@@ -83,6 +255,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Returns the options flow handler"""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -117,6 +297,31 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options for Gallagher Command Centre Integration."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self.config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = dict(self.config_entry.options)
+        # The item selection starts from the one made when the entry was created
+        for key in (CONF_STANDBY_HOSTS, CONF_DIVISIONS, CONF_CONTROLLERS):
+            if key not in options and key in self.config_entry.data:
+                options[key] = self.config_entry.data[key]
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=create_options_schema(options),
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
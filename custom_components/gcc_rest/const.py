@@ -5,10 +5,17 @@ DOMAIN = "gcc_rest"
 
 # Location in memory of API
 CONF_API_REF = "Gallagher"
+# Location in memory of the event bridge
+CONF_EVENT_REF = "Events"
+# Location in memory of the engines shared between entries, outside hass.data[DOMAIN]
+# which only holds per entry storage
+DATA_ENGINES = "gcc_rest_engines"
 
 # Command Centre host and api key
 CONF_HOST = "host"
 CONF_API_KEY = "api"
+# Standby hosts tried in order when the active host fails
+CONF_STANDBY_HOSTS = "standby_hosts"
 
 
 CONF_USE_INPUTS = "use_inputs"
@@ -17,3 +24,89 @@ CONF_USE_ALARM_ZONES = "use_alarm_zones"
 CONF_USE_ACCESS_ZONES = "use_access_zones"
 CONF_USE_DOORS = "use_doors"
 CONF_USE_FENCE_ZONES = "use_fence_zones"
+CONF_USE_MACROS = "use_macros"
+
+# Options
+CONF_DIVISIONS = "divisions"
+CONF_CONTROLLERS = "controllers"
+CONF_ITEM_INCLUDE = "item_include"
+CONF_ITEM_EXCLUDE = "item_exclude"
+CONF_RESCAN_INTERVAL = "rescan_interval"
+CONF_READY_TIMEOUT = "ready_timeout"
+CONF_STALL_THRESHOLD = "stall_threshold"
+CONF_COMMAND_CONCURRENCY = "command_concurrency"
+CONF_COMMAND_TIMEOUT = "command_timeout"
+CONF_OPTIMISTIC = "optimistic"
+CONF_RECONCILE_TIMEOUT = "reconcile_timeout"
+CONF_USE_EVENTS = "use_events"
+CONF_EVENT_GROUPS = "event_groups"
+CONF_EVENT_TYPES = "event_types"
+CONF_USE_ALARMS = "use_alarms"
+CONF_EVENT_BUFFER_SIZE = "event_buffer_size"
+CONF_CARDHOLDER_CACHE_SIZE = "cardholder_cache_size"
+CONF_CARDHOLDER_CACHE_TTL = "cardholder_cache_ttl"
+CONF_USE_OCCUPANCY = "use_occupancy"
+CONF_OCCUPANCY_RECONCILE_INTERVAL = "occupancy_reconcile_interval"
+
+DEFAULT_STANDBY_HOSTS = ""
+DEFAULT_DIVISIONS = ""
+DEFAULT_CONTROLLERS = ""
+DEFAULT_ITEM_INCLUDE = ""
+DEFAULT_ITEM_EXCLUDE = ""
+DEFAULT_RESCAN_INTERVAL = 3600
+DEFAULT_READY_TIMEOUT = 30
+DEFAULT_STALL_THRESHOLD = 120
+DEFAULT_COMMAND_CONCURRENCY = 4
+DEFAULT_COMMAND_TIMEOUT = 10
+DEFAULT_OPTIMISTIC = False
+DEFAULT_RECONCILE_TIMEOUT = 10
+DEFAULT_USE_EVENTS = False
+DEFAULT_EVENT_GROUPS = ""
+DEFAULT_EVENT_TYPES = ""
+DEFAULT_USE_ALARMS = False
+DEFAULT_EVENT_BUFFER_SIZE = 5000
+DEFAULT_CARDHOLDER_CACHE_SIZE = 1000
+DEFAULT_CARDHOLDER_CACHE_TTL = 3600
+DEFAULT_USE_OCCUPANCY = False
+DEFAULT_OCCUPANCY_RECONCILE_INTERVAL = 300
+
+# Event fired on the Home Assistant bus for every Command Centre event
+EVENT_GCC_REST = "gcc_rest_event"
+
+# Dispatcher signal sent when the active alarm list of an entry changes
+SIGNAL_ALARMS_UPDATED = "gcc_rest_alarms_updated_{}"
+# Dispatcher signal sent when the occupancy of an access zone changes - (entry, zone)
+SIGNAL_OCCUPANCY_UPDATED = "gcc_rest_occupancy_updated_{}_{}"
+# Dispatcher signal sent when a rescan loads new items - (entry), sent with (name, items)
+SIGNAL_ITEMS_ADDED = "gcc_rest_items_added_{}"
+# Dispatcher signal sent when a controller goes offline or online - (entry, controller)
+SIGNAL_CONTROLLER_UPDATED = "gcc_rest_controller_updated_{}_{}"
+
+# Services
+SERVICE_BULK_COMMAND = "bulk_command"
+
+ATTR_COMMAND = "command"
+ATTR_DIVISION = "division"
+ATTR_CONTROLLER = "controller"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_FORCE = "force"
+ATTR_TIMEOUT = "timeout"
+SERVICE_TURN_ON_FOR = "turn_on_for"
+SERVICE_TURN_OFF_FOR = "turn_off_for"
+SERVICE_ZONE_OVERRIDE_FOR = "zone_override_for"
+SERVICE_ACKNOWLEDGE_ALARMS = "acknowledge_alarms"
+SERVICE_PROCESS_ALARMS = "process_alarms"
+SERVICE_QUERY_EVENTS = "query_events"
+SERVICE_RESCAN = "rescan"
+
+ATTR_DURATION = "duration"
+ATTR_MODE = "mode"
+ATTR_ALARM_IDS = "alarm_ids"
+ATTR_PRIORITY = "priority"
+ATTR_SOURCE_ID = "source_id"
+ATTR_COMMENT = "comment"
+ATTR_ITEM_ID = "item_id"
+ATTR_CARDHOLDER_ID = "cardholder_id"
+ATTR_TYPE_ID = "type_id"
+ATTR_WITHIN = "within"
+ATTR_LIMIT = "limit"
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from homeassistant.components.cover import (
@@ -15,6 +15,8 @@ from homeassistant.const import STATE_OPEN, STATE_CLOSED
 
 from .const import DOMAIN, CONF_API_REF, CONF_USE_DOORS
 
+from .entity import GCCControllerMixin, GCCOptimisticMixin, GCCRestoreMixin
+from .discovery import async_add_new_items
 from .gallagher.GallagherRest import GallagherRest
 
 import logging
@@ -37,7 +39,7 @@ async def async_setup_entry(
         _LOGGER.info("Using GCC Doors")
         covers: list[GCCDoor] = []
 
-        doors = await hass.async_add_executor_job(gallagher.get_available_doors)
+        doors = gallagher.get_loaded_items("doors")
 
         for door in doors:
             cover = GCCDoor(door, gallagher, entry)
@@ -45,12 +47,21 @@ async def async_setup_entry(
 
         # print(outputs)
         async_add_entities(covers)
+        async_add_new_items(
+            hass,
+            entry,
+            "doors",
+            lambda items: [GCCDoor(item, gallagher, entry) for item in items],
+            async_add_entities,
+        )
 
     else:
         _LOGGER.info("Not using GCC doors, ceasing setup of door toggle switches")
 
 
-class GCCDoor(CoverEntity):
+class GCCDoor(
+    GCCControllerMixin, GCCOptimisticMixin, GCCRestoreMixin, CoverEntity
+):
     """GCC Rest Door"""
 
     def __init__(self, gallagher_data, gallagher: GallagherRest, entry: ConfigEntry):
@@ -76,15 +87,23 @@ class GCCDoor(CoverEntity):
         }
 
         self._attr_extra_state_attributes = self._extra_state_attributes
+        self._setup_controller(entry, gallagher_data)
+        # The door shows as open until it is reported open, or rolls back if nobody
+        # walks through before the reconcile timeout
+        self._setup_optimistic(entry, "is_open", "cover")
 
         gallagher.get_door(self._gallagher_id).register_callback(self.proccess_callback)
 
-    def open_cover(self, **kwargs):
+    async def async_open_cover(self, **kwargs):
         """Open the cover."""
-        self._gallagher.get_door(self._gallagher_id).open()
+        await self._async_optimistic_command(
+            self._gallagher.get_door(self._gallagher_id).open(), True
+        )
 
     def proccess_callback(self, gcc_update):
         """Callback processor"""
+        self._live_update()
+        gcc_update = self._optimistic_filter(gcc_update)
         self._state = STATES[gcc_update["is_open"]]
         self._stat_attr_is_closed = gcc_update["is_open"] is False
 
@@ -96,7 +115,8 @@ class GCCDoor(CoverEntity):
 
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added."""
-        await self.async_base_added_to_hass()
+        self._async_watch_controller()
+        await self._async_added_restoring()
 
     async def async_base_added_to_hass(self) -> None:
         """Handle entity which will be added."""
@@ -109,6 +129,6 @@ class GCCDoor(CoverEntity):
         """Returns state of door"""
         return self._state
 
-    async def async_get_last_state(self):
-        """Returns state of door"""
-        return self._state
+    def _restore_state(self, last_state: State) -> None:
+        self._state = last_state.state
+        self._stat_attr_is_closed = last_state.state == STATE_CLOSED
@@ -0,0 +1,23 @@
+"""Diagnostics support for the Gallagher Command Centre Integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_API_REF
+
+from .gallagher.GallagherRest import GallagherRest
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    gallagher: GallagherRest = hass.data[DOMAIN][entry.entry_id][CONF_API_REF]
+
+    return {
+        "startup_trace": gallagher.get_startup_trace(),
+        "metrics": gallagher.get_metrics(),
+    }
@@ -0,0 +1,132 @@
+"""Incremental discovery of Command Centre items."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+    dispatcher_send,
+)
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, CONF_API_REF, SIGNAL_ITEMS_ADDED
+
+from .gallagher.GallagherRest import GallagherRest
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def item_id_from_unique_id(entry: ConfigEntry, unique_id: str) -> str | None:
+    """Returns the Command Centre item id of an entity unique id, None if not an item"""
+    prefix = "GCC_{}_".format(entry.entry_id)
+    if not unique_id.startswith(prefix):
+        return None
+    item_id = unique_id[len(prefix) :]
+    if item_id.endswith("_occupancy"):
+        item_id = item_id[: -len("_occupancy")]
+    # Metric, timing and alarm sensors are not items
+    return None if "_" in item_id else item_id
+
+
+async def async_rescan(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Rescans the items of an entry, adding and removing their entities
+
+    Returns {"added": {item name: [item ids]}, "removed": {item name: [item ids]}}"""
+    gallagher: GallagherRest = hass.data[DOMAIN][entry.entry_id][CONF_API_REF]
+    changes = await hass.async_add_executor_job(gallagher.rescan)
+
+    removed = set(
+        item_id for item_ids in changes["removed"].values() for item_id in item_ids
+    )
+    if len(removed) > 0:
+        # Items deleted in Command Centre do not come back, neither do their entities
+        registry = er.async_get(hass)
+        for entity in er.async_entries_for_config_entry(registry, entry.entry_id):
+            if item_id_from_unique_id(entry, entity.unique_id) in removed:
+                _LOGGER.info(
+                    "Removing {}, its item was removed from Command Centre".format(
+                        entity.entity_id
+                    )
+                )
+                registry.async_remove(entity.entity_id)
+
+    for item_name, item_ids in changes["added"].items():
+        added = set(item_ids)
+        async_dispatcher_send(
+            hass,
+            SIGNAL_ITEMS_ADDED.format(entry.entry_id),
+            item_name,
+            [
+                item
+                for item in gallagher.get_loaded_items(item_name)
+                if item["id"] in added
+            ],
+        )
+
+    return changes
+
+
+@callback
+def async_setup_feature_listener(
+    hass: HomeAssistant, entry: ConfigEntry, gallagher: GallagherRest
+) -> None:
+    """Adds the entities of item types that load after a failed start"""
+
+    def feature_loaded(item_name: str, item_ids: list[str]) -> None:
+        # Called from the engine retry thread
+        _LOGGER.info("{} loaded after a failed start".format(item_name))
+        loaded = set(item_ids)
+        dispatcher_send(
+            hass,
+            SIGNAL_ITEMS_ADDED.format(entry.entry_id),
+            item_name,
+            [
+                item
+                for item in gallagher.get_loaded_items(item_name)
+                if item["id"] in loaded
+            ],
+        )
+
+    gallagher.set_feature_listener(feature_loaded)
+    entry.async_on_unload(lambda: gallagher.set_feature_listener(None))
+
+
+@callback
+def async_add_new_items(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    item_name: str,
+    create_entities: Callable[[list[dict[str, Any]]], list[Entity]],
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Adds the entities of items of one type found by a rescan
+
+    create_entities returns the entities of a list of items from get_loaded_items(). Call
+    it right after creating the entities of the items loaded so far, items announced
+    again are skipped."""
+    gallagher: GallagherRest = hass.data[DOMAIN][entry.entry_id][CONF_API_REF]
+    # Command Centre never reuses the id of a deleted item
+    known = set(item["id"] for item in gallagher.get_loaded_items(item_name))
+
+    @callback
+    def async_items_added(added_item_name: str, items: list[dict[str, Any]]) -> None:
+        if added_item_name != item_name:
+            return
+        items = [item for item in items if item["id"] not in known]
+        if len(items) > 0:
+            known.update(item["id"] for item in items)
+            async_add_entities(create_entities(items))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_ITEMS_ADDED.format(entry.entry_id), async_items_added
+        )
+    )
@@ -0,0 +1,134 @@
+"""Engines shared between config entries for the same Command Centre."""
+from __future__ import annotations
+
+from threading import Lock
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_HOST,
+    CONF_API_KEY,
+    CONF_STANDBY_HOSTS,
+    DEFAULT_STANDBY_HOSTS,
+    DATA_ENGINES,
+)
+
+from .gallagher.GallagherRest import GallagherRest
+from .gallagher.GallagherSession import GallagherSession
+from .gallagher.HostFailover import HostFailover, parse_host_list
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class GCCEngineRegistry:
+    """Hands out one engine per Command Centre host and API key
+
+    The engine owns the item subscription, each entry attaches its own GallagherRest
+    to it, see GallagherRest.attach(). Entries with a different API key see different
+    items and features, so they get their own engine, but every engine on a host
+    shares one connection pool and one host failover. The failover tries the standby
+    hosts of every entry on the host."""
+
+    def __init__(self):
+        self._lock = Lock()
+        # (host, api key) -> [engine, {entry id: entry using it}]
+        self._engines = {}
+        # host -> [failover, pooled session, keys of the engines using them]
+        self._pools = {}
+
+    @staticmethod
+    def get(hass: HomeAssistant) -> GCCEngineRegistry:
+        if DATA_ENGINES not in hass.data:
+            hass.data[DATA_ENGINES] = GCCEngineRegistry()
+        return hass.data[DATA_ENGINES]
+
+    def acquire(self, entry: ConfigEntry) -> GallagherRest:
+        """Returns the shared engine of an entry, creating it for the first entry
+
+        Blocking, run in the executor"""
+        key = _engine_key(entry)
+        with self._lock:
+            shared = self._engines.get(key)
+            if shared is None:
+                pool = self._pools.get(key[0])
+                if pool is None:
+                    failover = HostFailover([entry.data.get(CONF_HOST)])
+                    pool = self._pools[key[0]] = [
+                        failover,
+                        GallagherSession(failover),
+                        set(),
+                    ]
+                # Connecting may already need this entry's standby hosts
+                pool[0].set_hosts(
+                    pool[0].get_hosts() + parse_host_list(get_standby_hosts(entry))
+                )
+                _LOGGER.info("Creating shared engine for {}".format(key[0]))
+                engine = GallagherRest(
+                    entry.data.get(CONF_HOST),
+                    entry.data.get(CONF_API_KEY),
+                    failover=pool[0],
+                    pool=pool[1],
+                )
+                pool[2].add(key)
+                shared = self._engines[key] = [engine, {}]
+            # The latest entry object, its options may have changed since
+            shared[1][entry.entry_id] = entry
+            self.__update_hosts(key[0])
+            return shared[0]
+
+    def release(self, entry: ConfigEntry) -> None:
+        """Stops the shared engine of an entry once no entry uses it
+
+        Blocking, run in the executor"""
+        key = _engine_key(entry)
+        pool = None
+        with self._lock:
+            shared = self._engines.get(key)
+            if shared is None or entry.entry_id not in shared[1]:
+                return
+            del shared[1][entry.entry_id]
+            if len(shared[1]) == 0:
+                del self._engines[key]
+                self._pools[key[0]][2].discard(key)
+                if len(self._pools[key[0]][2]) == 0:
+                    pool = self._pools.pop(key[0])
+            if key[0] in self._pools:
+                self.__update_hosts(key[0])
+            if len(shared[1]) > 0:
+                return
+        _LOGGER.info("Stopping shared engine for {}".format(key[0]))
+        shared[0].stop()
+        if pool is not None:
+            # The last engine on the host
+            pool[1].close()
+
+    def get_entry_count(self, entry: ConfigEntry) -> int:
+        with self._lock:
+            shared = self._engines.get(_engine_key(entry))
+            return 0 if shared is None else len(shared[1])
+
+    def __update_hosts(self, host) -> None:
+        """Fails the host over to the standby hosts of all its entries, in order"""
+        failover, _, keys = self._pools[host]
+        hosts = failover.get_hosts()[:1]
+        for key in keys:
+            for entry in self._engines[key][1].values():
+                hosts += parse_host_list(get_standby_hosts(entry))
+        failover.set_hosts(hosts)
+
+
+def get_standby_hosts(entry: ConfigEntry) -> str:
+    """Returns the standby hosts of an entry, the options overriding the entry data"""
+    return entry.options.get(
+        CONF_STANDBY_HOSTS, entry.data.get(CONF_STANDBY_HOSTS, DEFAULT_STANDBY_HOSTS)
+    )
+
+
+def _engine_key(entry: ConfigEntry):
+    host = entry.data.get(CONF_HOST) or ""
+    if not host.endswith("/"):
+        host += "/"
+    return host.lower(), entry.data.get(CONF_API_KEY)
@@ -0,0 +1,231 @@
+"""Shared entity behaviour for the Gallagher Command Centre Integration."""
+from __future__ import annotations
+
+import asyncio
+from abc import abstractmethod
+import time
+from functools import partial
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import State, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.restore_state import RestoreEntity
+
+from .const import (
+    CONF_OPTIMISTIC,
+    CONF_RECONCILE_TIMEOUT,
+    DEFAULT_OPTIMISTIC,
+    DEFAULT_RECONCILE_TIMEOUT,
+    SIGNAL_CONTROLLER_UPDATED,
+)
+
+from .gallagher.CommandDispatcher import CommandOutcome
+from .gallagher.GallagherRest import GallagherRest
+
+
+class GCCOptimisticMixin:
+    """Shows the target state of a successful command until Command Centre confirms it
+
+    The entity passes every item update through _optimistic_filter() before using it.
+    While a command is pending the watched field is replaced by the target value and the
+    `pending` attribute is set. A matching update confirms the command, otherwise the
+    entity rolls back to the last reported state once the reconcile timeout expires."""
+
+    _gallagher: GallagherRest
+    _extra_state_attributes: dict
+
+    _optimistic_enabled = DEFAULT_OPTIMISTIC
+    _optimistic_timeout = DEFAULT_RECONCILE_TIMEOUT
+    _optimistic_field = "state"
+    _optimistic_platform = None
+    _optimistic_target = None
+    _optimistic_started = None
+    _optimistic_token = None
+    _optimistic_last_update = None
+
+    def _setup_optimistic(self, entry: ConfigEntry, field, platform):
+        """Reads the optimistic options, field is the item status key commands change"""
+        self._optimistic_enabled = entry.options.get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC)
+        self._optimistic_timeout = entry.options.get(
+            CONF_RECONCILE_TIMEOUT, DEFAULT_RECONCILE_TIMEOUT
+        )
+        self._optimistic_field = field
+        self._optimistic_platform = platform
+        self._extra_state_attributes["pending"] = False
+
+    async def _async_optimistic_command(self, future, target):
+        """Awaits a command Future, then shows target until it is confirmed or expires"""
+        started = time.monotonic()
+        outcome = await asyncio.wrap_future(future)
+
+        if outcome is not CommandOutcome.SUCCESS or not self._optimistic_enabled:
+            return outcome
+
+        token = object()
+        self._optimistic_token = token
+        self._optimistic_started = started
+        self._optimistic_target = target
+
+        if self._optimistic_last_update is not None:
+            self.proccess_callback(self._optimistic_last_update)
+
+        if self._optimistic_target is not None:
+            async_call_later(
+                self.hass,
+                self._optimistic_timeout,
+                partial(self._async_optimistic_expired, token),
+            )
+        return outcome
+
+    def _optimistic_filter(self, gcc_update):
+        """Returns the update to display, confirming a pending command if it matches"""
+        self._optimistic_last_update = gcc_update
+        target = self._optimistic_target
+
+        if target is None:
+            self._extra_state_attributes["pending"] = False
+            return gcc_update
+
+        if gcc_update.get(self._optimistic_field) == target:
+            self._optimistic_target = None
+            self._extra_state_attributes["pending"] = False
+            metrics = self._gallagher.get_metrics_registry()
+            metrics.increment("optimistic.confirmed")
+            latency = time.monotonic() - self._optimistic_started
+            metrics.record_timing("optimistic.confirmation_latency", latency)
+            metrics.record_timing(
+                "optimistic.confirmation_latency.{}".format(self._optimistic_platform),
+                latency,
+            )
+            return gcc_update
+
+        self._extra_state_attributes["pending"] = True
+        return dict(gcc_update, **{self._optimistic_field: target})
+
+    @callback
+    def _async_optimistic_expired(self, token, _now=None):
+        if token is not self._optimistic_token or self._optimistic_target is None:
+            return
+
+        self._optimistic_target = None
+        self._gallagher.get_metrics_registry().increment("optimistic.rolled_back")
+        if self._optimistic_last_update is not None:
+            self.proccess_callback(self._optimistic_last_update)
+
+
+class GCCControllerMixin:
+    """Shows the entity as unavailable while the controller of its item is offline
+
+    The engine stops decoding the updates of items on an offline controller, the entity
+    is written once per controller transition instead. The entity calls
+    _setup_controller() and, once added, _async_watch_controller()."""
+
+    _gallagher: GallagherRest
+
+    _controller_id = None
+    _controller_signal = None
+
+    def _setup_controller(self, entry: ConfigEntry, gallagher_data) -> None:
+        controller_id = gallagher_data.get("controller")
+        if controller_id is None:
+            return
+        self._controller_id = str(controller_id)
+        self._controller_signal = SIGNAL_CONTROLLER_UPDATED.format(
+            entry.entry_id, self._controller_id
+        )
+
+    @property
+    def available(self) -> bool:
+        """False while the controller of the item is known to be offline"""
+        return (
+            self._controller_id is None
+            or self._gallagher.is_controller_online(self._controller_id) is not False
+        )
+
+    @callback
+    def _async_watch_controller(self) -> None:
+        if self._controller_signal is not None:
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass, self._controller_signal, self._async_controller_changed
+                )
+            )
+
+    @callback
+    def _async_controller_changed(self) -> None:
+        self.async_write_ha_state()
+
+
+class GCCRestoreMixin(RestoreEntity):
+    """Shows the last known state after a restart until the item reports
+
+    Until the subscription snapshot reaches the item, the entity shows the state it had
+    when Home Assistant stopped with the `stale` attribute set, instead of unknown. The
+    entity calls _live_update() from its callback, the first live update replaces the
+    restored state and clears the marker. The entity implements _restore_state()."""
+
+    _gallagher: GallagherRest
+    _gallagher_id: str
+    _extra_state_attributes: dict
+
+    _stale = False
+    _stale_since = None
+
+    async def _async_added_restoring(self) -> None:
+        """Shows the live state if the item has reported, else the last known state"""
+        self._extra_state_attributes["stale"] = False
+        if not self._gallagher.has_item_state(self._gallagher_id):
+            last_state = await self.async_get_last_state()
+            # The snapshot may have been applied while the last state was read
+            if (
+                last_state is not None
+                and last_state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE)
+                and not self._gallagher.has_item_state(self._gallagher_id)
+            ):
+                self.__restore(last_state)
+                return
+
+        await self.async_base_added_to_hass()
+
+    @abstractmethod
+    def _restore_state(self, last_state: State) -> None:
+        """Sets the entity state from its last known state"""
+
+    def _live_update(self) -> None:
+        """Called for every update from the item, replaces a restored state"""
+        self.__first_meaningful_state(restored=False)
+
+        if not self._stale:
+            return
+        self._stale = False
+        self._extra_state_attributes["stale"] = False
+        metrics = self._gallagher.get_metrics_registry()
+        metrics.increment("restore.replaced")
+        metrics.record_timing(
+            "restore.stale_duration", time.monotonic() - self._stale_since
+        )
+
+    def __restore(self, last_state: State) -> None:
+        self._restore_state(last_state)
+        for attr, value in last_state.attributes.items():
+            if attr in ("pending", "stale"):
+                continue
+            if attr in self._extra_state_attributes:
+                self._extra_state_attributes[attr] = value
+
+        self._stale = True
+        self._stale_since = time.monotonic()
+        self._extra_state_attributes["stale"] = True
+        self._gallagher.get_metrics_registry().increment("restore.restored")
+        self.__first_meaningful_state(restored=True)
+
+    def __first_meaningful_state(self, restored) -> None:
+        elapsed = self._gallagher.get_startup_tracer().mark_first_meaningful_state(
+            self._gallagher_id, restored
+        )
+        if elapsed is not None:
+            self._gallagher.get_metrics_registry().record_timing(
+                "startup.first_meaningful_state", elapsed
+            )
@@ -0,0 +1,129 @@
+"""Command Centre events on the Home Assistant event bus."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    CONF_HOST,
+    CONF_EVENT_GROUPS,
+    CONF_EVENT_TYPES,
+    DEFAULT_EVENT_GROUPS,
+    DEFAULT_EVENT_TYPES,
+    EVENT_GCC_REST,
+)
+
+from .gallagher.GallagherRest import GallagherRest
+from .gallagher.EventStream import get_filter_signature
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Cursor writes are coalesced, a crash replays at most this many seconds of events
+SAVE_DELAY = 5
+
+
+def parse_id_list(value: str | None):
+    """Returns the ids of a comma separated option, None if it is empty"""
+    ids = [item.strip() for item in (value or "").split(",") if item.strip() != ""]
+    return ids or None
+
+
+class GCCEventBridge:
+    """Fires Command Centre events on the bus and persists the event cursor"""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, gallagher: GallagherRest):
+        self._hass = hass
+        self._entry = entry
+        self._gallagher = gallagher
+        self._store = Store(
+            hass, STORAGE_VERSION, "{}.{}.events".format(DOMAIN, entry.entry_id)
+        )
+        self._groups = parse_id_list(
+            entry.options.get(CONF_EVENT_GROUPS, DEFAULT_EVENT_GROUPS)
+        )
+        self._types = parse_id_list(
+            entry.options.get(CONF_EVENT_TYPES, DEFAULT_EVENT_TYPES)
+        )
+        self._filter = get_filter_signature(self._groups, self._types)
+        self._cursor = None
+        self._stream = None
+
+    async def async_start(self) -> bool:
+        """Starts the event stream from the saved cursor, returns False if unavailable"""
+        saved = await self._store.async_load() or {}
+
+        cursor = saved.get("cursor")
+        if saved.get("host") != self._entry.data.get(CONF_HOST) or (
+            saved.get("filter") != self._filter
+        ):
+            # The cursor belongs to another server or filter, it would skip or replay events
+            cursor = None
+        self._cursor = cursor
+
+        self._stream = await self._hass.async_add_executor_job(
+            self._gallagher.start_event_stream,
+            self._on_events,
+            cursor,
+            self._groups,
+            self._types,
+        )
+        return self._stream is not None
+
+    async def async_stop(self) -> None:
+        """Saves the cursor of the last delivered batch, call after the stream stopped"""
+        if self._stream is None:
+            return
+        await self._store.async_save(self._data_to_save())
+
+    def _on_events(self, events: list[dict[str, Any]], cursor: str) -> None:
+        """Called from the event stream thread, hands the whole batch to the event loop"""
+        self._hass.loop.call_soon_threadsafe(self._async_fire_events, events, cursor)
+
+    @callback
+    def _async_fire_events(self, events: list[dict[str, Any]], cursor: str) -> None:
+        for event in events:
+            self._hass.bus.async_fire(EVENT_GCC_REST, self._event_data(event))
+
+        self._cursor = cursor
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "host": self._entry.data.get(CONF_HOST),
+            "filter": self._filter,
+            "cursor": self._cursor,
+        }
+
+    def _event_data(self, event: dict[str, Any]) -> dict[str, Any]:
+        """Flattens the fields automations match on, the full event is kept under event"""
+
+        def ref(key, field):
+            value = event.get(key)
+            if isinstance(value, dict):
+                return value.get(field)
+            return None
+
+        return {
+            "config_entry_id": self._entry.entry_id,
+            "id": event.get("id"),
+            "time": event.get("time"),
+            "message": event.get("message"),
+            "priority": event.get("priority"),
+            "type_id": ref("type", "id"),
+            "type": ref("type", "name"),
+            "group_id": ref("group", "id"),
+            "group": ref("group", "name"),
+            "source_id": ref("source", "id"),
+            "source": ref("source", "name"),
+            "cardholder_id": ref("cardholder", "id"),
+            "cardholder": ref("cardholder", "name"),
+            "event": event,
+        }
@@ -0,0 +1,305 @@
+import logging
+import traceback
+from threading import Event, Lock, Thread
+
+import requests
+
+from .CustomFormatter import CustomFormatter
+from .GallagherSession import GallagherSession
+from .ReconnectPolicy import ReconnectPolicy, FailureType, classify_failure
+from .CommandDispatcher import CommandOutcome, completed_command
+
+# Connect timeout for the alarm requests
+CONNECT_TIMEOUT = 10
+# Read timeout for the alarm updates long-poll
+LONG_POLL_TIMEOUT = 90
+# Alarm states that remove the alarm from the active list
+CLEARED_STATES = ["processed"]
+
+
+class AlarmTracker:
+    """Keeps the active alarm list in memory, following the alarm updates feed
+
+    The full list is loaded once, after that only changed alarms are received. Alarms are
+    indexed by id, with running counts per priority and per source item. After a feed
+    failure the full list is loaded again, so no change is missed."""
+
+    def __init__(
+        self,
+        alarms_href,
+        api_key,
+        dispatcher=None,
+        metrics=None,
+        on_change=None,
+        failover=None,
+    ):
+        self.log = logging.getLogger("AlarmTracker")
+        self.log.setLevel(logging.INFO)
+        if not self.log.handlers:
+            ch = logging.StreamHandler()
+            ch.setLevel(logging.INFO)
+            ch.setFormatter(CustomFormatter())
+            self.log.addHandler(ch)
+
+        self._alarms_href = alarms_href
+        self._api_key = api_key
+        self._dispatcher = dispatcher
+        self._metrics = metrics
+        self._on_change = on_change
+
+        self._lock = Lock()
+        # alarm id -> alarm
+        self._alarms = {}
+        # priority -> active alarm count
+        self._by_priority = {}
+        # source item id -> active alarm count
+        self._by_source = {}
+        # source item id -> source name
+        self._source_names = {}
+
+        self._session = GallagherSession(failover)
+        self._reconnect_policy = ReconnectPolicy()
+        self._stop_event = Event()
+        self._loaded = Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._session.reset()
+        self._thread = Thread(target=self.__run, name="GallagherAlarms", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stops following the feed, aborting the in-flight long-poll"""
+        self._stop_event.set()
+        self._session.cancel()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._session.close()
+
+    def wait_until_loaded(self, timeout=None):
+        return self._loaded.wait(timeout)
+
+    def get_alarm(self, alarm_id):
+        with self._lock:
+            return self._alarms.get(str(alarm_id))
+
+    def get_alarms(self):
+        with self._lock:
+            return list(self._alarms.values())
+
+    def get_count(self):
+        with self._lock:
+            return len(self._alarms)
+
+    def get_counts_by_priority(self):
+        with self._lock:
+            return dict(self._by_priority)
+
+    def get_counts_by_source(self):
+        """Returns source item id -> (source name, active alarm count)"""
+        with self._lock:
+            return {
+                source_id: (self._source_names.get(source_id), count)
+                for source_id, count in self._by_source.items()
+            }
+
+    def get_counts_by_state(self):
+        with self._lock:
+            counts = {}
+            for alarm in self._alarms.values():
+                state = alarm.get("state")
+                counts[state] = counts.get(state, 0) + 1
+            return counts
+
+    def acknowledge(self, alarm_ids, comment=None, timeout=None):
+        """Acknowledges many alarms concurrently, returns a dict of alarm id -> Future"""
+        return self.__batch("acknowledge", alarm_ids, comment, timeout)
+
+    def process(self, alarm_ids, comment=None, timeout=None):
+        """Processes many alarms concurrently, returns a dict of alarm id -> Future"""
+        return self.__batch("process", alarm_ids, comment, timeout)
+
+    def __batch(self, action, alarm_ids, comment, timeout):
+        futures = {}
+        for alarm_id in alarm_ids:
+            alarm_id = str(alarm_id)
+            alarm = self.get_alarm(alarm_id)
+            href = None
+            if alarm is not None:
+                link = alarm.get(action + "WithComment") if comment else None
+                link = link or alarm.get(action)
+                if isinstance(link, dict):
+                    href = link.get("href")
+
+            if href is None or self._dispatcher is None:
+                self.log.warning(
+                    "Unable to {} alarm {}, not active or not allowed".format(
+                        action, alarm_id
+                    )
+                )
+                futures[alarm_id] = completed_command(CommandOutcome.FAILED)
+                continue
+
+            futures[alarm_id] = self._dispatcher.submit(
+                "alarm-{}".format(alarm_id),
+                "Alarm",
+                action,
+                href,
+                body=None if comment is None else {"comment": comment},
+                timeout=timeout,
+            )
+        return futures
+
+    def __run(self):
+        next_url = None
+        while not self._stop_event.is_set():
+            try:
+                if next_url is None:
+                    next_url = self.__load()
+                    self._reconnect_policy.record_success()
+                    continue
+
+                req = self._session.get(
+                    next_url,
+                    verify=False,
+                    headers={"Authorization": "GGL-API-KEY " + self._api_key},
+                    timeout=(CONNECT_TIMEOUT, LONG_POLL_TIMEOUT),
+                )
+                if req.status_code != 200:
+                    raise AlarmTrackerError(req.status_code)
+
+                res_json = req.json()
+                if "next" not in res_json.keys():
+                    raise AlarmTrackerError(None, "Next not found in alarm updates")
+
+                updates = res_json.get("updates") or []
+                if len(updates) > 0:
+                    self.__apply(updates)
+                    self.__count("alarms.updates", len(updates))
+                    self.__changed()
+
+                next_url = res_json["next"]["href"]
+
+            except requests.exceptions.ReadTimeout:
+                # An idle poll outlived the read timeout, poll again from the same position
+                continue
+
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                # Updates may have been missed, start again from the full list
+                next_url = None
+                self.__count("alarms.errors")
+                failure_type = classify_failure(e)
+                delay = self._reconnect_policy.record_failure(failure_type)
+                if failure_type is FailureType.AUTH:
+                    self.log.error(
+                        "Command Centre rejected the API key for alarms, retrying in {:.0f} seconds".format(
+                            delay
+                        )
+                    )
+                else:
+                    self.log.warning(
+                        "Alarm feed {} failure ({}), retrying in {:.1f} seconds".format(
+                            failure_type.value, e, delay
+                        )
+                    )
+                    self.log.debug(traceback.format_exc())
+                self._stop_event.wait(delay)
+
+    def __load(self):
+        """Loads every active alarm, returns the updates href to follow from"""
+        alarms = []
+        updates_href = None
+        url = self._alarms_href
+        while url is not None:
+            req = self._session.get(
+                url,
+                verify=False,
+                headers={"Authorization": "GGL-API-KEY " + self._api_key},
+                timeout=(CONNECT_TIMEOUT, LONG_POLL_TIMEOUT),
+            )
+            if req.status_code != 200:
+                raise AlarmTrackerError(req.status_code)
+
+            res_json = req.json()
+            alarms += res_json.get("alarms") or []
+            if "updates" in res_json.keys():
+                updates_href = res_json["updates"]["href"]
+            url = res_json["next"]["href"] if "next" in res_json.keys() else None
+
+        if updates_href is None:
+            raise AlarmTrackerError(None, "Updates not found in alarms response")
+
+        with self._lock:
+            self._alarms = {}
+            self._by_priority = {}
+            self._by_source = {}
+            self._source_names = {}
+            for alarm in alarms:
+                self.__index(alarm)
+
+        self.log.info("Loaded {} active alarms".format(len(alarms)))
+        self.__count("alarms.full_loads")
+        self._loaded.set()
+        self.__changed()
+        return updates_href
+
+    def __apply(self, updates):
+        with self._lock:
+            for alarm in updates:
+                alarm_id = str(alarm.get("id"))
+                previous = self._alarms.get(alarm_id)
+                if previous is not None:
+                    self.__unindex(previous)
+
+                if alarm.get("state") in CLEARED_STATES:
+                    continue
+                if previous is not None:
+                    # Updates may only carry the changed fields
+                    alarm = dict(previous, **alarm)
+                self.__index(alarm)
+
+    def __index(self, alarm):
+        alarm_id = str(alarm.get("id"))
+        self._alarms[alarm_id] = alarm
+
+        priority = alarm.get("priority")
+        self._by_priority[priority] = self._by_priority.get(priority, 0) + 1
+
+        source = alarm.get("source") or {}
+        source_id = source.get("id")
+        self._by_source[source_id] = self._by_source.get(source_id, 0) + 1
+        if source.get("name") is not None:
+            self._source_names[source_id] = source["name"]
+
+    def __unindex(self, alarm):
+        self._alarms.pop(str(alarm.get("id")), None)
+
+        priority = alarm.get("priority")
+        self._by_priority[priority] -= 1
+        if self._by_priority[priority] == 0:
+            del self._by_priority[priority]
+
+        source_id = (alarm.get("source") or {}).get("id")
+        self._by_source[source_id] -= 1
+        if self._by_source[source_id] == 0:
+            del self._by_source[source_id]
+            self._source_names.pop(source_id, None)
+
+    def __changed(self):
+        if self._metrics is not None:
+            self._metrics.set_gauge("alarms.active", self.get_count())
+        if self._on_change is not None:
+            self._on_change()
+
+    def __count(self, name, amount=1):
+        if self._metrics is not None:
+            self._metrics.increment(name, amount)
+
+
+class AlarmTrackerError(Exception):
+    def __init__(self, status_code, message=None):
+        super().__init__(message or "Status code {}".format(status_code))
+        self.status_code = status_code
@@ -0,0 +1,282 @@
+import logging
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from urllib.parse import urlencode
+
+from .CustomFormatter import CustomFormatter
+from .GallagherSession import GallagherSession
+
+# Timeout for cardholder requests
+REQUEST_TIMEOUT = 10
+# Cardholder ids requested in one prefetch request
+PREFETCH_CHUNK = 100
+# Cardholder fields kept in the cache
+CARDHOLDER_FIELDS = ["id", "href", "firstName", "lastName", "shortName", "division"]
+
+
+class CardholderCache:
+    """Resolves cardholders by id, caching them with LRU and TTL eviction
+
+    At most one request is in flight per cardholder, concurrent lookups of a cardholder
+    being fetched wait for that request instead of making their own. prefetch() resolves
+    every uncached cardholder of an event batch with one search request per chunk."""
+
+    def __init__(
+        self,
+        cardholders_href,
+        api_key,
+        capacity=1000,
+        ttl=3600,
+        metrics=None,
+        failover=None,
+    ):
+        self.log = logging.getLogger("CardholderCache")
+        self.log.setLevel(logging.INFO)
+        if not self.log.handlers:
+            ch = logging.StreamHandler()
+            ch.setLevel(logging.INFO)
+            ch.setFormatter(CustomFormatter())
+            self.log.addHandler(ch)
+
+        self._cardholders_href = cardholders_href
+        self._api_key = api_key
+        self._capacity = max(1, int(capacity))
+        self._ttl = ttl
+        self._metrics = metrics
+
+        self._lock = Lock()
+        # cardholder id -> (expires, cardholder or None if not found), oldest use first
+        self._entries = OrderedDict()
+        # cardholder id -> Future of the request in flight
+        self._inflight = {}
+
+        self._session = GallagherSession(failover)
+
+    def stop(self):
+        self._session.cancel()
+        self._session.close()
+
+    def get_size(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.__publish_size()
+
+    def get_cached(self, cardholder_id):
+        """Returns a cached cardholder without requesting it, None if not cached"""
+        with self._lock:
+            return self.__lookup(str(cardholder_id))[1]
+
+    def get_cardholder(self, cardholder_id, href=None, timeout=REQUEST_TIMEOUT):
+        """Returns a cardholder, requesting it if it is not cached
+
+        Returns None if the cardholder could not be resolved"""
+        cardholder_id = str(cardholder_id)
+        with self._lock:
+            cached, cardholder = self.__lookup(cardholder_id)
+            if cached:
+                self.__count("cardholders.cache.hits")
+                return cardholder
+
+            self.__count("cardholders.cache.misses")
+            future = self._inflight.get(cardholder_id)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[cardholder_id] = future
+
+        if not owner:
+            self.__count("cardholders.cache.coalesced")
+            try:
+                return future.result(timeout)
+            except Exception:
+                return None
+
+        found = None
+        try:
+            url = href or "{}/{}".format(self._cardholders_href, cardholder_id)
+            found = self.__fetch(url + "?" + urlencode(_fields_query(), safe=","))
+        except Exception as e:
+            self.__count("cardholders.errors")
+            self.log.warning("Unable to resolve cardholder {} ({})".format(cardholder_id, e))
+            self.log.debug(traceback.format_exc())
+        self.__resolve(found, [cardholder_id])
+        return None if found is None else found.get(cardholder_id)
+
+    def prefetch(self, cardholder_ids):
+        """Resolves every uncached cardholder of a batch, returns the number requested"""
+        wanted = []
+        with self._lock:
+            for cardholder_id in dict.fromkeys(str(c) for c in cardholder_ids):
+                if self.__lookup(cardholder_id)[0]:
+                    self.__count("cardholders.cache.hits")
+                    continue
+                self.__count("cardholders.cache.misses")
+                if cardholder_id in self._inflight:
+                    continue
+                self._inflight[cardholder_id] = Future()
+                wanted.append(cardholder_id)
+
+        for start in range(0, len(wanted), PREFETCH_CHUNK):
+            chunk = wanted[start : start + PREFETCH_CHUNK]
+            found = None
+            try:
+                query = _fields_query()
+                query["id"] = ",".join(chunk)
+                query["top"] = len(chunk)
+                found = self.__search(
+                    self._cardholders_href + "?" + urlencode(query, safe=",")
+                )
+            except Exception as e:
+                self.__count("cardholders.errors")
+                self.log.warning(
+                    "Unable to prefetch {} cardholders ({})".format(len(chunk), e)
+                )
+                self.log.debug(traceback.format_exc())
+            self.__resolve(found, chunk)
+
+        return len(wanted)
+
+    def enrich_events(self, events):
+        """Adds the cached cardholder details to the cardholder of each event"""
+        cardholder_ids = [
+            event["cardholder"]["id"]
+            for event in events
+            if isinstance(event.get("cardholder"), dict)
+            and event["cardholder"].get("id") is not None
+        ]
+        if len(cardholder_ids) == 0:
+            return
+
+        self.prefetch(cardholder_ids)
+        with self._lock:
+            for event in events:
+                reference = event.get("cardholder")
+                if not isinstance(reference, dict) or reference.get("id") is None:
+                    continue
+                cardholder = self.__lookup(str(reference["id"]))[1]
+                if cardholder is None:
+                    continue
+                for key, value in cardholder.items():
+                    reference.setdefault(key, value)
+
+    def __fetch(self, url):
+        started = time.perf_counter()
+        req = self._session.get(
+            url,
+            verify=False,
+            headers={"Authorization": "GGL-API-KEY " + self._api_key},
+            timeout=REQUEST_TIMEOUT,
+        )
+        self.__timing(started)
+        if req.status_code == 404:
+            return {}
+        if req.status_code != 200:
+            raise CardholderCacheError(req.status_code)
+        cardholder = _compact(req.json())
+        return {cardholder.get("id"): cardholder}
+
+    def __search(self, url):
+        started = time.perf_counter()
+        req = self._session.get(
+            url,
+            verify=False,
+            headers={"Authorization": "GGL-API-KEY " + self._api_key},
+            timeout=REQUEST_TIMEOUT,
+        )
+        self.__timing(started)
+        if req.status_code != 200:
+            raise CardholderCacheError(req.status_code)
+
+        found = {}
+        for result in req.json().get("results") or []:
+            cardholder = _compact(result)
+            if cardholder.get("id") is not None:
+                found[str(cardholder["id"])] = cardholder
+        return found
+
+    def __resolve(self, found, cardholder_ids):
+        """Caches the fetched cardholders and completes the waiting lookups
+
+        found is None if the request failed, then nothing is cached and the cardholders
+        are requested again next time. Cardholders missing from a successful response
+        are cached as not found, so unknown ids do not cost a request per event"""
+        expires = time.monotonic() + self._ttl
+        with self._lock:
+            for cardholder_id in cardholder_ids:
+                cardholder = None if found is None else found.get(cardholder_id)
+                if found is not None:
+                    self._entries[cardholder_id] = (expires, cardholder)
+                    self._entries.move_to_end(cardholder_id)
+                future = self._inflight.pop(cardholder_id, None)
+                if future is not None:
+                    future.set_result(cardholder)
+
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+                self.__count("cardholders.cache.evictions")
+        self.__publish_size()
+
+    def __lookup(self, cardholder_id):
+        """Returns (cached, cardholder), marking the entry as recently used
+
+        Call with the lock held"""
+        entry = self._entries.get(cardholder_id)
+        if entry is None:
+            return False, None
+        expires, cardholder = entry
+        if expires < time.monotonic():
+            del self._entries[cardholder_id]
+            self.__count("cardholders.cache.expired")
+            return False, None
+        self._entries.move_to_end(cardholder_id)
+        return True, cardholder
+
+    def __publish_size(self):
+        if self._metrics is not None:
+            self._metrics.set_gauge("cardholders.cached", self.get_size())
+
+    def __timing(self, started):
+        if self._metrics is not None:
+            self._metrics.increment("cardholders.requests")
+            self._metrics.record_timing(
+                "cardholders.request", time.perf_counter() - started
+            )
+
+    def __count(self, name, amount=1):
+        if self._metrics is not None:
+            self._metrics.increment(name, amount)
+
+
+def _fields_query():
+    return {"fields": ",".join(CARDHOLDER_FIELDS)}
+
+
+def _compact(cardholder):
+    """Keeps the cardholder fields events are enriched with"""
+    compact = {key: cardholder[key] for key in CARDHOLDER_FIELDS if key in cardholder}
+    if "id" in compact:
+        compact["id"] = str(compact["id"])
+    if isinstance(compact.get("division"), dict):
+        compact["division"] = {
+            key: value
+            for key, value in compact["division"].items()
+            if key in ("id", "href", "name")
+        }
+    names = [cardholder.get("firstName"), cardholder.get("lastName")]
+    name = " ".join(n for n in names if n)
+    if name:
+        compact["name"] = name
+    return compact
+
+
+class CardholderCacheError(Exception):
+    def __init__(self, status_code, message=None):
+        super().__init__(message or "Status code {}".format(status_code))
+        self.status_code = status_code
@@ -0,0 +1,245 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from threading import Lock
+
+import requests
+
+from .CustomFormatter import CustomFormatter
+
+# Connect timeout for command requests, the read timeout is whatever remains of the deadline
+CONNECT_TIMEOUT = 5
+
+
+class CommandDispatcher:
+    """Sends item commands with bounded concurrency, deadlines and per item coalescing
+
+    Commands for the same item run one at a time, in order. A command submitted while an
+    older one for the same item is still queued replaces it, the replaced command resolves
+    as SUPERSEDED. Every submitted command returns a Future resolving to a CommandOutcome."""
+
+    def __init__(
+        self, session, api_key, metrics=None, max_concurrency=4, default_timeout=10
+    ):
+        self.log = logging.getLogger("CommandDispatcher")
+        self.log.setLevel(logging.INFO)
+        if not self.log.handlers:
+            ch = logging.StreamHandler()
+            ch.setLevel(logging.INFO)
+            ch.setFormatter(CustomFormatter())
+            self.log.addHandler(ch)
+
+        self._session = session
+        self._api_key = api_key
+        self._metrics = metrics
+        self._default_timeout = default_timeout
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="GallagherCommand"
+        )
+        self._lock = Lock()
+        # item key -> the newest command waiting to be sent
+        self._queued = {}
+        # item key -> the command currently being sent
+        self._active = {}
+        self._shutdown = False
+
+    def submit(self, key, item_type, command, href, body=None, timeout=None):
+        """Queues a command, returns a Future resolving to a CommandOutcome
+
+        timeout is the deadline in seconds from now, including time spent queued"""
+        if timeout is None:
+            timeout = self._default_timeout
+
+        queued = _QueuedCommand(key, item_type, command, href, body, timeout)
+
+        # Checked and scheduled under the lock shutdown() takes, the executor is never
+        # given work once it has been shut down
+        with self._lock:
+            if self._shutdown:
+                self.log.warning(
+                    "Dispatcher shut down, not sending `{}` for {}".format(command, key)
+                )
+                self.__count(CommandOutcome.FAILED)
+                return completed_command(CommandOutcome.FAILED)
+            previous = self._queued.get(key)
+            self._queued[key] = queued
+            if previous is None and key not in self._active:
+                self._executor.submit(self.__process, key)
+
+        if previous is not None:
+            self.log.debug(
+                "`{}` for {} superseded by `{}`".format(previous.command, key, command)
+            )
+            self.__finish(previous, CommandOutcome.SUPERSEDED)
+
+        return queued.future
+
+    def get_pending(self, key):
+        """Returns the (command, body) most recently submitted and not yet completed for an item"""
+        with self._lock:
+            queued = self._queued.get(key) or self._active.get(key)
+            if queued is None:
+                return None
+            return queued.command, queued.body
+
+    def suppress(self, key, command):
+        """Resolves a command that is not sent because the item is already in that state"""
+        self.log.debug("`{}` for {} already satisfied, not sent".format(command, key))
+        self.__count(CommandOutcome.SUPPRESSED)
+        return completed_command(CommandOutcome.SUPPRESSED)
+
+    def cancel(self, key):
+        """Cancels the queued command for an item, returns True if one was cancelled"""
+        with self._lock:
+            queued = self._queued.pop(key, None)
+        if queued is None:
+            return False
+        self.__finish(queued, CommandOutcome.CANCELLED)
+        return True
+
+    def shutdown(self):
+        """Cancels every queued command, in-flight commands are aborted with the session"""
+        with self._lock:
+            self._shutdown = True
+            queued = list(self._queued.values())
+            self._queued.clear()
+
+        for command in queued:
+            self.__finish(command, CommandOutcome.CANCELLED)
+
+        self._executor.shutdown(wait=False)
+        return len(queued)
+
+    def __process(self, key):
+        with self._lock:
+            queued = self._queued.pop(key, None)
+            if queued is None:
+                return
+            self._active[key] = queued
+
+        try:
+            outcome = self.__execute(queued)
+            if outcome is not None:
+                self.__finish(queued, outcome)
+        finally:
+            with self._lock:
+                self._active.pop(key, None)
+                if key in self._queued and not self._shutdown:
+                    self._executor.submit(self.__process, key)
+
+    def __execute(self, queued):
+        if not queued.future.set_running_or_notify_cancel():
+            # Cancelled by the caller while queued
+            self.__count(CommandOutcome.CANCELLED)
+            return None
+
+        remaining = queued.deadline - time.monotonic()
+        if remaining <= 0:
+            self.log.warning(
+                "`{}` for {} expired before it was sent".format(queued.command, queued.key)
+            )
+            return CommandOutcome.TIMEOUT
+
+        try:
+            req = self._session.post(
+                queued.href,
+                verify=False,
+                headers={"Authorization": self._api_key},
+                json=queued.body,
+                timeout=(min(CONNECT_TIMEOUT, remaining), remaining),
+            )
+        except requests.exceptions.Timeout:
+            self.log.error(
+                "`{}` for {} timed out after {} seconds".format(
+                    queued.command, queued.key, queued.timeout
+                )
+            )
+            return CommandOutcome.TIMEOUT
+        except Exception as e:
+            if self._shutdown:
+                # Aborted by the session being cancelled on shutdown
+                return CommandOutcome.CANCELLED
+            self.log.error(
+                "Error during command `{}` for {} - {}".format(queued.command, queued.key, e)
+            )
+            return CommandOutcome.FAILED
+
+        if req.status_code not in (200, 204):
+            self.log.error(
+                "Received status code {} for command {} - Command was not successful".format(
+                    req.status_code, queued.command
+                )
+            )
+            return CommandOutcome.FAILED
+
+        return CommandOutcome.SUCCESS
+
+    def __finish(self, queued, outcome):
+        if queued.future.done():
+            return
+        if queued.future.running():
+            queued.future.set_result(outcome)
+        elif not queued.resolve(outcome):
+            return
+
+        self.__count(outcome)
+        if self._metrics is not None and outcome is CommandOutcome.SUCCESS:
+            latency = time.monotonic() - queued.submitted
+            self._metrics.record_timing("commands.latency", latency)
+            self._metrics.record_timing(
+                "commands.latency.{}".format(queued.item_type), latency
+            )
+
+    def __count(self, outcome):
+        if self._metrics is not None:
+            self._metrics.increment("commands.{}".format(outcome.value))
+
+
+class _QueuedCommand:
+    def __init__(self, key, item_type, command, href, body, timeout):
+        self.key = key
+        self.item_type = item_type
+        self.command = command
+        self.href = href
+        self.body = body
+        self.timeout = timeout
+        self.submitted = time.monotonic()
+        self.deadline = self.submitted + timeout
+        self.future = Future()
+
+    def resolve(self, outcome):
+        """Resolves a command that has not started, returns False if the caller cancelled it"""
+        if not self.future.set_running_or_notify_cancel():
+            return False
+        self.future.set_result(outcome)
+        return True
+
+
+class CommandOutcome(Enum):
+    SUCCESS = "success"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    CANCELLED = "cancelled"
+    SUPERSEDED = "superseded"
+    SUPPRESSED = "suppressed"
+
+
+def override_body(duration=None):
+    """Returns the body for an override lasting duration seconds, None if indefinite
+
+    Command Centre ends the override itself at endTime, the end time is taken from the
+    local clock so it is only as accurate as the clocks of both hosts"""
+    if duration is None:
+        return None
+    end_time = datetime.now(timezone.utc) + timedelta(seconds=duration)
+    return {"endTime": end_time.isoformat(timespec="seconds").replace("+00:00", "Z")}
+
+
+def completed_command(outcome):
+    """Returns an already resolved command Future, for commands that are never sent"""
+    future = Future()
+    future.set_result(outcome)
+    return future
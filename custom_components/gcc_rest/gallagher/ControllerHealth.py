@@ -0,0 +1,140 @@
+import time
+from threading import Lock
+
+# Status flag Command Centre sets on every item of a controller it cannot reach
+CONTROLLER_OFFLINE = "controllerOffline"
+
+
+class ControllerHealth:
+    """Online state of the controllers items are connected to
+
+    Items are indexed by the controller captured when they loaded. When a controller
+    goes offline Command Centre sends an update flagged controllerOffline for every
+    item on it, filter_updates() turns the first into one controller transition and
+    drops the rest before they are decoded. The controller's entities are told once,
+    see set_listener(), and show as unavailable until an item on it reports again."""
+
+    def __init__(self, metrics=None, on_change=None):
+        self._lock = Lock()
+        self._metrics = metrics
+        self._on_change = on_change
+
+        # item id -> controller id
+        self._item_controllers = {}
+        # controller id -> item ids
+        self._controller_items = {}
+        self._names = {}
+        # controller id -> True while online, missing until an item on it reports
+        self._online = {}
+        # controller id -> time of its last transition
+        self._changed_at = {}
+
+    def rebuild(self, items):
+        """Indexes the loaded items, an iterable of (item id, controller id)"""
+        item_controllers = {}
+        controller_items = {}
+        for item_id, controller_id in items:
+            if controller_id is None:
+                continue
+            controller_id = str(controller_id)
+            item_controllers[str(item_id)] = controller_id
+            controller_items.setdefault(controller_id, []).append(str(item_id))
+
+        with self._lock:
+            self._item_controllers = item_controllers
+            self._controller_items = controller_items
+        self.__publish()
+
+    def set_name(self, controller_id, name):
+        if controller_id is not None and name:
+            self._names[str(controller_id)] = name
+
+    def set_listener(self, on_change):
+        """Sets the callable given the ids of controllers that went offline or online
+
+        Called from the subscription thread"""
+        self._on_change = on_change
+
+    def get_controllers(self):
+        with self._lock:
+            return list(self._controller_items.keys())
+
+    def get_controller(self, item_id):
+        return self._item_controllers.get(str(item_id))
+
+    def get_name(self, controller_id):
+        return self._names.get(str(controller_id))
+
+    def get_items(self, controller_id):
+        with self._lock:
+            return list(self._controller_items.get(str(controller_id), []))
+
+    def is_online(self, controller_id):
+        """True or False, None until an item on the controller has reported"""
+        return self._online.get(str(controller_id))
+
+    def get_status(self):
+        """Returns controller id -> {name, online, items, since}"""
+        with self._lock:
+            return {
+                controller_id: {
+                    "name": self._names.get(controller_id),
+                    "online": self._online.get(controller_id),
+                    "items": len(item_ids),
+                    "since": self._changed_at.get(controller_id),
+                }
+                for controller_id, item_ids in self._controller_items.items()
+            }
+
+    def filter_updates(self, updates):
+        """Returns the updates to decode, recording controller transitions
+
+        Updates of items on a controller that is offline are dropped, the item keeps its
+        last reported state. Updates without status flags are always kept"""
+        kept = []
+        changed = []
+        transitions = 0
+        dropped = 0
+
+        with self._lock:
+            for update in updates:
+                controller_id = self._item_controllers.get(str(update.get("id")))
+                if controller_id is None or "statusFlags" not in update:
+                    kept.append(update)
+                    continue
+
+                online = CONTROLLER_OFFLINE not in update["statusFlags"]
+                if self._online.get(controller_id) is not online:
+                    # The first report of a controller is not a transition
+                    if controller_id in self._online:
+                        transitions += 1
+                    self._online[controller_id] = online
+                    self._changed_at[controller_id] = time.time()
+                    changed.append(controller_id)
+
+                if online:
+                    kept.append(update)
+                else:
+                    dropped += 1
+
+        if self._metrics is not None:
+            if dropped > 0:
+                self._metrics.increment("controllers.dropped_updates", dropped)
+            if transitions > 0:
+                self._metrics.increment("controllers.transitions", transitions)
+        if len(changed) > 0:
+            self.__publish()
+            if self._on_change is not None:
+                self._on_change(changed)
+        return kept
+
+    def __publish(self):
+        if self._metrics is None:
+            return
+        with self._lock:
+            offline = sum(
+                1
+                for controller_id in self._controller_items
+                if self._online.get(controller_id) is False
+            )
+        self._metrics.set_gauge("controllers.offline", offline)
@@ -0,0 +1,183 @@
+import time
+from collections import deque
+from datetime import datetime
+from threading import Lock
+
+# Event fields that reference the items involved in an event
+ITEM_FIELDS = ["source", "door", "entryAccessZone", "exitAccessZone"]
+
+
+class EventBuffer:
+    """Bounded buffer of recent Command Centre events, indexed by item, cardholder and type
+
+    Events are kept as compact records in arrival order. Each index holds its own deque of
+    records in the same order, so when the buffer is full the oldest record is evicted from
+    the buffer and from the front of each of its index deques in constant time. A query
+    walks the smallest matching index from newest to oldest and stops at the limit."""
+
+    def __init__(self, capacity=5000, metrics=None):
+        self._lock = Lock()
+        self._capacity = max(1, int(capacity))
+        self._metrics = metrics
+
+        self._records = deque()
+        self._by_item = {}
+        self._by_cardholder = {}
+        self._by_type = {}
+
+    def get_capacity(self):
+        return self._capacity
+
+    def get_size(self):
+        with self._lock:
+            return len(self._records)
+
+    def add_events(self, events):
+        """Adds a batch of Command Centre events, evicting the oldest once full"""
+        with self._lock:
+            for event in events:
+                record = _EventRecord(event)
+                if len(self._records) >= self._capacity:
+                    self.__evict()
+
+                self._records.append(record)
+                for item_id in record.item_ids:
+                    self.__index(self._by_item, item_id, record)
+                if record.cardholder_id is not None:
+                    self.__index(self._by_cardholder, record.cardholder_id, record)
+                if record.type_id is not None:
+                    self.__index(self._by_type, record.type_id, record)
+            size = len(self._records)
+
+        if self._metrics is not None:
+            self._metrics.set_gauge("events.buffered", size)
+
+    def query(self, item_id=None, cardholder_id=None, type_id=None, since=None, limit=50):
+        """Returns the newest matching events first, as dicts
+
+        since is a unix timestamp, events that occurred before it are not returned"""
+        started = time.perf_counter()
+        filters = []
+        if item_id is not None:
+            filters.append((self._by_item, str(item_id)))
+        if cardholder_id is not None:
+            filters.append((self._by_cardholder, str(cardholder_id)))
+        if type_id is not None:
+            filters.append((self._by_type, str(type_id)))
+
+        results = []
+        with self._lock:
+            if len(filters) == 0:
+                candidates = self._records
+            else:
+                candidates = min(
+                    (index.get(key, ()) for index, key in filters), key=len
+                )
+
+            for record in reversed(candidates):
+                if since is not None and record.timestamp is not None:
+                    if record.timestamp < since:
+                        # Records are in arrival order, everything further back is older
+                        break
+                if item_id is not None and str(item_id) not in record.item_ids:
+                    continue
+                if cardholder_id is not None and record.cardholder_id != str(
+                    cardholder_id
+                ):
+                    continue
+                if type_id is not None and record.type_id != str(type_id):
+                    continue
+
+                results.append(record.as_dict())
+                if len(results) >= limit:
+                    break
+
+        if self._metrics is not None:
+            self._metrics.record_timing("events.query", time.perf_counter() - started)
+        return results
+
+    def __index(self, index, key, record):
+        if key not in index:
+            index[key] = deque()
+        index[key].append(record)
+
+    def __evict(self):
+        record = self._records.popleft()
+        for item_id in record.item_ids:
+            self.__unindex(self._by_item, item_id)
+        if record.cardholder_id is not None:
+            self.__unindex(self._by_cardholder, record.cardholder_id)
+        if record.type_id is not None:
+            self.__unindex(self._by_type, record.type_id)
+
+    def __unindex(self, index, key):
+        # The evicted record is the oldest, so it is at the front of each of its indexes
+        records = index[key]
+        records.popleft()
+        if len(records) == 0:
+            del index[key]
+
+
+class _EventRecord:
+    __slots__ = (
+        "id",
+        "time",
+        "timestamp",
+        "message",
+        "type_id",
+        "type_name",
+        "cardholder_id",
+        "cardholder_name",
+        "item_ids",
+        "item_names",
+    )
+
+    def __init__(self, event):
+        self.id = event.get("id")
+        self.time = event.get("time")
+        self.timestamp = _parse_time(self.time)
+        self.message = event.get("message")
+        self.type_id, self.type_name = _ref(event, "type")
+        self.cardholder_id, self.cardholder_name = _ref(event, "cardholder")
+
+        item_ids = []
+        item_names = {}
+        for field in ITEM_FIELDS:
+            item_id, name = _ref(event, field)
+            if item_id is None:
+                continue
+            # A door is usually also the source, it is indexed once but named in both
+            item_names[field] = {"id": item_id, "name": name}
+            if item_id not in item_ids:
+                item_ids.append(item_id)
+        self.item_ids = tuple(item_ids)
+        self.item_names = item_names
+
+    def as_dict(self):
+        record = {
+            "id": self.id,
+            "time": self.time,
+            "message": self.message,
+            "type_id": self.type_id,
+            "type": self.type_name,
+            "cardholder_id": self.cardholder_id,
+            "cardholder": self.cardholder_name,
+        }
+        record.update(self.item_names)
+        return record
+
+
+def _ref(event, key):
+    value = event.get(key)
+    if isinstance(value, dict) and value.get("id") is not None:
+        return str(value["id"]), value.get("name")
+    return None, None
+
+
+def _parse_time(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
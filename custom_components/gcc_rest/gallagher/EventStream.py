@@ -0,0 +1,172 @@
+import logging
+import traceback
+from threading import Event, Thread
+from urllib.parse import urlencode
+
+import requests
+
+from .CustomFormatter import CustomFormatter
+from .GallagherSession import GallagherSession
+from .ReconnectPolicy import ReconnectPolicy, FailureType, classify_failure
+
+# Connect timeout for the events long-poll
+CONNECT_TIMEOUT = 10
+# Read timeout for the events long-poll, Command Centre holds an idle poll for about a minute
+LONG_POLL_TIMEOUT = 90
+
+
+class EventStream:
+    """Follows the Command Centre events long-poll from a cursor
+
+    The cursor is the `next` href of the last delivered batch. Starting from a saved cursor
+    resumes where the previous run stopped, without a cursor only new events are received.
+    Every non-empty batch is passed to on_events(events, cursor) in one call, after which
+    the cursor is considered delivered. Group and type filters are applied server side."""
+
+    def __init__(
+        self,
+        updates_href,
+        api_key,
+        on_events,
+        cursor=None,
+        groups=None,
+        types=None,
+        metrics=None,
+        failover=None,
+    ):
+        self.log = logging.getLogger("EventStream")
+        self.log.setLevel(logging.INFO)
+        if not self.log.handlers:
+            ch = logging.StreamHandler()
+            ch.setLevel(logging.INFO)
+            ch.setFormatter(CustomFormatter())
+            self.log.addHandler(ch)
+
+        self._api_key = api_key
+        self._on_events = on_events
+        self._metrics = metrics
+        self._filter = get_filter_signature(groups, types)
+
+        query = {}
+        if groups:
+            query["group"] = ",".join(str(group) for group in groups)
+        if types:
+            query["type"] = ",".join(str(event_type) for event_type in types)
+        self._updates_href = updates_href
+        if len(query) > 0:
+            self._updates_href += "?" + urlencode(query, safe=",")
+
+        self._cursor = cursor
+        self._session = GallagherSession(failover)
+        self._reconnect_policy = ReconnectPolicy()
+        self._stop_event = Event()
+        self._thread = None
+
+    def get_cursor(self):
+        return self._cursor
+
+    def get_filter(self):
+        """Returns the filter signature the cursor belongs to"""
+        return self._filter
+
+    def start(self):
+        self._stop_event.clear()
+        self._session.reset()
+        self._thread = Thread(target=self.__run, name="GallagherEvents", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stops the stream, aborting the in-flight long-poll"""
+        self._stop_event.set()
+        self._session.cancel()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._session.close()
+
+    def __run(self):
+        if self._cursor is None:
+            self.log.info("No saved event cursor, receiving new events only")
+        else:
+            self.log.info("Resuming events from the saved cursor")
+
+        while not self._stop_event.is_set():
+            url = self._cursor if self._cursor is not None else self._updates_href
+            try:
+                req = self._session.get(
+                    url,
+                    verify=False,
+                    headers={"Authorization": "GGL-API-KEY " + self._api_key},
+                    timeout=(CONNECT_TIMEOUT, LONG_POLL_TIMEOUT),
+                )
+
+                if req.status_code in (400, 404) and self._cursor is not None:
+                    # The server no longer knows the saved position, start again from now
+                    self.log.warning(
+                        "Saved event cursor rejected ({}), receiving new events only".format(
+                            req.status_code
+                        )
+                    )
+                    self._cursor = None
+                    self.__count("events.cursor_resets")
+                    continue
+
+                if req.status_code != 200:
+                    raise EventStreamError(req.status_code)
+
+                res_json = req.json()
+                if "next" not in res_json.keys():
+                    raise EventStreamError(None, "Next not found in events response")
+
+                events = res_json.get("events") or []
+                cursor = res_json["next"]["href"]
+
+                if len(events) > 0:
+                    self._on_events(events, cursor)
+                    self.__count("events.received", len(events))
+                    self.__count("events.batches")
+
+                self._cursor = cursor
+                self._reconnect_policy.record_success()
+
+            except requests.exceptions.ReadTimeout:
+                # An idle poll outlived the read timeout, poll again from the same cursor
+                continue
+
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                self.__count("events.errors")
+                failure_type = classify_failure(e)
+                delay = self._reconnect_policy.record_failure(failure_type)
+                if failure_type is FailureType.AUTH:
+                    self.log.error(
+                        "Command Centre rejected the API key for events, retrying in {:.0f} seconds".format(
+                            delay
+                        )
+                    )
+                else:
+                    self.log.warning(
+                        "Event stream {} failure ({}), retrying in {:.1f} seconds".format(
+                            failure_type.value, e, delay
+                        )
+                    )
+                    self.log.debug(traceback.format_exc())
+                self._stop_event.wait(delay)
+
+    def __count(self, name, amount=1):
+        if self._metrics is not None:
+            self._metrics.increment(name, amount)
+
+
+def get_filter_signature(groups=None, types=None):
+    """Returns a string identifying a group/type filter, saved alongside the cursor"""
+    return "group={};type={}".format(
+        ",".join(sorted(str(group) for group in groups or [])),
+        ",".join(sorted(str(event_type) for event_type in types or [])),
+    )
+
+
+class EventStreamError(Exception):
+    def __init__(self, status_code, message=None):
+        super().__init__(message or "Status code {}".format(status_code))
+        self.status_code = status_code
@@ -2,7 +2,10 @@ import requests
 import traceback
 import logging
 
-from threading import Thread
+from threading import Thread, Event, Lock
+from collections import deque
+from contextlib import ExitStack
+from urllib.parse import urlencode
 
 import time
 
@@ -16,7 +19,21 @@ from .ItemAccessZone import (
     AccessZoneSecureType,
 )
 from .ItemFenceZone import ItemFenceZone, FenceZoneCommands
+from .ItemMacro import ItemMacro
 from .CustomFormatter import CustomFormatter
+from .StartupTracer import StartupTracer
+from .GallagherSession import GallagherSession
+from .Metrics import Metrics
+from .CommandDispatcher import CommandDispatcher, CommandOutcome, completed_command
+from .ReconnectPolicy import ReconnectPolicy, FailureType, classify_failure
+from .EventStream import EventStream
+from .AlarmTracker import AlarmTracker
+from .OccupancyEngine import OccupancyEngine
+from .EventBuffer import EventBuffer
+from .CardholderCache import CardholderCache
+from .ItemFilter import ItemFilter
+from .HostFailover import HostFailover, parse_host_list
+from .ControllerHealth import ControllerHealth
 
 
 from http.client import RemoteDisconnected
@@ -25,21 +42,126 @@ import urllib3
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Long-poll read timeout bounds, the timeout adapts to the servers observed idle hold time
+LONG_POLL_TIMEOUT_DEFAULT = 65
+LONG_POLL_TIMEOUT_MIN = 10
+LONG_POLL_TIMEOUT_MAX = 300
+# Connect timeout used for the subscription requests
+CONNECT_TIMEOUT = 10
+# Seconds without a successful poll before the watchdog forces a reconnect
+STALL_THRESHOLD_DEFAULT = 120
+# Seconds between checks for a preferred host coming back while on a standby
+FAILBACK_INTERVAL = 300
+# Back off bounds for retrying an item type that failed to load
+FEATURE_RETRY_BASE_DELAY = 5
+FEATURE_RETRY_MAX_DELAY = 300
+
+# Load state of an item type, see get_feature_status()
+FEATURE_LOADED = "loaded"
+FEATURE_FAILED = "failed"
+FEATURE_UNAVAILABLE = "unavailable"
+FEATURE_NOT_SELECTED = "not_selected"
+
+# Loaded items of each feature, by attribute name
+ITEM_ATTRIBUTES = {
+    "inputs": "_ccd_inputs",
+    "outputs": "_ccd_outputs",
+    "alarmZones": "_ccd_alarm_zones",
+    "doors": "_ccd_doors",
+    "accessZones": "_ccd_access_zones",
+    "fenceZones": "_ccd_fence_zones",
+    "macros": "_ccd_macros",
+}
+# Features whose items have no status to subscribe to
+UNSUBSCRIBED_ITEMS = ["macros"]
+# Metrics kept by the shared engine for every engine attached to it
+SHARED_METRICS = ("subscription.", "failover.")
+
 
 class GallagherRest:
-    def __init__(self, command_centre_host, api_key, ignore_insecure_warning=False):
+    def __init__(
+        self,
+        command_centre_host,
+        api_key,
+        ignore_insecure_warning=False,
+        tracer=None,
+        command_concurrency=4,
+        command_timeout=10,
+        hub=None,
+        standby_hosts=None,
+        failover=None,
+        pool=None,
+    ):
         # Logging Setup
         self.log = logging.getLogger("GallagherRest")
         self.log.setLevel(logging.DEBUG)
         self.log.debug("Loading...")
-        # create console handler with a higher log level
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.DEBUG)
-        ch.setFormatter(CustomFormatter())
-        self.log.addHandler(ch)
+        # create console handler with a higher log level, once for every engine
+        if not self.log.handlers:
+            ch = logging.StreamHandler()
+            ch.setLevel(logging.DEBUG)
+            ch.setFormatter(CustomFormatter())
+            self.log.addHandler(ch)
 
         self._run_thread = None
 
+        # Startup tracing, every HTTP exchange on the session is counted against it
+        self._tracer = tracer if tracer is not None else StartupTracer()
+        self._metrics = Metrics()
+
+        # Ordered Command Centre hosts, every request goes to the active one
+        if hub is not None:
+            self._failover = hub._failover
+        elif failover is not None:
+            # Shared with the engines of other API keys on this host
+            self._failover = failover
+            failover.add_metrics(self._metrics)
+        else:
+            self._failover = HostFailover(
+                [command_centre_host] + parse_host_list(standby_hosts),
+                metrics=self._metrics,
+            )
+        self._failover_started = None
+        self._outage_started = None
+        self._last_failback_check = time.monotonic()
+
+        self._session = GallagherSession(self._failover)
+        self._session.hooks["response"].append(self._tracer.record_response)
+        # The long-poll has its own session, so the watchdog can abort it without touching commands
+        self._poll_session = GallagherSession(self._failover)
+        self._poll_session.hooks["response"].append(self.__record_poll_response)
+
+        # Engine whose subscription this one shares, see attach()
+        self._hub = hub
+        if hub is not None:
+            # Commands and discovery go through the connection pool of the shared engine,
+            # the session keeps its own hooks so this engine's trace counts its requests
+            self._session.share_pool(hub._session)
+            # The shared engine polls the subscription
+            self._poll_session.close()
+        elif pool is not None:
+            # Commands and discovery share the connection pool of the host, the
+            # subscription is this engine's own
+            self._session.share_pool(pool)
+        # Session whose connection pool this engine uses, None if its own
+        self._pool = pool
+        # Engines sharing this engine's subscription
+        self._attached = []
+        self._attach_lock = Lock()
+
+        self._reconnect_policy = ReconnectPolicy(metrics=self._metrics)
+
+        # Subscription watchdog
+        self._watchdog_thread = None
+        self._stall_threshold = STALL_THRESHOLD_DEFAULT
+        self._last_poll_success = None
+        self._reconnect_requested = False
+        # Set when the subscribed items change, the subscription is posted again
+        self._resubscribe_requested = False
+        self._membership_changed = Event()
+        self._long_poll_timeout = LONG_POLL_TIMEOUT_DEFAULT
+        self._idle_poll_durations = deque(maxlen=10)
+
         if ignore_insecure_warning:
             from urllib3.exceptions import InsecureRequestWarning
 
@@ -64,10 +186,53 @@ class GallagherRest:
         self._si_fence_zones = []
         self._si_macros = []
 
+        # Division and controller ids to load items from, None loads every item
+        self._selected_divisions = None
+        self._selected_controllers = None
+        # Include and exclude rules matched against item names
+        self._item_filter = ItemFilter()
+
+        # Ids of the loaded items that have a status to subscribe to
+        self._subscribable_ids = []
+        # Item ids left out of the subscription, such as items with only disabled entities
+        self._unsubscribed_ids = set()
+        self._rescan_lock = Lock()
+
+        # Item type -> load state, error and retry schedule, see get_feature_status()
+        self._feature_status = {}
+        self._feature_retry_thread = None
+        # Called with the item type and item ids once a failed type loads
+        self._on_feature_loaded = None
+
+        # Controller of every loaded item and whether it is online
+        self._controller_health = ControllerHealth(self._metrics)
+
         self._ccd_available_features = {}
 
         self._run = False
 
+        # Set once the first subscription snapshot has been applied to the items
+        self._ready = Event()
+        # Set by stop(), wakes the poller out of any back off wait
+        self._stop_event = Event()
+
+        # Item commands, created by start() and shut down by stop()
+        self._dispatcher = None
+        self._command_concurrency = command_concurrency
+        self._command_timeout = command_timeout
+
+        # Events long-poll, created by start_event_stream()
+        self._event_stream = None
+        # Live alarm list, created by start_alarm_tracker()
+        self._alarm_tracker = None
+        # Access zone occupancy from the event stream, created by enable_occupancy()
+        self._occupancy = None
+        # Recent events from the event stream, created by enable_event_buffer()
+        self._event_buffer = None
+
+        # Cardholder lookups, enabled with enable_cardholder_cache()
+        self._cardholder_cache = None
+
         self.api_key = api_key
         host_addr = command_centre_host
         if not host_addr.endswith("/"):
@@ -75,12 +240,33 @@ class GallagherRest:
 
         self._command_centre_host = host_addr
 
-        if self.check_connection(self._command_centre_host, api_key) == False:
+        if hub is not None:
+            # The shared engine already read the API root
+            self._ccd_available_features = hub._ccd_available_features
+        elif self.__connect() == False:
             self.log.error("Unable to connect to Command Centre")
             # return False
 
         # return True
 
+    def __connect(self):
+        """Connects to the first host of the failover that answers, in order"""
+        hosts = self._failover.get_hosts()
+        for host in hosts:
+            self._failover.activate(host)
+            if self.check_connection(host, self.api_key) is not False:
+                return True
+            if len(hosts) > 1:
+                self.log.warning("Command Centre {} is unavailable".format(host))
+        self._failover.activate(hosts[0])
+        return False
+
+    def get_failover(self):
+        return self._failover
+
+    def get_active_host(self):
+        return self._failover.get_active_host()
+
     def check_connection(self, command_centre_host, api_key):
         self.log.info(
             "Testing communications to Command Centre API - Host: {}".format(
@@ -92,7 +278,7 @@ class GallagherRest:
         command_centre_host += "api"
         try:
             # try connecting
-            test_req = requests.get(
+            test_req = self._session.get(
                 command_centre_host,
                 verify=False,
                 headers={"Authorization": "GGL-API-KEY " + api_key},
@@ -148,7 +334,7 @@ class GallagherRest:
 
     def check_api_version_and_features(self, command_centre_host, api_key):
         self.log.info("Checking API compatibility")
-        test_req = requests.get(
+        test_req = self._session.get(
             command_centre_host,
             verify=False,
             headers={"Authorization": "GGL-API-KEY " + api_key},
@@ -165,7 +351,7 @@ class GallagherRest:
             "accessZones",
             "alarms",
             "alarmZones",
-            # "cardholders",
+            "cardholders",
             # "cardTypes",
             # "competencies",
             "doors",
@@ -244,6 +430,109 @@ class GallagherRest:
 
         return True
 
+    def set_divisions(self, division_ids):
+        """Only loads items in these divisions, filtered by Command Centre
+
+        Like the controller selection, only applies to item types that load every item"""
+        if division_ids is None or isinstance(division_ids, list):
+            self._selected_divisions = None if not division_ids else division_ids
+            return True
+        return False
+
+    def set_controllers(self, controller_ids):
+        """Only loads items connected to these controllers
+
+        Items that are not connected to a controller are not filtered"""
+        if controller_ids is None or isinstance(controller_ids, list):
+            self._selected_controllers = None if not controller_ids else controller_ids
+            return True
+        return False
+
+    def set_item_filter(self, item_filter):
+        """Only loads items whose names pass the ItemFilter, applied before any item fetch"""
+        self._item_filter = item_filter if item_filter is not None else ItemFilter()
+
+    def set_unsubscribed_items(self, item_ids):
+        """Leaves these items out of the subscription, replacing the previous set"""
+        unsubscribed = set(str(item_id) for item_id in item_ids or [])
+        changed = unsubscribed != self._unsubscribed_ids
+        self._unsubscribed_ids = unsubscribed
+        if changed:
+            self.__request_resubscribe()
+        return changed
+
+    def set_item_subscribed(self, item_id, subscribed=True):
+        """Adds an item to or drops it from the live subscription
+
+        The other items keep their state, returns True if the membership changed"""
+        item_id = str(item_id)
+        if subscribed == (item_id not in self._unsubscribed_ids):
+            return False
+
+        unsubscribed = set(self._unsubscribed_ids)
+        if subscribed:
+            unsubscribed.discard(item_id)
+        else:
+            unsubscribed.add(item_id)
+        self._unsubscribed_ids = unsubscribed
+        self.log.info(
+            "{} item {} {} the subscription".format(
+                "Adding" if subscribed else "Dropping",
+                item_id,
+                "to" if subscribed else "from",
+            )
+        )
+        self.__request_resubscribe()
+        return True
+
+    def get_subscribed_item_ids(self):
+        """Returns the ids to subscribe to, including those of attached engines"""
+        unsubscribed = self._unsubscribed_ids
+        item_ids = [i for i in self._subscribable_ids if str(i) not in unsubscribed]
+        for engine in list(self._attached):
+            item_ids += engine.get_subscribed_item_ids()
+        # An item loaded by several engines is subscribed to once
+        return list(dict.fromkeys(item_ids))
+
+    def attach(self, engine):
+        """Shares this engine's subscription with another engine for the same host
+
+        The subscription covers the items of every attached engine, each update is
+        handed to every engine. The attached engine is ready once a snapshot including
+        its items has been applied."""
+        with self._attach_lock:
+            if engine not in self._attached:
+                self._attached.append(engine)
+            if self._run:
+                self.__request_resubscribe()
+            elif len(self.get_subscribed_item_ids()) > 0:
+                self.__start_subscription()
+
+    def detach(self, engine):
+        """Stops sharing the subscription with an engine, its items are dropped"""
+        with self._attach_lock:
+            if engine not in self._attached:
+                return
+            self._attached.remove(engine)
+            self.__request_resubscribe()
+
+    def get_attached(self):
+        return list(self._attached)
+
+    def __request_resubscribe(self):
+        """Posts the subscription again with the current items, if it is running
+
+        Command Centre subscriptions cannot be changed, so the in-flight poll is aborted
+        and a new subscription is posted. Its snapshot refreshes the subscribed items."""
+        if self._hub is not None:
+            self._hub.__request_resubscribe()
+            return
+        if not self._run:
+            return
+        self._resubscribe_requested = True
+        self._membership_changed.set()
+        self._poll_session.abort()
+
     def set_item_inputs(self, item_list):
         if isinstance(item_list, list):
             self._si_inputs = item_list
@@ -308,6 +597,9 @@ class GallagherRest:
         return False
 
     def get_alarms(self):
+        """Returns the active alarms, from memory once the alarm tracker is started"""
+        if self._alarm_tracker is not None:
+            return self._alarm_tracker.get_alarms()
         return self.__get_available_alarms()
 
     def get_available_inputs(self):
@@ -336,7 +628,7 @@ class GallagherRest:
 
     def __get_available_feature(self, feature):
         self.log.info("Checking available feature `{}`".format(feature))
-        req = requests.get(
+        req = self._session.get(
             self._command_centre_host + "api",
             verify=False,
             headers={"Authorization": "GGL-API-KEY " + self.api_key},
@@ -357,7 +649,7 @@ class GallagherRest:
 
         # Check if the feature is licensed
         try:
-            license_req = requests.get(
+            license_req = self._session.get(
                 self._command_centre_host + "api",
                 verify=False,
                 headers={"Authorization": "GGL-API-KEY " + self.api_key},
@@ -374,7 +666,7 @@ class GallagherRest:
         href = res_json["features"][feature][feature]["href"]
 
         # To go this features endpoint
-        req = requests.get(
+        req = self._session.get(
             href, verify=False, headers={"Authorization": "GGL-API-KEY " + self.api_key}
         )
         res_json = req.json()
@@ -430,6 +722,15 @@ class GallagherRest:
             return None
         return None
 
+    def get_macro(self, item_id):
+        try:
+            item_id = str(item_id)
+            if item_id in self._ccd_macros.keys():
+                return self._ccd_macros[item_id]
+        except Exception as e:
+            return None
+        return None
+
     def get_fence_zone(self, item_id):
         # print(self._ccd_fence_zones.keys())
         try:
@@ -440,7 +741,251 @@ class GallagherRest:
             return None
         return None
 
-    def __setup_item(self, item_name):
+    def get_item(self, item_id):
+        """Returns a loaded item of any type, None if it is not loaded"""
+        item_id = str(item_id)
+        for items in self.__loaded_items():
+            if item_id in items.keys():
+                return items[item_id]
+        return None
+
+    def get_items(self, division=None, controller=None):
+        """Returns the loaded items, optionally only those in a division or on a controller"""
+        found = []
+        for items in self.__loaded_items():
+            for item in items.values():
+                if division is not None and str(item.get_division()) != str(division):
+                    continue
+                if controller is not None and str(item.get_controller()) != str(
+                    controller
+                ):
+                    continue
+                found.append(item)
+        return found
+
+    def bulk_command(self, item_ids, command, timeout=None, force=False):
+        """Queues a command for many items, returns a dict of item id -> Future
+
+        The commands run concurrently through the command dispatcher, up to its
+        concurrency limit. Items that are not loaded resolve as FAILED"""
+        futures = {}
+        for item_id in item_ids:
+            item = self.get_item(item_id)
+            if item is None:
+                self.log.warning(
+                    "Item {} not loaded, unable to do command `{}`".format(
+                        item_id, command
+                    )
+                )
+                futures[item_id] = completed_command(CommandOutcome.FAILED)
+            else:
+                futures[item_id] = item.command(command, timeout=timeout, force=force)
+        return futures
+
+    def get_loaded_items(self, item_name):
+        """Returns the loaded items of a feature, in the shape of get_available_*()
+
+        Platforms create their entities from this, so only the selected items are used"""
+        return [
+            {
+                "id": item.get_item_id(),
+                "name": item.get_name(),
+                "division": item.get_division(),
+                "controller": item.get_controller(),
+            }
+            for item in getattr(self, ITEM_ATTRIBUTES[item_name], {}).values()
+        ]
+
+    def rescan(self):
+        """Discovers the items added to or removed from Command Centre since loading
+
+        Only item types that load every available item are rescanned. One list request
+        is made per type, only new items are fetched. New items join the subscription
+        and removed items leave it, the other items keep receiving updates.
+
+        Returns {"added": {item name: [item ids]}, "removed": {item name: [item ids]}}"""
+        selected_items = {
+            "inputs": self._si_inputs,
+            "outputs": self._si_outputs,
+            "alarmZones": self._si_alarm_zones,
+            "doors": self._si_doors,
+            "accessZones": self._si_access_zones,
+            "fenceZones": self._si_fence_zones,
+            "macros": self._si_macros,
+        }
+
+        added = {}
+        removed = {}
+        with self._rescan_lock:
+            for item_name, attribute in ITEM_ATTRIBUTES.items():
+                if selected_items[item_name] is not None:
+                    # An explicit item list, nothing to discover
+                    continue
+                if item_name not in self._ccd_available_features.keys():
+                    continue
+                if self.__get_feature_state(item_name) == FEATURE_FAILED:
+                    # Loaded whole by the background retry
+                    continue
+
+                try:
+                    listed_ids = self.__list_item_ids(item_name)
+                except Exception as e:
+                    listed_ids = None
+                    self.log.warning(
+                        "Unable to rescan {} ({}), keeping the loaded items".format(
+                            item_name, e
+                        )
+                    )
+                if listed_ids is None:
+                    # Not knowing what exists, nothing is removed
+                    continue
+
+                loaded = getattr(self, attribute)
+                items = dict(loaded)
+                for item_id in listed_ids:
+                    if item_id in items.keys():
+                        continue
+                    item = self.__load_item(item_name, item_id)
+                    if item is not None:
+                        items[item.get_item_id()] = item
+                        added.setdefault(item_name, []).append(item.get_item_id())
+
+                listed = set(listed_ids)
+                for item_id in list(items.keys()):
+                    if item_id not in listed:
+                        del items[item_id]
+                        removed.setdefault(item_name, []).append(item_id)
+
+                # Swapped whole, readers never see a dict being changed
+                setattr(self, attribute, items)
+
+            if len(added) > 0 or len(removed) > 0:
+                self.__index_controllers()
+                removed_ids = set(i for ids in removed.values() for i in ids)
+                subscribable = [
+                    item_id
+                    for item_id in self._subscribable_ids
+                    if item_id not in removed_ids
+                ]
+                for item_name, item_ids in added.items():
+                    if item_name not in UNSUBSCRIBED_ITEMS:
+                        subscribable += item_ids
+                self._subscribable_ids = subscribable
+                self.__subscription_changed()
+
+        self._metrics.increment("items.rescans")
+        self._metrics.increment("items.added", sum(len(i) for i in added.values()))
+        self._metrics.increment("items.removed", sum(len(i) for i in removed.values()))
+        self.log.info(
+            "Rescan found {} new and {} removed items".format(
+                sum(len(i) for i in added.values()),
+                sum(len(i) for i in removed.values()),
+            )
+        )
+        return {"added": added, "removed": removed}
+
+    def __loaded_items(self):
+        return [
+            self._ccd_inputs,
+            self._ccd_outputs,
+            self._ccd_alarm_zones,
+            self._ccd_access_zones,
+            self._ccd_doors,
+            self._ccd_fence_zones,
+            self._ccd_macros,
+        ]
+
+    def set_stall_threshold(self, seconds):
+        """Seconds without a successful poll before a reconnect is forced
+
+        The effective threshold is never shorter than the current long-poll timeout"""
+        if self._hub is not None:
+            return self._hub.set_stall_threshold(seconds)
+        try:
+            self._stall_threshold = max(1, float(seconds))
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def __update_poll_gauges(self):
+        if self._last_poll_success is not None:
+            self._metrics.set_gauge(
+                "subscription.seconds_since_last_poll",
+                round(time.monotonic() - self._last_poll_success, 1),
+            )
+        self._metrics.set_gauge("subscription.long_poll_timeout", self._long_poll_timeout)
+
+    def get_metrics(self):
+        """Returns a snapshot of the engine metrics"""
+        self.__update_poll_gauges()
+        snapshot = self._metrics.snapshot()
+        if self._hub is not None:
+            # The subscription is run by the shared engine
+            shared = self._hub.get_metrics()
+            for kind, metrics in snapshot.items():
+                for name in list(metrics):
+                    if name.startswith(SHARED_METRICS):
+                        del metrics[name]
+                metrics.update(
+                    (name, value)
+                    for name, value in shared[kind].items()
+                    if name.startswith(SHARED_METRICS)
+                )
+        return snapshot
+
+    def get_metrics_registry(self):
+        return self._metrics
+
+    def get_metric(self, name):
+        """Returns a single counter or gauge"""
+        if self._hub is not None and name.startswith(SHARED_METRICS):
+            # The subscription is run by the shared engine
+            return self._hub.get_metric(name)
+        if name.startswith("subscription."):
+            self.__update_poll_gauges()
+        return self._metrics.get_value(name)
+
+    def get_timings(self, name):
+        """Returns the summaries of a timing and its breakdown, see Metrics.get_timings"""
+        if self._hub is not None and name.startswith(SHARED_METRICS):
+            return self._hub.get_timings(name)
+        return self._metrics.get_timings(name)
+
+    def get_startup_tracer(self):
+        return self._tracer
+
+    def get_startup_trace(self):
+        return self._tracer.get_summary()
+
+    def has_item_state(self, item_id):
+        """True once an update from the subscription has been applied to the item"""
+        return self._tracer.has_first_state(item_id)
+
+    def get_controller_health(self):
+        return self._controller_health
+
+    def get_controllers(self):
+        """Returns the ids of the controllers the loaded items are connected to"""
+        return self._controller_health.get_controllers()
+
+    def is_controller_online(self, controller_id):
+        """True or False, None until an item on the controller has reported"""
+        return self._controller_health.is_online(controller_id)
+
+    def set_controller_listener(self, on_change):
+        """Sets the callable given the ids of controllers that went offline or online
+
+        Called from the subscription thread"""
+        self._controller_health.set_listener(on_change)
+
+    def __index_controllers(self):
+        self._controller_health.rebuild(
+            (item.get_item_id(), item.get_controller())
+            for items in self.__loaded_items()
+            for item in items.values()
+        )
+
+    def __setup_item(self, item_name, into=None):
         setupable_items = [
             "inputs",
             "outputs",
@@ -448,6 +993,7 @@ class GallagherRest:
             "doors",
             "accessZones",
             "fenceZones",
+            "macros",
         ]
 
         selected_items = {
@@ -457,6 +1003,7 @@ class GallagherRest:
             "doors": self._si_doors,
             "accessZones": self._si_access_zones,
             "fenceZones": self._si_fence_zones,
+            "macros": self._si_macros,
         }
 
         CCD = {
@@ -466,15 +1013,7 @@ class GallagherRest:
             "doors": self._ccd_doors,
             "accessZones": self._ccd_access_zones,
             "fenceZones": self._ccd_fence_zones,
-        }
-
-        objects = {
-            "inputs": ItemInput,
-            "outputs": ItemOutput,
-            "alarmZones": ItemAlarmZone,
-            "doors": ItemDoor,
-            "accessZones": ItemAccessZone,
-            "fenceZones": ItemFenceZone,
+            "macros": self._ccd_macros,
         }
 
         if item_name not in setupable_items:
@@ -499,8 +1038,38 @@ class GallagherRest:
         if selected_items[item_name] is None:
             # Setup all inputs
             self.log.info("Loading all available {}".format(item_name))
-            req = requests.get(
-                "{}".format(self._ccd_available_features[item_name][item_name]["href"]),
+            selected_items[item_name] = self.__list_item_ids(item_name)
+            if selected_items[item_name] is None:
+                raise FeatureLoadError(item_name, "Unable to list {}".format(item_name))
+
+        if into is not None:
+            CCD[item_name] = into
+
+        if selected_items[item_name] is not []:
+            # setup inputs listed in self._si_inputs
+            self.log.info("Loading Defined {}".format(item_name))
+            for new_item_id in selected_items[item_name]:
+                item = self.__load_item(item_name, new_item_id)
+                if item is not None:
+                    CCD[item_name][item.get_item_id()] = item
+
+    def __list_item_ids(self, item_name):
+        """Returns the ids of the selected items of a feature, None if the list failed"""
+        query = {"fields": "id,name,href,division,connectedController"}
+        if self._selected_divisions is not None:
+            # Command Centre only returns the items in the selected divisions
+            query["division"] = ",".join(str(d) for d in self._selected_divisions)
+        next_href = "{}?{}".format(
+            self._ccd_available_features[item_name][item_name]["href"],
+            urlencode(query, safe=","),
+        )
+
+        item_ids = []
+        filtered = 0
+        excluded = 0
+        while next_href is not None:
+            req = self._session.get(
+                next_href,
                 verify=False,
                 headers={"Authorization": "GGL-API-KEY " + self.api_key},
             )
@@ -511,7 +1080,7 @@ class GallagherRest:
                         item_name, item_name
                     )
                 )
-                return False
+                return None
 
             res_json = req.json()
             if "results" not in res_json:
@@ -520,70 +1089,324 @@ class GallagherRest:
                         item_name
                     )
                 )
-                return False
+                return None
 
-            selected_items[item_name] = []
-            # Add all the newly found items to the selected inputs, so they can be added below
+            # Add all the newly found items to the selected items, so they can be loaded
             for new_item in res_json["results"]:
-                selected_items[item_name].append(new_item["id"])
+                if not self.__controller_selected(new_item):
+                    filtered += 1
+                    continue
+                if not self._item_filter.matches(item_name, new_item.get("name")):
+                    excluded += 1
+                    continue
+                item_ids.append(new_item["id"])
+
+            next_href = None
+            if "next" in res_json.keys():
+                next_href = res_json["next"]["href"]
+
+        if filtered > 0:
+            self.log.info(
+                "{} {} not on a selected controller, not loading them".format(
+                    filtered, item_name
+                )
+            )
+        if excluded > 0:
+            self.log.info(
+                "{} {} excluded by name, not loading them".format(
+                    excluded, item_name
+                )
+            )
 
-        if selected_items[item_name] is not []:
-            # setup inputs listed in self._si_inputs
-            self.log.info("Loading Defined {}".format(item_name))
-            for new_item_id in selected_items[item_name]:
-                req = requests.get(
-                    "{}/{}".format(
-                        self._ccd_available_features[item_name][item_name]["href"],
-                        new_item_id,
-                    ),
-                    verify=False,
-                    headers={"Authorization": "GGL-API-KEY " + self.api_key},
+        return item_ids
+
+    def __load_item(self, item_name, item_id):
+        """Fetches an item and creates its object, None if it is not found or excluded"""
+        objects = {
+            "inputs": ItemInput,
+            "outputs": ItemOutput,
+            "alarmZones": ItemAlarmZone,
+            "doors": ItemDoor,
+            "accessZones": ItemAccessZone,
+            "fenceZones": ItemFenceZone,
+            "macros": ItemMacro,
+        }
+
+        req = self._session.get(
+            "{}/{}".format(
+                self._ccd_available_features[item_name][item_name]["href"],
+                item_id,
+            ),
+            verify=False,
+            headers={"Authorization": "GGL-API-KEY " + self.api_key},
+        )
+
+        if req.status_code != 200:
+            self.log.warning(
+                "Unable to find {} {} in api, not loading {}".format(
+                    item_name, item_id, item_name
                 )
+            )
+            return None
+
+        res_json = req.json()
+
+        name = "CC_{}_{}".format(item_name, res_json["id"])
+        if "name" in res_json.keys():
+            name = res_json["name"]
+
+        if not self._item_filter.matches(item_name, name):
+            # An explicitly listed item, its name is only known now
+            return None
+
+        description = None
+        if "description" in res_json.keys():
+            description = res_json["name"]
+
+        division = None
+        if "division" in res_json.keys():
+            division = res_json["division"]["id"]
+
+        controller = None
+        if "connectedController" in res_json.keys():
+            controller = res_json["connectedController"]["id"]
+            self._controller_health.set_name(
+                controller, res_json["connectedController"].get("name")
+            )
 
-                if req.status_code is not 200:
+        commands = []
+        if "commands" in res_json.keys():
+            commands = res_json["commands"]
+
+        return objects[item_name](
+            res_json["id"],
+            name,
+            description,
+            None,
+            division,
+            controller,
+            commands=commands,
+            api_key=self.api_key,
+            dispatcher=self._dispatcher,
+        )
+
+    def __controller_selected(self, item_json):
+        if (
+            self._selected_controllers is None
+            or "connectedController" not in item_json.keys()
+        ):
+            return True
+        return str(item_json["connectedController"].get("id")) in [
+            str(c) for c in self._selected_controllers
+        ]
+
+    def stop(self, timeout=5):
+        """Stops the subscription, aborting any in-flight long-poll or command
+
+        Returns the time taken to shut down in seconds"""
+        started = time.monotonic()
+        self._run = False
+        self._stop_event.set()
+        self._membership_changed.set()
+
+        if self._dispatcher is not None:
+            self._dispatcher.shutdown()
+        if self._event_stream is not None:
+            self._event_stream.stop(timeout)
+        if self._alarm_tracker is not None:
+            self._alarm_tracker.stop(timeout)
+        if self._cardholder_cache is not None:
+            self._cardholder_cache.stop()
+        if self._hub is not None:
+            # The shared engine keeps running for the other entries on this host
+            self._hub.detach(self)
+            # Aborts this engine's requests, the shared pool stays open for the others
+            cancelled = self._session.cancel()
+        else:
+            cancelled = self._poll_session.cancel() + self._session.cancel()
+
+        deadline = started + timeout
+        for thread in (
+            self._run_thread,
+            self._watchdog_thread,
+            self._feature_retry_thread,
+        ):
+            if thread is not None and thread.is_alive():
+                thread.join(max(0, deadline - time.monotonic()))
+                if thread.is_alive():
                     self.log.warning(
-                        "Unable to find {} {} in api, not loading {}".format(
-                            item_name, new_item_id, item_name
+                        "{} thread did not stop within {} seconds".format(
+                            thread.name, timeout
                         )
                     )
-                else:
-                    res_json = req.json()
-
-                    name = "CC_{}_{}".format(item_name, res_json["id"])
-                    if "name" in res_json.keys():
-                        name = res_json["name"]
-
-                    description = None
-                    if "description" in res_json.keys():
-                        description = res_json["name"]
-
-                    division = None
-                    if "division" in res_json.keys():
-                        division = res_json["division"]["id"]
-
-                    controller = None
-                    if "connectedController" in res_json.keys():
-                        controller = res_json["connectedController"]["id"]
-
-                    commands = []
-                    if "commands" in res_json.keys():
-                        commands = res_json["commands"]
-
-                    CCD[item_name][res_json["id"]] = objects[item_name](
-                        res_json["id"],
-                        name,
-                        description,
-                        None,
-                        division,
-                        controller,
-                        commands=commands,
-                        api_key=self.api_key,
-                    )
 
-    def stop(self):
-        self._run = False
+        if self._hub is None:
+            self._poll_session.close()
+            if self._pool is None:
+                self._session.close()
+            # Stops recording a failover shared with other engines on this host
+            self._failover.remove_metrics(self._metrics)
+
+        elapsed = time.monotonic() - started
+        self.log.info(
+            "Stopped in {:.1f} ms, {} connections cancelled".format(
+                elapsed * 1000, cancelled
+            )
+        )
+        return elapsed
+
+    def start_event_stream(self, on_events, cursor=None, groups=None, types=None):
+        """Starts following the events long-poll, see EventStream
+
+        Returns the EventStream, or None if events are not an available feature"""
+        feature = self._ccd_available_features.get("events", {})
+        if "updates" not in feature or "href" not in feature["updates"]:
+            self.log.warning("`events` not an available feature, not receiving events")
+            return None
+
+        if self._event_stream is not None:
+            self._event_stream.stop()
+
+        def handle_events(events, cursor):
+            if self._cardholder_cache is not None:
+                self._cardholder_cache.enrich_events(events)
+            if self._occupancy is not None:
+                self._occupancy.handle_events(events)
+            if self._event_buffer is not None:
+                self._event_buffer.add_events(events)
+            on_events(events, cursor)
+
+        self._event_stream = EventStream(
+            feature["updates"]["href"],
+            self.api_key,
+            handle_events,
+            cursor=cursor,
+            groups=groups,
+            types=types,
+            metrics=self._metrics,
+            failover=self._failover,
+        )
+        self._event_stream.start()
+        return self._event_stream
+
+    def get_event_stream(self):
+        return self._event_stream
+
+    def start_alarm_tracker(self, on_change=None):
+        """Starts following the alarm list, see AlarmTracker
+
+        Returns the AlarmTracker, or None if alarms are not an available feature"""
+        feature = self._ccd_available_features.get("alarms", {})
+        if "alarms" not in feature or "href" not in feature["alarms"]:
+            self.log.warning("`alarms` not an available feature, not tracking alarms")
+            return None
+
+        if self._alarm_tracker is not None:
+            self._alarm_tracker.stop()
+
+        self._alarm_tracker = AlarmTracker(
+            feature["alarms"]["href"],
+            self.api_key,
+            dispatcher=self._dispatcher,
+            metrics=self._metrics,
+            on_change=on_change,
+            failover=self._failover,
+        )
+        self._alarm_tracker.start()
+        return self._alarm_tracker
+
+    def get_alarm_tracker(self):
+        return self._alarm_tracker
+
+    def enable_occupancy(self, on_change=None):
+        """Counts occupancy of the loaded access zones from the event stream
+
+        Counts start from the zone counts reported so far, see reconcile_occupancy()"""
+        self._occupancy = OccupancyEngine(
+            zone_ids=list(self._ccd_access_zones.keys()),
+            metrics=self._metrics,
+            on_change=on_change,
+        )
+        self.reconcile_occupancy()
+        return self._occupancy
+
+    def get_occupancy(self):
+        return self._occupancy
+
+    def enable_event_buffer(self, capacity=5000):
+        """Keeps the most recent events from the event stream in memory, see EventBuffer"""
+        self._event_buffer = EventBuffer(capacity, metrics=self._metrics)
+        return self._event_buffer
+
+    def get_event_buffer(self):
+        return self._event_buffer
+
+    def enable_cardholder_cache(self, capacity=1000, ttl=3600):
+        """Resolves the cardholders of events through a cache, see CardholderCache
+
+        Returns the CardholderCache, or None if cardholders are not an available feature"""
+        feature = self._ccd_available_features.get("cardholders", {})
+        if "cardholders" not in feature or "href" not in feature["cardholders"]:
+            self.log.warning(
+                "`cardholders` not an available feature, not resolving cardholders"
+            )
+            return None
+
+        if self._cardholder_cache is not None:
+            self._cardholder_cache.stop()
+
+        self._cardholder_cache = CardholderCache(
+            feature["cardholders"]["href"],
+            self.api_key,
+            capacity=capacity,
+            ttl=ttl,
+            metrics=self._metrics,
+            failover=self._failover,
+        )
+        return self._cardholder_cache
+
+    def get_cardholder_cache(self):
+        return self._cardholder_cache
+
+    def get_cardholder(self, cardholder_id):
+        """Returns a cardholder by id, None if unresolved or the cache is not enabled"""
+        if self._cardholder_cache is None:
+            return None
+        return self._cardholder_cache.get_cardholder(cardholder_id)
+
+    def reconcile_occupancy(self):
+        """Corrects the occupancy counts from the zone counts held by the access zones
+
+        Uses the last reported counts, nothing is requested from the server"""
+        if self._occupancy is None:
+            return set()
+        return self._occupancy.reconcile(
+            {
+                zone_id: zone.get_zone_count()
+                for zone_id, zone in self._ccd_access_zones.items()
+                if zone.has_zone_count()
+            }
+        )
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout=None):
+        """Blocks until the initial subscription snapshot has been applied, or the timeout expires
+
+        Returns True if the snapshot was applied within the timeout"""
+        return self._ready.wait(timeout)
 
     def start(self):
+        self._session.reset()
+        self._dispatcher = CommandDispatcher(
+            self._session,
+            self.api_key,
+            metrics=self._metrics,
+            max_concurrency=self._command_concurrency,
+            default_timeout=self._command_timeout,
+        )
+
         # Reset Command Centre Data
         self._ccd_inputs = {}
         self._ccd_outputs = {}
@@ -594,142 +1417,570 @@ class GallagherRest:
         self._ccd_fence_zones = {}
         self._ccd_macros = {}
 
+        # Each type loads on its own, a type that fails is retried in the background
+        self._feature_status = {}
         item_ids = []
-        setup_methods = [
-            {
-                "method": self.__setup_item,
-                "arg": "inputs",
-                "reference": self._ccd_inputs,
-            },
-            {
-                "method": self.__setup_item,
-                "arg": "outputs",
-                "reference": self._ccd_outputs,
-            },
-            {
-                "method": self.__setup_item,
-                "arg": "alarmZones",
-                "reference": self._ccd_alarm_zones,
-            },
-            {"method": self.__setup_item, "arg": "doors", "reference": self._ccd_doors},
-            {
-                "method": self.__setup_item,
-                "arg": "accessZones",
-                "reference": self._ccd_access_zones,
-            },
-            {
-                "method": self.__setup_item,
-                "arg": "fenceZones",
-                "reference": self._ccd_fence_zones,
-            },
-        ]
+        for item_name, attribute in ITEM_ATTRIBUTES.items():
+            with self._tracer.span("setup_item.{}".format(item_name)):
+                loaded = self.__setup_feature(item_name)
+            if loaded and item_name not in UNSUBSCRIBED_ITEMS:
+                item_ids += getattr(self, attribute)
+
+        self.__index_controllers()
+        self._subscribable_ids = item_ids
+        if self._hub is not None:
+            # The shared engine subscribes to our items and hands us their updates
+            if len(self.get_subscribed_item_ids()) > 0:
+                self._ready.clear()
+            else:
+                self._ready.set()
+            self._hub.attach(self)
+            started = True
+
+        elif len(item_ids) > 0:
+            self.__start_subscription()
+
+            # Readiness is signalled once the first snapshot is applied, see wait_until_ready()
+            started = True
 
-        for setup_method in setup_methods:
-            try:
-                setup_method["method"](setup_method["arg"])
-                item_ids += setup_method["reference"]
+        else:
+            self.log.info("No items to subscribe to, not initiating a subscription")
+            started = False
 
-            except Exception as e:
-                self.log.error(traceback.format_exc())
-                return False
+        if len(self.get_failed_features()) > 0:
+            self.__start_feature_retry()
 
-        if len(item_ids) > 0:
-            self._run_thread = Thread(target=self.__run, args=(item_ids,))
-            self._run_thread.start()
+        return started
 
-            timeout = int(time.time()) + 5
+    def __setup_feature(self, item_name):
+        """Loads the items of one type, recording its load state
 
-            while self._run is not True and timeout < int(time.time()):
-                time.sleep(0.001)
+        Returns True if the type loaded, a type that fails is retried by
+        __retry_features() with back off"""
+        status = self._feature_status.setdefault(
+            item_name, {"attempts": 0, "failed_since": None}
+        )
+        status["attempts"] += 1
+        items = {}
+        try:
+            loaded = self.__setup_item(item_name, into=items)
+        except Exception as e:
+            self._metrics.increment("features.failures")
+            if status["failed_since"] is None:
+                status["failed_since"] = time.monotonic()
+            delay = min(
+                FEATURE_RETRY_MAX_DELAY,
+                FEATURE_RETRY_BASE_DELAY * (2 ** min(status["attempts"] - 1, 16)),
+            )
+            self.log.warning(
+                "Unable to load {} ({}), retrying in {:.0f} seconds".format(
+                    item_name, e, delay
+                )
+            )
+            self.log.debug(traceback.format_exc())
+            status.update(
+                state=FEATURE_FAILED,
+                error=str(e),
+                items=0,
+                next_attempt=time.monotonic() + delay,
+            )
+            self.__publish_feature_status()
+            return False
 
-            return self._run
+        if loaded is False:
+            status.update(state=FEATURE_UNAVAILABLE, error=None, items=0)
+            self.__publish_feature_status()
+            return False
 
-        else:
-            self.log.info("No items to subscribe to, not initiating a subscription")
+        setattr(self, ITEM_ATTRIBUTES[item_name], items)
+        if status["failed_since"] is not None:
+            recovery = time.monotonic() - status["failed_since"]
+            self._metrics.increment("features.recovered")
+            self._metrics.record_timing("features.recovery", recovery)
+            self.log.info(
+                "Loaded {} {} after {} attempts, {:.1f} seconds after the first "
+                "failure".format(len(items), item_name, status["attempts"], recovery)
+            )
+        selected = self.__get_selected_items(item_name)
+        status.update(
+            state=FEATURE_NOT_SELECTED
+            if selected is not None and len(selected) == 0
+            else FEATURE_LOADED,
+            error=None,
+            items=len(items),
+            failed_since=None,
+            next_attempt=None,
+        )
+        self.__publish_feature_status()
+        return True
 
-        return False
+    def __get_selected_items(self, item_name):
+        return {
+            "inputs": self._si_inputs,
+            "outputs": self._si_outputs,
+            "alarmZones": self._si_alarm_zones,
+            "doors": self._si_doors,
+            "accessZones": self._si_access_zones,
+            "fenceZones": self._si_fence_zones,
+            "macros": self._si_macros,
+        }[item_name]
+
+    def __get_feature_state(self, item_name):
+        status = self._feature_status.get(item_name)
+        return None if status is None else status["state"]
+
+    def __publish_feature_status(self):
+        self._metrics.set_gauge("features.failed", len(self.get_failed_features()))
+
+    def get_feature_status(self):
+        """Returns item type -> {state, ready, error, items, attempts, retry_in}
+
+        A type is ready once it is loaded and, for types with a status, the subscription
+        snapshot including its items has been applied"""
+        now = time.monotonic()
+        status = {}
+        for item_name, feature in list(self._feature_status.items()):
+            next_attempt = feature.get("next_attempt")
+            status[item_name] = {
+                "state": feature["state"],
+                "ready": feature["state"] == FEATURE_LOADED
+                and (item_name in UNSUBSCRIBED_ITEMS or self._ready.is_set()),
+                "error": feature.get("error"),
+                "items": feature.get("items", 0),
+                "attempts": feature["attempts"],
+                "retry_in": None
+                if next_attempt is None
+                else round(max(0, next_attempt - now), 1),
+            }
+        return status
+
+    def get_failed_features(self):
+        return [
+            item_name
+            for item_name, status in list(self._feature_status.items())
+            if status["state"] == FEATURE_FAILED
+        ]
+
+    def is_feature_ready(self, item_name):
+        status = self.get_feature_status().get(item_name)
+        return status is not None and status["ready"]
 
-    def __run(self, item_ids):
+    def set_feature_listener(self, on_feature_loaded):
+        """Sets the callable given the item type and ids of a type loaded by a retry
+
+        Called from the retry thread"""
+        self._on_feature_loaded = on_feature_loaded
+
+    def __start_feature_retry(self):
+        if self._feature_retry_thread is not None and self._feature_retry_thread.is_alive():
+            return
+        self._feature_retry_thread = Thread(
+            target=self.__retry_features, name="GallagherRestRetry", daemon=True
+        )
+        self._feature_retry_thread.start()
+
+    def __retry_features(self):
+        """Retries the failed item types, each on its own back off, until all load"""
+        while not self._stop_event.is_set():
+            due = [
+                (status["next_attempt"], item_name)
+                for item_name, status in list(self._feature_status.items())
+                if status["state"] == FEATURE_FAILED
+            ]
+            if len(due) == 0:
+                return
+
+            wait = min(due)[0] - time.monotonic()
+            if wait > 0:
+                self._stop_event.wait(wait)
+                continue
+
+            for next_attempt, item_name in sorted(due):
+                if next_attempt > time.monotonic() or self._stop_event.is_set():
+                    break
+                self.__retry_feature(item_name)
+
+    def __retry_feature(self, item_name):
+        self._metrics.increment("features.retries")
+        with self._rescan_lock:
+            if not self.__setup_feature(item_name):
+                return
+            self.__index_controllers()
+            item_ids = list(getattr(self, ITEM_ATTRIBUTES[item_name]).keys())
+            if item_name not in UNSUBSCRIBED_ITEMS:
+                subscribed = set(self._subscribable_ids)
+                self._subscribable_ids = self._subscribable_ids + [
+                    item_id for item_id in item_ids if item_id not in subscribed
+                ]
+                self.__subscription_changed()
+
+        if self._on_feature_loaded is not None and len(item_ids) > 0:
+            try:
+                self._on_feature_loaded(item_name, item_ids)
+            except Exception:
+                self.log.error(traceback.format_exc())
+
+    def __subscription_changed(self):
+        """Brings the subscription in line with the subscribable items"""
+        if self._hub is not None:
+            # Starts the shared subscription if no entry had items to subscribe to
+            self._hub.attach(self)
+        elif self._run:
+            self.__request_resubscribe()
+        elif len(self.get_subscribed_item_ids()) > 0:
+            self.__start_subscription()
+
+    def __start_subscription(self):
+        if len(self._subscribable_ids) > 0 or len(self._attached) > 0:
+            self._ready.clear()
+            self._stop_event.clear()
+            self._membership_changed.clear()
+            self._resubscribe_requested = False
+            self._poll_session.reset()
+            self._run = True
+            self._last_poll_success = time.monotonic()
+            self._run_thread = Thread(
+                target=self.__run, name="GallagherRest", daemon=True
+            )
+            self._run_thread.start()
+            self._watchdog_thread = Thread(
+                target=self.__watchdog, name="GallagherRestWatchdog", daemon=True
+            )
+            self._watchdog_thread.start()
+
+    def __run(self):
+
+        with self.__subscription_spans():
+            next_url = self.__subscribe(self.get_subscribed_item_ids())
 
-        next_url = self.__first_subscription(item_ids)
-        # self.log.info(next_url)
-        exception_occurred = False
-        self._run = True
         while self._run == True:
+            polling = False
             try:
-                if self._run is False:
-                    print("Stopping!")
-                    break
-                    return None
+                if self._resubscribe_requested:
+                    self._resubscribe_requested = False
+                    self._membership_changed.clear()
+                    self._metrics.increment("subscription.membership_changes")
+                    with self.__subscription_spans():
+                        next_url = self.__subscribe(
+                            self.get_subscribed_item_ids(), reconnect=False
+                        )
+                    continue
+
+                if next_url == "" and len(self.get_subscribed_item_ids()) == 0:
+                    # Every item is left out, wait until one is added back
+                    self._last_poll_success = time.monotonic()
+                    self.__set_ready()
+                    self._membership_changed.wait(CONNECT_TIMEOUT)
+                    continue
+
+                if next_url == "":
+                    # Subscription lost, reconnect as allowed by the reconnect policy
+                    if self.__probe_if_needed() is False:
+                        continue
+                    next_url = self.__subscribe(
+                        self.get_subscribed_item_ids(), raise_errors=True
+                    )
+                    continue
+
                 # self.log.info(next_url)
 
-                update_res = requests.get(
+                if self._resubscribe_requested:
+                    # Requested while the subscription was being posted, there was no
+                    # poll in flight to abort
+                    continue
+
+                polling = True
+                poll_started = time.monotonic()
+                update_res = self._poll_session.get(
                     next_url,
                     verify=False,
                     headers={"Authorization": self.api_key},
-                    timeout=65,
+                    timeout=(CONNECT_TIMEOUT, self._long_poll_timeout),
                 )
                 if update_res.status_code != 200:
                     self.log.warning(
                         "Non 200 status code received, re subscribing to updates"
                     )
-                    next_url = self.__first_subscription(item_ids)
-
-                else:
-                    update_json = update_res.json()
-                    # print(update_json)
-                    if "next" not in update_json.keys():
-                        self.log.error("Next HREF not in subscription response")
-                        raise Exception("Next not found in update response")
+                    raise SubscriptionError(update_res.status_code)
 
-                    if "updates" in update_json.keys():
-                        self.__handle_new_update(update_json["updates"])
+                update_json = update_res.json()
+                # print(update_json)
+                if "next" not in update_json.keys():
+                    self.log.error("Next HREF not in subscription response")
+                    raise SubscriptionError(None, "Next not found in update response")
 
-                    next_url = update_json["next"]["href"]
+                updates = update_json.get("updates") or []
+                if len(updates) > 0:
+                    self.__handle_new_update(updates)
 
-                exception_occurred = False
+                next_url = update_json["next"]["href"]
+                self.__poll_succeeded(time.monotonic() - poll_started, len(updates))
 
-            except requests.exceptions.ReadTimeout:
+            except requests.exceptions.ReadTimeout as e:
+                if self._run is False:
+                    break
+                if not polling:
+                    # The subscription itself timed out
+                    next_url = ""
+                    if self.__wait_after_failure(e):
+                        break
+                    continue
                 self.log.info("API HTTP timed out")
-                next_url = self.__first_subscription(item_ids)
+                self._metrics.increment("subscription.poll_timeouts")
+                # The server held the poll longer than expected, widen the timeout
+                self._idle_poll_durations.clear()
+                self._long_poll_timeout = min(
+                    LONG_POLL_TIMEOUT_MAX, self._long_poll_timeout * 2
+                )
+                next_url = ""
 
             except Exception as e:
-                exception_occurred = True
-                self.log.error(traceback.format_exc())
+                if self._run is False:
+                    # The in-flight request was cancelled by stop()
+                    break
+                next_url = ""
+                if self._resubscribe_requested:
+                    # The poll was aborted to change the subscribed items
+                    continue
+                if self._reconnect_requested:
+                    # The watchdog aborted a stalled poll, reconnect straight away
+                    self._reconnect_requested = False
+                    continue
+
+                if self.__wait_after_failure(e):
+                    break
 
-            if exception_occurred:
-                time.sleep(1)
-                try:
-                    next_url = self.__first_subscription(item_ids)
-                    self.log.info("Exception occured in API loop")
+        return False
 
-                except Exception as e:
-                    self.log.error(traceback.format_exc())
+    def __subscribe(self, item_ids, raise_errors=False, reconnect=True):
+        """Posts the full subscription, returns the next href or an empty string"""
+        if len(item_ids) == 0:
+            return ""
 
-        return False
+        try:
+            next_url = self.__first_subscription(item_ids, reconnect)
+        except Exception as e:
+            if raise_errors:
+                raise
+            if self._resubscribe_requested or not self._run:
+                # Aborted on purpose, not a failure
+                return ""
+            self.log.error("Unable to subscribe to updates - {}".format(e))
+            self.__wait_after_failure(e)
+            return ""
+
+        self._reconnect_policy.record_success()
+        if self._failover_started is not None:
+            self.__failover_completed()
+        return next_url
+
+    def __fail_over(self):
+        """Switches to the first healthy host if the active one is down
+
+        Returns True if the active host changed"""
+        if not self._failover.has_standby() or self._run is False:
+            return False
+
+        started = time.monotonic()
+        previous = self._failover.get_active_host()
+        host = self._failover.select(self._poll_session, self.api_key)
+        if host is None or host == previous:
+            return False
+
+        self.log.warning(
+            "Command Centre {} is unavailable, failing over to {}".format(previous, host)
+        )
+        self._failover_started = started
+        self._outage_started = self._last_poll_success or started
+        self._failover.activate(host)
+        # The new host starts with a fresh back off
+        self._reconnect_policy.record_success()
+        return True
+
+    def __failover_completed(self):
+        """Records how long the switch and the gap in updates lasted"""
+        now = time.monotonic()
+        self._metrics.record_timing("failover.time", now - self._failover_started)
+        if self._outage_started is not None:
+            self._metrics.set_gauge(
+                "failover.last_outage_seconds", round(now - self._outage_started, 1)
+            )
+        self.log.info(
+            "Subscribed on {} {:.1f} seconds after switching host".format(
+                self._failover.get_active_host(), now - self._failover_started
+            )
+        )
+        self._failover_started = None
+        self._outage_started = None
+
+    def __fail_back_if_needed(self):
+        """Switches back to a preferred host once it answers again"""
+        if not self._failover.is_on_standby():
+            return
+        if time.monotonic() - self._last_failback_check < FAILBACK_INTERVAL:
+            return
+        self._last_failback_check = time.monotonic()
+
+        host = self._failover.select(
+            self._session, self.api_key, before=self._failover.get_active_index()
+        )
+        if host is None:
+            return
+
+        self.log.info("Command Centre {} is available again, failing back".format(host))
+        self._failover_started = time.monotonic()
+        self._outage_started = None
+        self._reconnect_requested = True
+        self._failover.activate(host)
+
+    def __probe_if_needed(self):
+        """Waits out an open circuit, then probes the API root before a full subscription
+
+        Returns False if the subscription should not be attempted yet"""
+        wait = self._reconnect_policy.time_until_attempt()
+        if wait > 0:
+            self._stop_event.wait(wait)
+            return False
+
+        if self._reconnect_policy.before_attempt() is False:
+            return True
+
+        self.log.info("Probing Command Centre before re subscribing")
+        try:
+            probe = self._poll_session.get(
+                self._command_centre_host + "api",
+                verify=False,
+                headers={"Authorization": "GGL-API-KEY " + self.api_key},
+                timeout=(CONNECT_TIMEOUT, CONNECT_TIMEOUT),
+            )
+            if probe.status_code != 200:
+                raise SubscriptionError(probe.status_code)
+        except Exception as e:
+            if self._run is not False:
+                self.__wait_after_failure(e)
+            return False
+
+        return True
+
+    def __wait_after_failure(self, exception):
+        """Records a failure with the reconnect policy and waits out the back off
+
+        Returns True if the engine was stopped while waiting"""
+        failure_type = classify_failure(exception)
+        if failure_type is not FailureType.AUTH and self.__fail_over():
+            # Reconnect to the standby straight away
+            return self._stop_event.is_set()
+
+        delay = self._reconnect_policy.record_failure(failure_type)
+
+        if failure_type is FailureType.AUTH:
+            self.log.error(
+                "Command Centre rejected the API key, retrying in {:.0f} seconds".format(
+                    delay
+                )
+            )
+        else:
+            self.log.warning(
+                "Subscription {} failure ({}), retrying in {:.1f} seconds".format(
+                    failure_type.value, exception, delay
+                )
+            )
+            self.log.debug(traceback.format_exc())
+
+        return self._stop_event.wait(delay)
+
+    def __poll_succeeded(self, duration, update_count):
+        self._last_poll_success = time.monotonic()
+        self._metrics.increment("subscription.polls")
+
+        if update_count == 0:
+            # The server held the poll until its idle timeout, adapt our read timeout to it
+            self._idle_poll_durations.append(duration)
+            observed_hold = max(self._idle_poll_durations)
+            self._long_poll_timeout = round(
+                min(
+                    LONG_POLL_TIMEOUT_MAX,
+                    max(LONG_POLL_TIMEOUT_MIN, observed_hold + max(5, observed_hold * 0.25)),
+                ),
+                1,
+            )
+
+    def __watchdog(self):
+        while not self._stop_event.is_set():
+            threshold = max(self._stall_threshold, self._long_poll_timeout)
+            if self._stop_event.wait(min(5, threshold / 4)):
+                break
+
+            if self._resubscribe_requested:
+                # The abort missed a poll that was just starting, abort it again
+                self._poll_session.abort()
 
-    def __first_subscription(self, item_ids):
-        sub_req = requests.post(
+            self.__fail_back_if_needed()
+
+            if self._last_poll_success is None:
+                continue
+
+            if not self._reconnect_policy.is_healthy():
+                # Already reconnecting under the reconnect policy
+                continue
+
+            stalled_for = time.monotonic() - self._last_poll_success
+            if stalled_for > threshold:
+                self.log.warning(
+                    "No successful poll for {:.0f} seconds, forcing a reconnect".format(
+                        stalled_for
+                    )
+                )
+                self._metrics.increment("subscription.stalls")
+                self._last_poll_success = time.monotonic()
+                self._reconnect_requested = True
+                self._poll_session.abort()
+
+    def __first_subscription(self, item_ids, reconnect=True):
+        if reconnect and self._ready.is_set():
+            self._metrics.increment("subscription.reconnects")
+
+        sub_req = self._poll_session.post(
             "{}api/items/updates".format(self._command_centre_host),
             verify=False,
             headers={"Authorization": self.api_key},
             json={"itemIds": item_ids},
+            timeout=(CONNECT_TIMEOUT, LONG_POLL_TIMEOUT_DEFAULT),
         )
         if sub_req.status_code != 200:
             self.log.error("Non 200 status code when subscribing to updates")
-            return ""
+            raise SubscriptionError(sub_req.status_code)
         else:
             res_json = sub_req.json()
 
             if "next" not in res_json.keys():
                 self.log.error("Next HREF not in subscription response")
-                return ""
+                raise SubscriptionError(None, "Next not found in subscription response")
 
             if "updates" in res_json.keys():
                 self.__handle_new_update(res_json["updates"])
 
+            self._last_poll_success = time.monotonic()
+            if not self._ready.is_set():
+                self.log.info("Initial subscription snapshot applied")
+            self.__set_ready()
+
             return res_json["next"]["href"]
 
+    def __subscription_spans(self):
+        """Times a subscription in the trace of every engine waiting for its first
+        snapshot, this one and those attached to it"""
+        spans = ExitStack()
+        for engine in [self] + list(self._attached):
+            if not engine._ready.is_set():
+                spans.enter_context(engine._tracer.span("first_subscription"))
+        return spans
+
+    def __record_poll_response(self, response, *args, **kwargs):
+        """Counts a subscription exchange in this trace and those of attached engines"""
+        for engine in [self] + list(self._attached):
+            engine._tracer.record_response(response, *args, **kwargs)
+
     def __handle_new_update(self, updates):
         # self.log.debug("Handling update")
 
@@ -744,14 +1995,44 @@ class GallagherRest:
             self._ccd_fence_zones,
         ]
 
-        for update in updates:
+        # Items on an offline controller are not decoded, their entities are
+        # unavailable until it reports again
+        for update in self._controller_health.filter_updates(updates):
             for handler in handlers:
                 if update["id"] in handler.keys():
                     try:
                         handler[update["id"]].handle_update(update)
+                        self._tracer.mark_first_state(update["id"])
                     except Exception:
                         self.log.error(
                             "Error during handling item: {} handlers".format(
                                 update["id"]
                             )
                         )
+
+        for engine in list(self._attached):
+            engine.__handle_new_update(updates)
+
+    def __set_ready(self):
+        """Signals readiness to this engine and every engine attached to it"""
+        self._ready.set()
+        for engine in list(self._attached):
+            engine._ready.set()
+
+
+class FeatureLoadError(Exception):
+    """An item type could not be loaded"""
+
+    def __init__(self, item_name, message=None):
+        super().__init__(message or "Unable to load {}".format(item_name))
+        self.item_name = item_name
+
+
+class SubscriptionError(Exception):
+    """A subscription request returned an unexpected response"""
+
+    def __init__(self, status_code, message=None):
+        if message is None:
+            message = "Received status code {}".format(status_code)
+        super().__init__(message)
+        self.status_code = status_code
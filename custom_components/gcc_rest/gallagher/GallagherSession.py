@@ -0,0 +1,136 @@
+import socket
+from threading import Lock, local
+from weakref import WeakSet
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+# The session a thread is currently requesting through, see GallagherSession.request()
+_requesting = local()
+
+
+class GallagherSession(requests.Session):
+    """Pooled HTTP session whose in-flight requests can be cancelled from another thread
+
+    Every connection the session sends a request on is tracked, cancel() shuts the
+    underlying sockets down so a blocked long-poll returns immediately instead of
+    waiting for its read timeout. Sessions can share one connection pool by mounting
+    the adapters of another, see share_pool(), each still tracks its own requests."""
+
+    def __init__(self, failover=None):
+        super().__init__()
+        self._connections = WeakSet()
+        self._connections_lock = Lock()
+        self._cancelled = False
+
+        # Requests are sent to the active host of the failover, see HostFailover
+        self._failover = failover
+        if failover is not None:
+            failover.register(self)
+
+        adapter = _CancellableAdapter(self)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, rebase=True, **kwargs):
+        if self._cancelled:
+            raise SessionCancelled("Session has been cancelled, not requesting {}".format(url))
+        if rebase and self._failover is not None:
+            url = self._failover.rebase(url)
+
+        previous = getattr(_requesting, "session", None)
+        _requesting.session = self
+        try:
+            return super().request(method, url, *args, **kwargs)
+        finally:
+            _requesting.session = previous
+
+    def share_pool(self, session):
+        """Sends requests through the connection pool of another session"""
+        self.close()
+        for prefix, adapter in session.adapters.items():
+            self.mount(prefix, adapter)
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """Refuses new requests and aborts every request currently in flight"""
+        self._cancelled = True
+        return self.abort()
+
+    def abort(self):
+        """Aborts every request currently in flight, new requests are still allowed"""
+        with self._connections_lock:
+            connections = list(self._connections)
+
+        for connection in connections:
+            sock = getattr(connection, "sock", None)
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                # Already closed
+                pass
+
+        return len(connections)
+
+    def reset(self):
+        """Allows requests again after a cancel()"""
+        self._cancelled = False
+
+    def track_connection(self, connection):
+        with self._connections_lock:
+            self._connections.add(connection)
+
+    def untrack_connection(self, connection):
+        with self._connections_lock:
+            self._connections.discard(connection)
+
+
+class SessionCancelled(requests.exceptions.ConnectionError):
+    """Raised for requests made after the session was cancelled"""
+
+
+class _CancellableAdapter(HTTPAdapter):
+    def __init__(self, session, *args, **kwargs):
+        self._session = session
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _tracked_pool(HTTPConnectionPool, HTTPConnection, self._session),
+            "https": _tracked_pool(HTTPSConnectionPool, HTTPSConnection, self._session),
+        }
+
+
+def _tracked_pool(pool_class, connection_class, session):
+    class TrackedConnection(connection_class):
+        # The session that last sent a request on this connection
+        owner = None
+
+        def close(self):
+            if self.owner is not None:
+                self.owner.untrack_connection(self)
+            super().close()
+
+    def _make_request(self, conn, *args, **kwargs):
+        # Tracked against the session requesting, which may share this pool
+        owner = getattr(_requesting, "session", None) or session
+        if conn.owner is not owner:
+            if conn.owner is not None:
+                conn.owner.untrack_connection(conn)
+            conn.owner = owner
+            owner.track_connection(conn)
+        return pool_class._make_request(self, conn, *args, **kwargs)
+
+    return type(
+        "Tracked{}".format(pool_class.__name__),
+        (pool_class,),
+        {"ConnectionCls": TrackedConnection, "_make_request": _make_request},
+    )
@@ -0,0 +1,152 @@
+import re
+import time
+from threading import Lock
+from urllib.parse import urlsplit, urlunsplit
+from weakref import WeakSet
+
+# Timeout for a health probe, short so a dead host is passed over quickly
+PROBE_TIMEOUT = 3
+
+
+class HostFailover:
+    """An ordered list of Command Centre hosts, the first healthy one being active
+
+    Every GallagherSession created with this failover sends its requests to the active
+    host, whatever host the URL was built or returned with, so item and feature hrefs
+    read from one server keep working against its standby. Switching host aborts the
+    requests in flight on those sessions, they reconnect to the new host. Engines for
+    different API keys on one host share a failover, each adding its metrics."""
+
+    def __init__(self, hosts, metrics=None):
+        self._hosts = list(dict.fromkeys(_normalise(host) for host in hosts if host))
+        self._metrics = [] if metrics is None else [metrics]
+        self._lock = Lock()
+        self._active = 0
+        self._sessions = WeakSet()
+        self.__publish()
+
+    def get_hosts(self):
+        return list(self._hosts)
+
+    def get_active_host(self):
+        return self._hosts[self._active]
+
+    def get_active_index(self):
+        return self._active
+
+    def has_standby(self):
+        return len(self._hosts) > 1
+
+    def is_on_standby(self):
+        """True while a host other than the first is active"""
+        return self._active > 0
+
+    def register(self, session):
+        self._sessions.add(session)
+
+    def add_metrics(self, metrics):
+        """Records the failover in another metrics registry too"""
+        self._metrics.append(metrics)
+        self.__publish()
+
+    def remove_metrics(self, metrics):
+        if metrics in self._metrics:
+            self._metrics.remove(metrics)
+
+    def set_hosts(self, hosts):
+        """Replaces the host list, the active host stays active while it is listed
+
+        Requests in flight are aborted if the active host is no longer listed"""
+        hosts = list(dict.fromkeys(_normalise(host) for host in hosts if host))
+        with self._lock:
+            active = self._hosts[self._active]
+            self._hosts = hosts
+            self._active = hosts.index(active) if active in hosts else 0
+            switched = self._hosts[self._active] != active
+        self.__publish()
+        if switched:
+            for session in list(self._sessions):
+                session.abort()
+
+    def rebase(self, url):
+        """Returns the url pointed at the active host"""
+        if len(self._hosts) < 2:
+            return url
+        parts = urlsplit(url)
+        active = urlsplit(self._hosts[self._active])
+        return urlunsplit(
+            (active.scheme, active.netloc, parts.path, parts.query, parts.fragment)
+        )
+
+    def activate(self, host):
+        """Makes a host active, returns True if it was not already
+
+        Requests in flight to the previous host are aborted"""
+        index = self._hosts.index(_normalise(host))
+        with self._lock:
+            if index == self._active:
+                return False
+            self._active = index
+        for metrics in list(self._metrics):
+            metrics.increment("failover.switches")
+        self.__publish()
+        for session in list(self._sessions):
+            session.abort()
+        return True
+
+    def probe(self, session, host, api_key):
+        """Returns True if a host answers the API root with a 200"""
+        started = time.perf_counter()
+        healthy = False
+        try:
+            req = session.get(
+                _normalise(host) + "api",
+                verify=False,
+                headers={"Authorization": "GGL-API-KEY " + api_key},
+                timeout=(PROBE_TIMEOUT, PROBE_TIMEOUT),
+                allow_redirects=False,
+                # Not rebased, the probe must reach this host
+                rebase=False,
+            )
+            healthy = req.status_code == 200
+        except Exception:
+            healthy = False
+
+        elapsed = time.perf_counter() - started
+        for metrics in list(self._metrics):
+            metrics.increment("failover.probes")
+            if not healthy:
+                metrics.increment("failover.probe_failures")
+            metrics.record_timing("failover.probe", elapsed)
+        return healthy
+
+    def select(self, session, api_key, before=None):
+        """Probes the hosts in order and returns the first healthy one, None if none is
+
+        before limits the probe to hosts ahead of that index, to check for a fail back"""
+        hosts = self._hosts if before is None else self._hosts[:before]
+        for host in hosts:
+            if self.probe(session, host, api_key):
+                return host
+        return None
+
+    def __publish(self):
+        for metrics in list(self._metrics):
+            metrics.set_gauge("failover.active_host", self.get_active_host())
+            metrics.set_gauge("failover.active_host_index", self._active)
+
+
+def parse_host_list(value):
+    """Returns the hosts of a comma, space or new line separated string"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        hosts = value
+    else:
+        hosts = re.split(r"[,\s]+", str(value))
+    return [_normalise(host) for host in hosts if host and str(host).strip()]
+
+
+def _normalise(host):
+    host = str(host).strip()
+    return host if host.endswith("/") else host + "/"
@@ -1,6 +1,6 @@
 import logging
 from .CustomFormatter import CustomFormatter
-import requests
+from .CommandDispatcher import CommandOutcome, completed_command, override_body
 from enum import Enum
 from strenum import StrEnum
 
@@ -18,6 +18,7 @@ class ItemAccessZone:
         status_text=None,
         commands={},
         api_key="",
+        dispatcher=None,
         zone_count=0,
     ):
         self.log = logging.getLogger("{0}-{1}".format(self.__class__.__name__, item_id))
@@ -40,8 +41,12 @@ class ItemAccessZone:
         self._commands = commands
 
         self._api_key = api_key
+        # Command dispatcher of the owning GallagherRest
+        self._dispatcher = dispatcher
 
         self._zone_count = zone_count
+        # Set once the server has reported a zone count in the status text
+        self._zone_count_known = False
 
         self._callbacks = []
 
@@ -106,6 +111,10 @@ class ItemAccessZone:
     def get_zone_count(self):
         return self._zone_count
 
+    def has_zone_count(self):
+        """returns True if the server has reported a zone count"""
+        return self._zone_count_known
+
     def handle_update(self, update):
         self.log.debug("Handling update")
         # print(update)
@@ -113,6 +122,7 @@ class ItemAccessZone:
             self._status_text = update["statusText"]
             if "Zone count:" in self._status_text:
                 self._zone_count = int(self._status_text.split("Zone count:")[1])
+                self._zone_count_known = True
                 # print("Zone Count: {}".format(self._zone_count))
 
         # print(update)
@@ -153,52 +163,62 @@ class ItemAccessZone:
             self._zone_count,
         )
 
-    def __do_command(self, command):
-        # self.log.info("Doing command {} ".format(command))
-        try:
-            if command not in self._commands.keys():
-                self.log.error(
-                    "`{0}` command not in items command list".format(command)
-                )
-                return False
+    def command(self, command, body=None, timeout=None, force=False):
+        """Queues a command for this item, returns a Future resolving to a CommandOutcome
 
-            if "href" not in self._commands[command].keys():
-                self.log.error(
-                    "href not is command instructions for command `{0}`".format(command)
-                )
+        Unless force is set, a command the item is already satisfying is not sent"""
+        if command not in self._commands.keys():
+            self.log.error("`{0}` command not in items command list".format(command))
+            return completed_command(CommandOutcome.FAILED)
 
-            self.log.debug(self._commands[command]["href"])
-            try:
-                req = requests.post(
-                    self._commands[command]["href"],
-                    verify=False,
-                    headers={"Authorization": self._api_key},
-                )
-                if req.status_code != 204:
-                    self.log.error(
-                        "Received status code {0} for command {1} - Command was not successful".format(
-                            req.status_code, command
-                        )
-                    )
-                    # self.log.error(req.)
-                    return False
-            except Exception as e:
-                self.log.error("Error during command `{0}`".format(command))
-                return False
-            return True
-
-        except Exception as e:
+        if "href" not in self._commands[command].keys():
             self.log.error(
-                "Unable to do command `{0}` due to expection".format(command)
+                "href not in command instructions for command `{0}`".format(command)
             )
-            self.log.error(e)
-            return False
+            return completed_command(CommandOutcome.FAILED)
+
+        if self._dispatcher is None:
+            self.log.error(
+                "No command dispatcher, unable to do command `{0}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        if not force and body is None and self.__is_satisfied(command):
+            return self._dispatcher.suppress(self._item_id, command)
+
+        self.log.debug(self._commands[command]["href"])
+        return self._dispatcher.submit(
+            self._item_id,
+            self.__class__.__name__,
+            command,
+            self._commands[command]["href"],
+            body=body,
+            timeout=timeout,
+        )
 
-    def set_secure(self, secure_type):
+    def __do_command(self, command, body=None, force=False):
+        return self.command(command, body, force=force)
+
+    def __is_satisfied(self, command):
+        """True if the command is already pending or the item is already in its state"""
+        pending = self._dispatcher.get_pending(self._item_id)
+        if pending is not None:
+            return pending == (command, None)
+        target = {
+            "free": AccessZoneState.FREE,
+            "secure": AccessZoneState.SECURE,
+            "dualAuth": AccessZoneState.DUAL_AUTHENTICATION,
+        }.get(command)
+        return target is not None and target == self._state
+
+    def set_secure(self, secure_type, force=False, duration=None):
+        """Overrides the zone mode, returns a Future resolving to a CommandOutcome
+
+        With duration set the override ends by itself after that many seconds"""
         try:
             secure_type = str(secure_type)
         except Exception:
-            return False
+            return completed_command(CommandOutcome.FAILED)
 
         allowed_commands = [
             "free",
@@ -220,8 +240,8 @@ class ItemAccessZone:
                     secure_type
                 )
             )
-            return False
-        return self.__do_command(secure_type)
+            return completed_command(CommandOutcome.FAILED)
+        return self.__do_command(secure_type, override_body(duration), force=force)
 
     def register_callback(self, function):
         self.log.debug("Adding callback function {0}".format(function.__name__))
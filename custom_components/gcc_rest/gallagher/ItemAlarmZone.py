@@ -1,7 +1,7 @@
 import logging
 from .CustomFormatter import CustomFormatter
+from .CommandDispatcher import CommandOutcome, completed_command
 from enum import Enum
-import requests
 
 
 class ItemAlarmZone:
@@ -17,6 +17,7 @@ class ItemAlarmZone:
         status_text=None,
         commands={},
         api_key="",
+        dispatcher=None,
     ):
         self.log = logging.getLogger("{}-{}".format(self.__class__.__name__, item_id))
         self.log.setLevel(logging.INFO)
@@ -38,6 +39,8 @@ class ItemAlarmZone:
         self._status_text = status_text
         self._commands = commands
         self._api_key = api_key
+        # Command dispatcher of the owning GallagherRest
+        self._dispatcher = dispatcher
 
         self._callbacks = []
 
@@ -177,54 +180,65 @@ class ItemAlarmZone:
             self._fence_state,
         )
 
-    def arm(self):
-        return self.__do_command("arm")
-
-    def disarm(self):
-        return self.__do_command("disarm")
-
-    def user_1_mode(self):
-        return self.__do_command("user1")
-
-    def user_2_mode(self):
-        return self.__do_command("arm")
-
-    def __do_command(self, command):
-        # self.log.info("Doing command".format(command))
-        try:
-            if command not in self._commands.keys():
-                self.log.error("`{}` command not in items command list".format(command))
-                return False
-
-            if "href" not in self._commands[command].keys():
-                self.log.error(
-                    "href not in command instructions for command `{}`".format(command)
-                )
-
-            self.log.debug(self._commands[command]["href"])
-            try:
-                req = requests.post(
-                    self._commands[command]["href"],
-                    verify=False,
-                    headers={"Authorization": self._api_key},
-                )
-                if req.status_code is not 204:
-                    self.log.error(
-                        "Received status code {} for command {} - Command was not successful".format(
-                            req.status_code, command
-                        )
-                    )
-                    # self.log.error(req.)
-                    return False
-            except Exception as e:
-                self.log.error("Error during command `{}`".format(command))
-                return False
-            return True
+    def arm(self, force=False):
+        return self.__do_command("arm", force=force)
+
+    def disarm(self, force=False):
+        return self.__do_command("disarm", force=force)
+
+    def user_1_mode(self, force=False):
+        return self.__do_command("user1", force=force)
+
+    def user_2_mode(self, force=False):
+        return self.__do_command("arm", force=force)
+
+    def command(self, command, body=None, timeout=None, force=False):
+        """Queues a command for this item, returns a Future resolving to a CommandOutcome
+
+        Unless force is set, a command the item is already satisfying is not sent"""
+        if command not in self._commands.keys():
+            self.log.error("`{}` command not in items command list".format(command))
+            return completed_command(CommandOutcome.FAILED)
+
+        if "href" not in self._commands[command].keys():
+            self.log.error(
+                "href not in command instructions for command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        if self._dispatcher is None:
+            self.log.error(
+                "No command dispatcher, unable to do command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        if not force and body is None and self.__is_satisfied(command):
+            return self._dispatcher.suppress(self._item_id, command)
+
+        self.log.debug(self._commands[command]["href"])
+        return self._dispatcher.submit(
+            self._item_id,
+            self.__class__.__name__,
+            command,
+            self._commands[command]["href"],
+            body=body,
+            timeout=timeout,
+        )
 
-        except Exception as e:
-            self.log.error("Unable to do command `{}` due to expection".format(command))
-            self.log.error(e)
-            return False
+    def __do_command(self, command, body=None, force=False):
+        return self.command(command, body, force=force)
+
+    def __is_satisfied(self, command):
+        """True if the command is already pending or the item is already in its state"""
+        pending = self._dispatcher.get_pending(self._item_id)
+        if pending is not None:
+            return pending == (command, None)
+        target = {
+            "arm": AlarmZoneState.ARMED,
+            "disarm": AlarmZoneState.DISARMED,
+            "user1": AlarmZoneState.USER_1,
+        }.get(command)
+        return target is not None and target == self._state
 
     def cancel_override(self):
         return self.__do_command("cancel")
@@ -1,6 +1,6 @@
 import logging
 from .CustomFormatter import CustomFormatter
-import requests
+from .CommandDispatcher import CommandOutcome, completed_command
 from enum import Enum
 
 
@@ -19,6 +19,7 @@ class ItemDoor:
         status_text=None,
         commands={},
         api_key="",
+        dispatcher=None,
     ):
         self.log = logging.getLogger("{}-{}".format(self.__class__.__name__, item_id))
         self.log.setLevel(logging.INFO)
@@ -40,6 +41,8 @@ class ItemDoor:
         self._commands = commands
 
         self._api_key = api_key
+        # Command dispatcher of the owning GallagherRest
+        self._dispatcher = dispatcher
 
         self._is_tampered = None
         self._is_forced = None
@@ -230,49 +233,45 @@ class ItemDoor:
             self._is_tampered,
         )
 
-    def __do_command(self, command):
-        # self.log.info("Doing command {}".format(command))
-        try:
-            if command not in self._commands.keys():
-                self.log.error("`{}` command not in items command list".format(command))
-                return False
-
-            if "href" not in self._commands[command].keys():
-                self.log.error(
-                    "href not is command instructions for command `{}`".format(command)
-                )
-
-            self.log.debug(self._commands[command]["href"])
-            try:
-                req = requests.post(
-                    self._commands[command]["href"],
-                    verify=False,
-                    headers={"Authorization": self._api_key},
-                )
-                if req.status_code is not 204:
-                    self.log.error(
-                        "Received status code {} for command {} - Command was not successful".format(
-                            req.status_code, command
-                        )
-                    )
-                    # self.log.error(req.)
-                    return False
-            except Exception as e:
-                self.log.error("Error during command `{}`".format(command))
-                return False
-            return True
+    def command(self, command, body=None, timeout=None, force=False):
+        """Queues a command for this item, returns a Future resolving to a CommandOutcome
+
+        Door commands are momentary, they are always sent and force has no effect"""
+        if command not in self._commands.keys():
+            self.log.error("`{}` command not in items command list".format(command))
+            return completed_command(CommandOutcome.FAILED)
+
+        if "href" not in self._commands[command].keys():
+            self.log.error(
+                "href not in command instructions for command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        if self._dispatcher is None:
+            self.log.error(
+                "No command dispatcher, unable to do command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        self.log.debug(self._commands[command]["href"])
+        return self._dispatcher.submit(
+            self._item_id,
+            self.__class__.__name__,
+            command,
+            self._commands[command]["href"],
+            body=body,
+            timeout=timeout,
+        )
 
-        except Exception as e:
-            self.log.error("Unable to do command `{}` due to expection".format(command))
-            self.log.error(e)
-            return False
+    def __do_command(self, command, body=None):
+        return self.command(command, body)
 
     def register_callback(self, function):
         self.log.debug("Adding callback function {}".format(function.__name__))
         self._callbacks.append(function)
 
     def open(self):
-        self.__do_command("open")
+        return self.__do_command("open")
 
 
 class DoorStatusFlags(Enum):
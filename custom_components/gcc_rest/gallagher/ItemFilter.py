@@ -0,0 +1,85 @@
+import re
+from fnmatch import translate
+
+# Item types rules can be limited to, by feature name
+ITEM_TYPES = [
+    "inputs",
+    "outputs",
+    "alarmZones",
+    "doors",
+    "accessZones",
+    "fenceZones",
+    "macros",
+]
+
+
+class ItemFilter:
+    """Include and exclude rules matched against item names
+
+    A rule is a glob such as `* PIR`, or a regular expression between slashes such as
+    `/^Gate \\d+$/`. Prefixing a rule with an item type, `inputs:* PIR`, limits it to
+    that type. Rules are separated by semicolons or new lines and are matched case
+    insensitively. All the rules of a type are compiled into one pattern up front, so
+    matching an item is a single regex search whatever the number of rules.
+
+    An item is loaded if it matches an include rule of its type, or there are none, and
+    it does not match an exclude rule of its type."""
+
+    def __init__(self, include="", exclude=""):
+        self._include = _compile_rules(include)
+        self._exclude = _compile_rules(exclude)
+
+    def is_empty(self):
+        return len(self._include) == 0 and len(self._exclude) == 0
+
+    def matches(self, item_type, name):
+        include = self._include.get(item_type)
+        if include is not None and include.search(name or "") is None:
+            return False
+        exclude = self._exclude.get(item_type)
+        if exclude is not None and exclude.search(name or "") is not None:
+            return False
+        return True
+
+
+def parse_rules(rules):
+    """Returns a list of (item type or None, regular expression) from a rules string
+
+    Raises ValueError for an invalid regular expression"""
+    parsed = []
+    for rule in re.split(r"[;\n]", rules or ""):
+        rule = rule.strip()
+        if rule == "":
+            continue
+
+        item_type = None
+        prefix, separator, pattern = rule.partition(":")
+        if separator != "" and prefix.strip() in ITEM_TYPES:
+            item_type = prefix.strip()
+            rule = pattern.strip()
+
+        if len(rule) > 1 and rule.startswith("/") and rule.endswith("/"):
+            expression = rule[1:-1]
+            try:
+                re.compile(expression)
+            except re.error as e:
+                raise ValueError("Invalid regular expression `{}` ({})".format(rule, e))
+        else:
+            # translate() only anchors the end, a glob matches the whole name
+            expression = r"\A" + translate(rule)
+        parsed.append((item_type, expression))
+    return parsed
+
+
+def _compile_rules(rules):
+    """Returns item type -> one compiled pattern matching any of its rules"""
+    expressions = {item_type: [] for item_type in ITEM_TYPES}
+    for item_type, expression in parse_rules(rules):
+        for target in [item_type] if item_type is not None else ITEM_TYPES:
+            expressions[target].append("(?:{})".format(expression))
+
+    return {
+        item_type: re.compile("|".join(parts), re.IGNORECASE)
+        for item_type, parts in expressions.items()
+        if len(parts) > 0
+    }
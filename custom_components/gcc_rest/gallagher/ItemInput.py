@@ -1,7 +1,7 @@
 import traceback
 import logging
 from .CustomFormatter import CustomFormatter
-import requests
+from .CommandDispatcher import CommandOutcome, completed_command
 
 
 class ItemInput:
@@ -17,6 +17,7 @@ class ItemInput:
         status_text=None,
         commands={},
         api_key="",
+        dispatcher=None,
     ):
         self.log = logging.getLogger("{}-{}".format(self.__class__.__name__, item_id))
         self.log.setLevel(logging.INFO)
@@ -38,6 +39,8 @@ class ItemInput:
         self._commands = commands
 
         self._api_key = api_key
+        # Command dispatcher of the owning GallagherRest
+        self._dispatcher = dispatcher
 
         self._is_isolated = None
         self._is_shunted = None
@@ -188,54 +191,61 @@ class ItemInput:
             self._is_tampered,
         )
 
-    def __do_command(self, command):
-        self.log.info("Doing command".format(command))
-        try:
-            if command not in self._commands.keys():
-                self.log.error("`{}` command not in items command list".format(command))
-                return False
-
-            if "href" not in self._commands[command].keys():
-                self.log.error(
-                    "href not is command instructions for command `{}`".format(command)
-                )
-
-            self.log.debug(self._commands[command]["href"])
-            try:
-                req = requests.post(
-                    self._commands[command]["href"],
-                    verify=False,
-                    headers={"Authorization": self._api_key},
-                )
-                if req.status_code != 204:
-                    self.log.error(
-                        "Received status code {} for command {} - Command was not successful".format(
-                            req.status_code, command
-                        )
-                    )
-                    # self.log.error(req.)
-                    return False
-            except Exception as e:
-                self.log.error("Error during command `{}`".format(command))
-                return False
-            return True
+    def command(self, command, body=None, timeout=None, force=False):
+        """Queues a command for this item, returns a Future resolving to a CommandOutcome
+
+        Unless force is set, a command the item is already satisfying is not sent"""
+        if command not in self._commands.keys():
+            self.log.error("`{}` command not in items command list".format(command))
+            return completed_command(CommandOutcome.FAILED)
+
+        if "href" not in self._commands[command].keys():
+            self.log.error(
+                "href not in command instructions for command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        if self._dispatcher is None:
+            self.log.error(
+                "No command dispatcher, unable to do command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        if not force and body is None and self.__is_satisfied(command):
+            return self._dispatcher.suppress(self._item_id, command)
+
+        self.log.debug(self._commands[command]["href"])
+        return self._dispatcher.submit(
+            self._item_id,
+            self.__class__.__name__,
+            command,
+            self._commands[command]["href"],
+            body=body,
+            timeout=timeout,
+        )
+
+    def __do_command(self, command, body=None, force=False):
+        return self.command(command, body, force=force)
 
-        except Exception as e:
-            self.log.error("Unable to do command `{}` due to expection".format(command))
-            self.log.error(e)
-            return False
+    def __is_satisfied(self, command):
+        """True if the command is already pending or the item is already in its state"""
+        pending = self._dispatcher.get_pending(self._item_id)
+        if pending is not None:
+            return pending == (command, None)
+        target = {"isolate": True, "deisolate": False}.get(command)
+        return target is not None and target == self._is_isolated
 
-    def isolate(self):
-        self.__do_command("isolate")
+    def isolate(self, force=False):
+        return self.__do_command("isolate", force=force)
 
-    def deisolate(self):
-        self.__do_command("deisolate")
+    def deisolate(self, force=False):
+        return self.__do_command("deisolate", force=force)
 
     def shunt(self):
-        self.__do_command("shunt")
+        return self.__do_command("shunt")
 
     def unshunt(self):
-        self.__do_command("unshunt")
+        return self.__do_command("unshunt")
 
     def register_callback(self, function):
         self.log.debug("Adding callback function {}".format(function.__name__))
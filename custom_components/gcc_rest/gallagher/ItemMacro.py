@@ -0,0 +1,112 @@
+import logging
+from .CustomFormatter import CustomFormatter
+from .CommandDispatcher import CommandOutcome, completed_command
+
+
+class ItemMacro:
+    """A Command Centre macro, runs its actions server side from a single command
+
+    Macros have no status, they are not part of the item subscription"""
+
+    def __init__(
+        self,
+        item_id,
+        name="UNKNOWN",
+        description="UNKNOWN",
+        state=None,
+        division=None,
+        controller=None,
+        commands=dict(),
+        api_key="",
+        dispatcher=None,
+    ):
+        self.log = logging.getLogger("{}-{}".format(self.__class__.__name__, item_id))
+        self.log.setLevel(logging.INFO)
+        ch = logging.StreamHandler()
+        ch.setLevel(logging.INFO)
+        ch.setFormatter(CustomFormatter())
+        self.log.addHandler(ch)
+
+        self._item_id = item_id
+        self._name = name
+        self._description = description
+        self._division = division
+        self._controller = controller
+        self._commands = commands
+        self._api_key = api_key
+        # Command dispatcher of the owning GallagherRest
+        self._dispatcher = dispatcher
+
+    def get_item_id(self):
+        return self._item_id
+
+    def get_name(self):
+        return self._name
+
+    def get_description(self):
+        return self._description
+
+    def get_division(self):
+        return self._division
+
+    def get_controller(self):
+        return self._controller
+
+    def get_commands(self):
+        return self._commands
+
+    def get_command(self, command_name):
+        if command_name in self._commands.keys():
+            return self._commands[command_name]
+        return None
+
+    def set_command(self, command_name, command_url):
+        self._commands[command_name] = command_url
+        return True
+
+    def __str__(self):
+        return "{} ID:{}, Name:{}".format(
+            self.__class__.__name__, self._item_id, self._name
+        )
+
+    def run(self, timeout=None):
+        """Runs the macro, returns a Future resolving to a CommandOutcome"""
+        return self.command("run", timeout=timeout)
+
+    def command(self, command, body=None, timeout=None, force=False):
+        """Queues a command for this item, returns a Future resolving to a CommandOutcome
+
+        Macros have no state to compare against, so their commands are never suppressed"""
+        if command not in self._commands.keys():
+            self.log.error("`{}` command not in items command list".format(command))
+            return completed_command(CommandOutcome.FAILED)
+
+        if "href" not in self._commands[command].keys():
+            self.log.error(
+                "href not in command instructions for command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        if self._dispatcher is None:
+            self.log.error(
+                "No command dispatcher, unable to do command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        self.log.debug(self._commands[command]["href"])
+        return self._dispatcher.submit(
+            self._item_id,
+            self.__class__.__name__,
+            command,
+            self._commands[command]["href"],
+            body=body,
+            timeout=timeout,
+        )
+
+    def get_status(self):
+        return {
+            "gallagher_id": self._item_id,
+            "name": self._name,
+            "description": self._description,
+            "division": self._division,
+        }
@@ -1,7 +1,7 @@
 import logging
 from .CustomFormatter import CustomFormatter
+from .CommandDispatcher import CommandOutcome, completed_command, override_body
 from enum import Enum
-import requests
 
 
 class ItemOutput:
@@ -17,6 +17,7 @@ class ItemOutput:
         status_text=None,
         commands=dict(),
         api_key="",
+        dispatcher=None,
     ):
         self.log = logging.getLogger("{}-{}".format(self.__class__.__name__, item_id))
         self.log.setLevel(logging.INFO)
@@ -37,6 +38,8 @@ class ItemOutput:
         self._status_text = status_text
         self._commands = commands
         self._api_key = api_key
+        # Command dispatcher of the owning GallagherRest
+        self._dispatcher = dispatcher
 
         self._callbacks = []
 
@@ -145,51 +148,60 @@ class ItemOutput:
             self.__class__.__name__, self._item_id, self._state, self._status_text
         )
 
-    def on(self):
-        return self.__do_command("on")
+    def on(self, force=False, duration=None):
+        """Overrides the output on, for duration seconds if set"""
+        return self.__do_command("on", override_body(duration), force=force)
 
-    def off(self):
-        return self.__do_command("off")
+    def off(self, force=False, duration=None):
+        """Overrides the output off, for duration seconds if set"""
+        return self.__do_command("off", override_body(duration), force=force)
 
     def cancel_override(self):
         return self.__do_command("cancel")
 
-    def __do_command(self, command):
-        # self.log.info("Doing command".format(command))
-        try:
-            if command not in self._commands.keys():
-                self.log.error("`{}` command not in items command list".format(command))
-                return False
-
-            if "href" not in self._commands[command].keys():
-                self.log.error(
-                    "href not is command instructions for command `{}`".format(command)
-                )
-
-            self.log.debug(self._commands[command]["href"])
-            try:
-                req = requests.post(
-                    self._commands[command]["href"],
-                    verify=False,
-                    headers={"Authorization": self._api_key},
-                )
-                if req.status_code is not 204:
-                    self.log.error(
-                        "Received status code {} for command {} - Command was not successful".format(
-                            req.status_code, command
-                        )
-                    )
-                    # self.log.error(req.)
-                    return False
-            except Exception:
-                self.log.error("Error during command `{}`".format(command))
-                return False
-            return True
+    def command(self, command, body=None, timeout=None, force=False):
+        """Queues a command for this item, returns a Future resolving to a CommandOutcome
+
+        Unless force is set, a command the item is already satisfying is not sent"""
+        if command not in self._commands.keys():
+            self.log.error("`{}` command not in items command list".format(command))
+            return completed_command(CommandOutcome.FAILED)
+
+        if "href" not in self._commands[command].keys():
+            self.log.error(
+                "href not in command instructions for command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        if self._dispatcher is None:
+            self.log.error(
+                "No command dispatcher, unable to do command `{}`".format(command)
+            )
+            return completed_command(CommandOutcome.FAILED)
+
+        if not force and body is None and self.__is_satisfied(command):
+            return self._dispatcher.suppress(self._item_id, command)
+
+        self.log.debug(self._commands[command]["href"])
+        return self._dispatcher.submit(
+            self._item_id,
+            self.__class__.__name__,
+            command,
+            self._commands[command]["href"],
+            body=body,
+            timeout=timeout,
+        )
+
+    def __do_command(self, command, body=None, force=False):
+        return self.command(command, body, force=force)
 
-        except Exception as e:
-            self.log.error("Unable to do command `{}` due to expection".format(command))
-            self.log.error(e)
-            return False
+    def __is_satisfied(self, command):
+        """True if the command is already pending or the item is already in its state"""
+        pending = self._dispatcher.get_pending(self._item_id)
+        if pending is not None:
+            return pending == (command, None)
+        target = {"on": True, "off": False}.get(command)
+        return target is not None and target == self._state
 
     def get_status(self):
         return {
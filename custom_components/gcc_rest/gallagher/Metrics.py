@@ -0,0 +1,112 @@
+import time
+from collections import deque
+from threading import Lock
+
+
+class Metrics:
+    """Thread safe counters, gauges and timing percentiles for a GallagherRest instance"""
+
+    def __init__(self, timing_samples=500):
+        self._lock = Lock()
+        self._timing_samples = timing_samples
+
+        self._counters = {}
+        self._gauges = {}
+        self._timings = {}
+        self._last_seen = {}
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+            self._last_seen[name] = time.time()
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def record_timing(self, name, seconds):
+        """Adds a duration sample, only the most recent samples are kept per name"""
+        with self._lock:
+            if name not in self._timings:
+                self._timings[name] = _Timing(self._timing_samples)
+            self._timings[name].add(seconds)
+
+    def get_counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def get_gauge(self, name):
+        with self._lock:
+            return self._gauges.get(name)
+
+    def get_timing(self, name):
+        with self._lock:
+            if name not in self._timings:
+                return None
+            return self._timings[name].summary()
+
+    def get_timings(self, name):
+        """Returns the summaries of a timing and its breakdown, `name.*`, by name"""
+        prefix = name + "."
+        with self._lock:
+            return {
+                timing_name: timing.summary()
+                for timing_name, timing in self._timings.items()
+                if timing_name == name or timing_name.startswith(prefix)
+            }
+
+    def get_value(self, name):
+        """Returns a counter or gauge by name, None if it has not been recorded"""
+        with self._lock:
+            if name in self._counters:
+                return self._counters[name]
+            return self._gauges.get(name)
+
+    def get_last_seen(self, name):
+        """Returns the unix time a counter was last incremented"""
+        with self._lock:
+            return self._last_seen.get(name)
+
+    def snapshot(self):
+        """Returns every metric as a dict"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": {
+                    name: timing.summary() for name, timing in self._timings.items()
+                },
+            }
+
+
+class _Timing:
+    def __init__(self, samples):
+        self._samples = deque(maxlen=samples)
+        self._count = 0
+        # Percentiles are only sorted again once a sample has been added
+        self._summary = None
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+        self._count += 1
+        self._summary = None
+
+    def summary(self):
+        if self._summary is None:
+            ordered = sorted(self._samples)
+            self._summary = {
+                "count": self._count,
+                "p50_ms": percentile_ms(ordered, 50),
+                "p95_ms": percentile_ms(ordered, 95),
+                "p99_ms": percentile_ms(ordered, 99),
+                "max_ms": percentile_ms(ordered, 100),
+            }
+        return dict(self._summary)
+
+
+def percentile_ms(ordered, percentile):
+    """Returns the percentile of an ordered list of seconds, in milliseconds"""
+    if len(ordered) == 0:
+        return None
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 1)
@@ -0,0 +1,132 @@
+from collections import deque
+from threading import Lock
+
+# Recently applied event ids kept to ignore events replayed after a restart
+SEEN_EVENTS = 1000
+
+
+class OccupancyEngine:
+    """Keeps access zone occupancy counts from access events
+
+    Each event that moves a cardholder between zones decrements the zone they left and
+    increments the zone they entered, in constant time. The last known zone of every
+    cardholder is kept, so an event without an exit zone still leaves the right zone.
+    Counts are corrected with reconcile() against the zone counts Command Centre reports."""
+
+    def __init__(self, zone_ids=None, metrics=None, on_change=None):
+        self._lock = Lock()
+        self._metrics = metrics
+        self._on_change = on_change
+
+        # zone id -> occupancy, None tracks every zone seen in events
+        self._zone_ids = None if zone_ids is None else set(str(z) for z in zone_ids)
+        self._counts = {}
+        # cardholder id -> zone id they were last seen entering
+        self._locations = {}
+
+        self._seen_ids = set()
+        self._seen_order = deque()
+
+    def get_count(self, zone_id):
+        with self._lock:
+            return self._counts.get(str(zone_id), 0)
+
+    def get_counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def get_cardholder_zone(self, cardholder_id):
+        with self._lock:
+            return self._locations.get(str(cardholder_id))
+
+    def handle_events(self, events):
+        """Applies a batch of Command Centre events, returns the ids of zones that changed"""
+        changed = set()
+        movements = 0
+        duplicates = 0
+
+        with self._lock:
+            for event in events:
+                entry_zone = _ref_id(event, "entryAccessZone")
+                exit_zone = _ref_id(event, "exitAccessZone")
+                if entry_zone is None and exit_zone is None:
+                    continue
+
+                if self.__seen(event.get("id")):
+                    duplicates += 1
+                    continue
+
+                cardholder = _ref_id(event, "cardholder")
+                if exit_zone is None and cardholder is not None:
+                    exit_zone = self._locations.get(cardholder)
+                if exit_zone == entry_zone:
+                    continue
+
+                if exit_zone is not None and self.__tracked(exit_zone):
+                    self._counts[exit_zone] = max(0, self._counts.get(exit_zone, 0) - 1)
+                    changed.add(exit_zone)
+                if entry_zone is not None and self.__tracked(entry_zone):
+                    self._counts[entry_zone] = self._counts.get(entry_zone, 0) + 1
+                    changed.add(entry_zone)
+
+                if cardholder is not None:
+                    if entry_zone is None:
+                        self._locations.pop(cardholder, None)
+                    else:
+                        self._locations[cardholder] = entry_zone
+                movements += 1
+
+        self.__count("occupancy.movements", movements)
+        self.__count("occupancy.duplicates", duplicates)
+        if len(changed) > 0 and self._on_change is not None:
+            self._on_change(changed)
+        return changed
+
+    def reconcile(self, zone_counts):
+        """Corrects the counts from a dict of zone id -> count reported by Command Centre
+
+        Returns the ids of zones whose count was corrected"""
+        changed = set()
+        drift = 0
+        with self._lock:
+            for zone_id, count in zone_counts.items():
+                zone_id = str(zone_id)
+                if count is None or not self.__tracked(zone_id):
+                    continue
+                current = self._counts.get(zone_id, 0)
+                if current != count:
+                    drift += abs(current - count)
+                    self._counts[zone_id] = count
+                    changed.add(zone_id)
+
+        self.__count("occupancy.reconciles")
+        self.__count("occupancy.corrections", len(changed))
+        self.__count("occupancy.drift", drift)
+        if len(changed) > 0 and self._on_change is not None:
+            self._on_change(changed)
+        return changed
+
+    def __tracked(self, zone_id):
+        return self._zone_ids is None or zone_id in self._zone_ids
+
+    def __seen(self, event_id):
+        if event_id is None:
+            return False
+        if event_id in self._seen_ids:
+            return True
+        self._seen_ids.add(event_id)
+        self._seen_order.append(event_id)
+        if len(self._seen_order) > SEEN_EVENTS:
+            self._seen_ids.discard(self._seen_order.popleft())
+        return False
+
+    def __count(self, name, amount=1):
+        if self._metrics is not None and amount > 0:
+            self._metrics.increment(name, amount)
+
+
+def _ref_id(event, key):
+    value = event.get(key)
+    if isinstance(value, dict) and value.get("id") is not None:
+        return str(value["id"])
+    return None
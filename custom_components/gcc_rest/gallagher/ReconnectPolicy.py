@@ -0,0 +1,158 @@
+import random
+import time
+from enum import Enum
+from threading import Lock
+
+import requests
+
+
+class ReconnectPolicy:
+    """Exponential back off with jitter and a circuit breaker for the subscription path
+
+    Consecutive failures grow the back off delay, once failure_threshold is reached the
+    circuit opens and no full subscription is attempted until the cool down has passed.
+    The first attempt after the cool down is a half-open probe, a cheap request that
+    must succeed before the full subscription is posted again."""
+
+    def __init__(
+        self,
+        base_delay=1,
+        max_delay=300,
+        failure_threshold=5,
+        auth_open_duration=600,
+        metrics=None,
+    ):
+        self._lock = Lock()
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._failure_threshold = failure_threshold
+        self._auth_open_duration = auth_open_duration
+        self._metrics = metrics
+
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._open_until = 0
+        self._last_failure_type = None
+        self._last_delay = 0
+
+        self.__publish()
+
+    def get_state(self):
+        return self._state
+
+    def get_consecutive_failures(self):
+        return self._consecutive_failures
+
+    def is_healthy(self):
+        return self._state is CircuitState.CLOSED and self._consecutive_failures == 0
+
+    def before_attempt(self):
+        """Called before reconnecting, returns True if the attempt must start with a probe"""
+        with self._lock:
+            if self._state is CircuitState.CLOSED:
+                return False
+
+            if self._state is CircuitState.OPEN:
+                self._state = CircuitState.HALF_OPEN
+                if self._metrics is not None:
+                    self._metrics.increment("subscription.circuit_probes")
+            self.__publish()
+            return True
+
+    def time_until_attempt(self):
+        """Seconds until the circuit allows the next attempt"""
+        if self._state is not CircuitState.OPEN:
+            return 0
+        return max(0, self._open_until - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            if self._state is CircuitState.CLOSED and self._consecutive_failures == 0:
+                return
+            self._state = CircuitState.CLOSED
+            self._consecutive_failures = 0
+            self._last_delay = 0
+            self._last_failure_type = None
+            self.__publish()
+
+    def record_failure(self, failure_type):
+        """Records a failed attempt, returns the seconds to wait before the next attempt"""
+        with self._lock:
+            self._consecutive_failures += 1
+            self._last_failure_type = failure_type
+
+            if failure_type is FailureType.AUTH:
+                # Retrying will not fix a rejected API key, check back rarely
+                delay = self._auth_open_duration
+                self.__open(delay)
+            else:
+                ceiling = min(
+                    self._max_delay,
+                    self._base_delay * (2 ** min(self._consecutive_failures - 1, 16)),
+                )
+                # Equal jitter, so clients recovering together do not reconnect together
+                delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+
+                if (
+                    self._state is CircuitState.HALF_OPEN
+                    or self._consecutive_failures >= self._failure_threshold
+                ):
+                    self.__open(delay)
+
+            self._last_delay = round(delay, 2)
+
+            if self._metrics is not None:
+                self._metrics.increment(
+                    "subscription.failures.{}".format(failure_type.value)
+                )
+            self.__publish()
+            return delay
+
+    def __open(self, duration):
+        if self._state is not CircuitState.OPEN and self._metrics is not None:
+            self._metrics.increment("subscription.circuit_opened")
+        self._state = CircuitState.OPEN
+        self._open_until = time.monotonic() + duration
+
+    def __publish(self):
+        if self._metrics is None:
+            return
+        self._metrics.set_gauge("subscription.circuit_state", self._state.value)
+        self._metrics.set_gauge(
+            "subscription.consecutive_failures", self._consecutive_failures
+        )
+        self._metrics.set_gauge("subscription.backoff_delay", self._last_delay)
+        self._metrics.set_gauge(
+            "subscription.last_failure_type",
+            None if self._last_failure_type is None else self._last_failure_type.value,
+        )
+
+
+def classify_failure(exception=None, status_code=None):
+    """Maps a failed request to a FailureType"""
+    if status_code is None and exception is not None:
+        status_code = getattr(exception, "status_code", None)
+
+    if status_code in (401, 403):
+        return FailureType.AUTH
+    if status_code is not None:
+        return FailureType.SERVER
+    if isinstance(
+        exception,
+        (requests.exceptions.ConnectionError, requests.exceptions.Timeout, OSError),
+    ):
+        return FailureType.NETWORK
+    return FailureType.PROTOCOL
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class FailureType(Enum):
+    NETWORK = "network"
+    AUTH = "auth"
+    SERVER = "server"
+    PROTOCOL = "protocol"
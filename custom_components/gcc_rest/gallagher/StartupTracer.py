@@ -0,0 +1,176 @@
+import logging
+import time
+from threading import Lock
+
+from .CustomFormatter import CustomFormatter
+from .Metrics import percentile_ms
+
+
+class StartupTracer:
+    """Records a timed span, with HTTP usage, for each startup phase"""
+
+    def __init__(self):
+        self.log = logging.getLogger("StartupTracer")
+        self.log.setLevel(logging.INFO)
+        if not self.log.handlers:
+            ch = logging.StreamHandler()
+            ch.setLevel(logging.INFO)
+            ch.setFormatter(CustomFormatter())
+            self.log.addHandler(ch)
+
+        self._lock = Lock()
+        self._started = time.monotonic()
+        self._finished = None
+
+        self._spans = []
+        self._http_requests = 0
+        self._http_bytes = 0
+
+        # item id -> seconds from trace start to the first state being applied
+        self._first_state = {}
+        # item id -> seconds from trace start to its entities showing a state, restored
+        # or live
+        self._first_meaningful_state = {}
+        self._restored = 0
+
+    def span(self, name):
+        """Returns a context manager timing the enclosed phase"""
+        return _Span(self, name)
+
+    def record_response(self, response, *args, **kwargs):
+        """requests response hook, counts every HTTP exchange made during startup"""
+        if self._finished is not None:
+            return
+
+        try:
+            size = len(response.content or b"")
+        except Exception:
+            size = 0
+
+        with self._lock:
+            self._http_requests += 1
+            self._http_bytes += size
+
+    def mark_first_state(self, item_id):
+        """Records the time to first state for an item, later calls are ignored"""
+        if item_id in self._first_state:
+            return
+        with self._lock:
+            self._first_state.setdefault(item_id, time.monotonic() - self._started)
+
+    def has_first_state(self, item_id):
+        return item_id in self._first_state
+
+    def mark_first_meaningful_state(self, item_id, restored=False):
+        """Records the time until an item is shown with a state, restored or live
+
+        Returns the seconds since the trace started, None if already recorded"""
+        with self._lock:
+            if item_id in self._first_meaningful_state:
+                return None
+            elapsed = time.monotonic() - self._started
+            self._first_meaningful_state[item_id] = elapsed
+            if restored:
+                self._restored += 1
+            return elapsed
+
+    def get_http_counters(self):
+        with self._lock:
+            return self._http_requests, self._http_bytes
+
+    def add_span(self, name, started, ended, http_requests, http_bytes):
+        with self._lock:
+            self._spans.append(
+                {
+                    "name": name,
+                    "start_ms": round((started - self._started) * 1000, 1),
+                    "duration_ms": round((ended - started) * 1000, 1),
+                    "http_requests": http_requests,
+                    "http_bytes": http_bytes,
+                }
+            )
+
+    def finish(self):
+        """Closes the trace and logs the summary"""
+        self._finished = time.monotonic()
+        summary = self.get_summary()
+
+        self.log.info(
+            "Startup completed in {} ms, {} HTTP requests, {} bytes".format(
+                summary["total_ms"], summary["http_requests"], summary["http_bytes"]
+            )
+        )
+        for span in summary["spans"]:
+            self.log.info(
+                "  {name}: {duration_ms} ms, {http_requests} requests, {http_bytes} bytes".format(
+                    **span
+                )
+            )
+        first_state = summary["first_state"]
+        self.log.info(
+            "  first state: {} items, p50 {} ms, p95 {} ms, max {} ms".format(
+                first_state["items"],
+                first_state["p50_ms"],
+                first_state["p95_ms"],
+                first_state["max_ms"],
+            )
+        )
+        return summary
+
+    def get_summary(self):
+        """Returns the trace as a dict"""
+        ended = self._finished if self._finished is not None else time.monotonic()
+
+        with self._lock:
+            spans = [dict(span) for span in self._spans]
+            http_requests = self._http_requests
+            http_bytes = self._http_bytes
+            first_state = sorted(self._first_state.values())
+            first_meaningful_state = sorted(self._first_meaningful_state.values())
+            restored = self._restored
+
+        return {
+            "complete": self._finished is not None,
+            "total_ms": round((ended - self._started) * 1000, 1),
+            "http_requests": http_requests,
+            "http_bytes": http_bytes,
+            "spans": spans,
+            "first_state": {
+                "items": len(first_state),
+                "p50_ms": percentile_ms(first_state, 50),
+                "p95_ms": percentile_ms(first_state, 95),
+                "max_ms": percentile_ms(first_state, 100),
+            },
+            "first_meaningful_state": {
+                "items": len(first_meaningful_state),
+                "restored": restored,
+                "p50_ms": percentile_ms(first_meaningful_state, 50),
+                "p95_ms": percentile_ms(first_meaningful_state, 95),
+                "max_ms": percentile_ms(first_meaningful_state, 100),
+            },
+        }
+
+
+class _Span:
+    def __init__(self, tracer, name):
+        self._tracer = tracer
+        self._name = name
+        self._started = None
+        self._http = None
+
+    def __enter__(self):
+        self._started = time.monotonic()
+        self._http = self._tracer.get_http_counters()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        http_requests, http_bytes = self._tracer.get_http_counters()
+        self._tracer.add_span(
+            self._name,
+            self._started,
+            time.monotonic(),
+            http_requests - self._http[0],
+            http_bytes - self._http[1],
+        )
+        return False
+
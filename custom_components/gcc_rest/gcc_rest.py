@@ -1,9 +1,15 @@
 """The Gallagher Command Centre Integration integration."""
 from __future__ import annotations
 
+from datetime import timedelta
+from functools import partial
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
 
 from .const import (
     DOMAIN,
@@ -16,13 +22,59 @@ from .const import (
     CONF_USE_ACCESS_ZONES,
     CONF_USE_DOORS,
     CONF_USE_FENCE_ZONES,
+    CONF_USE_MACROS,
+    CONF_DIVISIONS,
+    CONF_CONTROLLERS,
+    CONF_ITEM_INCLUDE,
+    CONF_ITEM_EXCLUDE,
+    CONF_RESCAN_INTERVAL,
+    CONF_READY_TIMEOUT,
+    CONF_STALL_THRESHOLD,
+    CONF_COMMAND_CONCURRENCY,
+    CONF_COMMAND_TIMEOUT,
+    CONF_USE_EVENTS,
+    CONF_EVENT_REF,
+    CONF_EVENT_BUFFER_SIZE,
+    CONF_CARDHOLDER_CACHE_SIZE,
+    CONF_CARDHOLDER_CACHE_TTL,
+    CONF_USE_ALARMS,
+    SIGNAL_ALARMS_UPDATED,
+    CONF_USE_OCCUPANCY,
+    CONF_OCCUPANCY_RECONCILE_INTERVAL,
+    SIGNAL_OCCUPANCY_UPDATED,
+    SIGNAL_CONTROLLER_UPDATED,
+    DEFAULT_DIVISIONS,
+    DEFAULT_CONTROLLERS,
+    DEFAULT_ITEM_INCLUDE,
+    DEFAULT_ITEM_EXCLUDE,
+    DEFAULT_RESCAN_INTERVAL,
+    DEFAULT_READY_TIMEOUT,
+    DEFAULT_STALL_THRESHOLD,
+    DEFAULT_COMMAND_CONCURRENCY,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_USE_EVENTS,
+    DEFAULT_EVENT_BUFFER_SIZE,
+    DEFAULT_CARDHOLDER_CACHE_SIZE,
+    DEFAULT_CARDHOLDER_CACHE_TTL,
+    DEFAULT_USE_ALARMS,
+    DEFAULT_USE_OCCUPANCY,
+    DEFAULT_OCCUPANCY_RECONCILE_INTERVAL,
 )
 
 from .gallagher.GallagherRest import GallagherRest
+from .gallagher.StartupTracer import StartupTracer
+from .gallagher.ItemFilter import ItemFilter
+from .services import async_setup_services
+from .event_stream import GCCEventBridge, parse_id_list
+from .discovery import (
+    async_rescan,
+    async_setup_feature_listener,
+    item_id_from_unique_id,
+)
+from .engine import GCCEngineRegistry, get_standby_hosts
 
 
 import logging
-import time
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,6 +85,7 @@ PLATFORMS: list[Platform] = [
     Platform.ALARM_CONTROL_PANEL,
     Platform.LOCK,
     Platform.COVER,
+    Platform.BUTTON,
     # Platform.SELECT,
     Platform.SENSOR,
 ]
@@ -46,11 +99,259 @@ async def async_gcc_rest_setup(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     else:
         _LOGGER.debug("hass.data[DOMAIN] found")
 
-    hass.data[DOMAIN][entry.entry_id] = storage = {}
     _LOGGER.info("Loading API module")
 
-    await hass.async_add_executor_job(load_api, storage, entry)
+    tracer = StartupTracer()
+
+    registry = GCCEngineRegistry.get(hass)
+    storage = {}
+    with tracer.span("load_api"):
+        await hass.async_add_executor_job(load_api, storage, entry, tracer, registry)
     gallagher: GallagherRest = storage[CONF_API_REF]
+    # Only stored once loaded, services expect every stored entry to have an engine
+    hass.data[DOMAIN][entry.entry_id] = storage
+
+    try:
+        await _async_start_entry(hass, entry, storage, tracer, gallagher)
+    except Exception:
+        # Nothing is left running for a reload to attach to
+        _LOGGER.error(
+            "Setting up entry {} failed, stopping its engine".format(entry.entry_id)
+        )
+        bridge = storage.get(CONF_EVENT_REF)
+        if bridge is not None:
+            await bridge.async_stop()
+        await hass.async_add_executor_job(gallagher.stop)
+        await hass.async_add_executor_job(registry.release, entry)
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+        raise
+
+    return True
+
+
+async def _async_start_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    storage,
+    tracer: StartupTracer,
+    gallagher: GallagherRest,
+) -> None:
+    """Starts the engine of an entry and sets up its platforms"""
+    with tracer.span("select_items"):
+        set_selected_items(gallagher, entry)
+        async_setup_subscription_membership(hass, entry, gallagher)
+        async_setup_feature_listener(hass, entry, gallagher)
+        async_setup_controller_listener(hass, entry, gallagher)
+
+    gallagher.set_stall_threshold(
+        entry.options.get(CONF_STALL_THRESHOLD, DEFAULT_STALL_THRESHOLD)
+    )
+
+    with tracer.span("start"):
+        started = await hass.async_add_executor_job(gallagher.start)
+
+    if started:
+        ready_timeout = entry.options.get(CONF_READY_TIMEOUT, DEFAULT_READY_TIMEOUT)
+        with tracer.span("wait_for_first_update"):
+            ready = await hass.async_add_executor_job(
+                gallagher.wait_until_ready, ready_timeout
+            )
+        if not ready:
+            _LOGGER.warning(
+                "No subscription snapshot received within {} seconds, entities will update once it arrives".format(
+                    ready_timeout
+                )
+            )
+
+    if entry.options.get(CONF_USE_OCCUPANCY, DEFAULT_USE_OCCUPANCY):
+        with tracer.span("start_occupancy"):
+            await async_setup_occupancy(hass, entry, gallagher)
+
+    if entry.options.get(CONF_USE_EVENTS, DEFAULT_USE_EVENTS):
+        with tracer.span("start_events"):
+            buffer_size = entry.options.get(
+                CONF_EVENT_BUFFER_SIZE, DEFAULT_EVENT_BUFFER_SIZE
+            )
+            if buffer_size > 0:
+                gallagher.enable_event_buffer(buffer_size)
+            cache_size = entry.options.get(
+                CONF_CARDHOLDER_CACHE_SIZE, DEFAULT_CARDHOLDER_CACHE_SIZE
+            )
+            if cache_size > 0:
+                gallagher.enable_cardholder_cache(
+                    cache_size,
+                    entry.options.get(
+                        CONF_CARDHOLDER_CACHE_TTL, DEFAULT_CARDHOLDER_CACHE_TTL
+                    ),
+                )
+            bridge = GCCEventBridge(hass, entry, gallagher)
+            if await bridge.async_start():
+                storage[CONF_EVENT_REF] = bridge
+
+    if entry.options.get(CONF_USE_ALARMS, DEFAULT_USE_ALARMS):
+        with tracer.span("start_alarms"):
+            await hass.async_add_executor_job(
+                gallagher.start_alarm_tracker,
+                partial(
+                    dispatcher_send,
+                    hass,
+                    SIGNAL_ALARMS_UPDATED.format(entry.entry_id),
+                ),
+            )
+
+    with tracer.span("forward_platforms"):
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    tracer.finish()
+
+    async_setup_services(hass)
+
+    rescan_interval = entry.options.get(CONF_RESCAN_INTERVAL, DEFAULT_RESCAN_INTERVAL)
+    if rescan_interval > 0:
+
+        async def async_periodic_rescan(_now=None):
+            await async_rescan(hass, entry)
+
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass, async_periodic_rescan, timedelta(seconds=rescan_interval)
+            )
+        )
+
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change"""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+@callback
+def async_setup_subscription_membership(
+    hass: HomeAssistant, entry: ConfigEntry, gallagher: GallagherRest
+):
+    """Leaves items whose entities are all disabled out of the subscription
+
+    Enabling or disabling an entity adds its item to or drops it from the running
+    subscription straight away, without a restart of the integration."""
+    registry = er.async_get(hass)
+
+    def item_entries(item_id=None):
+        """Returns item id -> registry entries of the item entities"""
+        items = {}
+        for entity in er.async_entries_for_config_entry(registry, entry.entry_id):
+            entity_item_id = item_id_from_unique_id(entry, entity.unique_id)
+            if entity_item_id is None or item_id not in (None, entity_item_id):
+                continue
+            items.setdefault(entity_item_id, []).append(entity)
+        return items
+
+    gallagher.set_unsubscribed_items(
+        [
+            item_id
+            for item_id, entities in item_entries().items()
+            if all(entity.disabled for entity in entities)
+        ]
+    )
+
+    @callback
+    def async_registry_updated(event: Event) -> None:
+        if event.data["action"] not in ("create", "update"):
+            return
+        if event.data["action"] == "update" and "disabled_by" not in event.data.get(
+            "changes", {}
+        ):
+            return
+        entity = registry.async_get(event.data["entity_id"])
+        if entity is None or entity.config_entry_id != entry.entry_id:
+            return
+        item_id = item_id_from_unique_id(entry, entity.unique_id)
+        if item_id is None:
+            return
+
+        entities = item_entries(item_id).get(item_id, [])
+        subscribed = not entities or any(not e.disabled for e in entities)
+        hass.async_add_executor_job(gallagher.set_item_subscribed, item_id, subscribed)
+
+    entry.async_on_unload(
+        hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, async_registry_updated)
+    )
+
+
+@callback
+def async_setup_controller_listener(
+    hass: HomeAssistant, entry: ConfigEntry, gallagher: GallagherRest
+) -> None:
+    """Tells the entities on a controller once when it goes offline or online"""
+
+    def controllers_changed(controller_ids):
+        # Called from the subscription thread
+        for controller_id in controller_ids:
+            dispatcher_send(
+                hass, SIGNAL_CONTROLLER_UPDATED.format(entry.entry_id, controller_id)
+            )
+
+    gallagher.set_controller_listener(controllers_changed)
+    entry.async_on_unload(lambda: gallagher.set_controller_listener(None))
+
+
+async def async_setup_occupancy(
+    hass: HomeAssistant, entry: ConfigEntry, gallagher: GallagherRest
+):
+    """Counts access zone occupancy from events, reconciled on an interval"""
+    if not entry.options.get(CONF_USE_EVENTS, DEFAULT_USE_EVENTS):
+        _LOGGER.warning(
+            "Occupancy counts need Command Centre events, counts will only follow the zone counts"
+        )
+
+    def occupancy_changed(zone_ids):
+        for zone_id in zone_ids:
+            dispatcher_send(
+                hass, SIGNAL_OCCUPANCY_UPDATED.format(entry.entry_id, zone_id)
+            )
+
+    await hass.async_add_executor_job(gallagher.enable_occupancy, occupancy_changed)
+
+    async def async_reconcile(_now=None):
+        await hass.async_add_executor_job(gallagher.reconcile_occupancy)
+
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            async_reconcile,
+            timedelta(
+                seconds=entry.options.get(
+                    CONF_OCCUPANCY_RECONCILE_INTERVAL,
+                    DEFAULT_OCCUPANCY_RECONCILE_INTERVAL,
+                )
+            ),
+        )
+    )
+
+
+def set_selected_items(gallagher: GallagherRest, entry: ConfigEntry):
+    """Selects the item types to load from the config entry"""
+    # Options override the selection made when the entry was created
+    gallagher.set_divisions(
+        parse_id_list(
+            entry.options.get(
+                CONF_DIVISIONS, entry.data.get(CONF_DIVISIONS, DEFAULT_DIVISIONS)
+            )
+        )
+    )
+    gallagher.set_controllers(
+        parse_id_list(
+            entry.options.get(
+                CONF_CONTROLLERS, entry.data.get(CONF_CONTROLLERS, DEFAULT_CONTROLLERS)
+            )
+        )
+    )
+    gallagher.set_item_filter(
+        ItemFilter(
+            entry.options.get(CONF_ITEM_INCLUDE, DEFAULT_ITEM_INCLUDE),
+            entry.options.get(CONF_ITEM_EXCLUDE, DEFAULT_ITEM_EXCLUDE),
+        )
+    )
 
     if entry.data.get(CONF_USE_INPUTS) is True:
         # We are using inputs
@@ -76,17 +377,40 @@ async def async_gcc_rest_setup(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         # We are using fence zones
         gallagher.set_item_fence_zones(None)
 
-    await hass.async_add_executor_job(gallagher.start)
-    await hass.async_add_executor_job(time.sleep, 1)
-
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-
-    return True
+    if entry.data.get(CONF_USE_MACROS) is True:
+        # We are using macros
+        gallagher.set_item_macros(None)
 
 
-def load_api(storage, entry: ConfigEntry):
+def load_api(
+    storage,
+    entry: ConfigEntry,
+    tracer: StartupTracer | None = None,
+    registry: GCCEngineRegistry | None = None,
+):
     """A Doc String"""
     # We have to seperate this to a seperate function as the __init__ function is not async
-    storage[CONF_API_REF] = GallagherRest(
-        entry.data.get(CONF_HOST), entry.data.get(CONF_API_KEY)
+    # Entries for the same host and API key share one subscription and connection pool
+    hub = registry.acquire(entry) if registry is not None else None
+    try:
+        storage[CONF_API_REF] = _create_api(entry, tracer, hub)
+    except Exception:
+        if registry is not None:
+            registry.release(entry)
+        raise
+
+
+def _create_api(entry: ConfigEntry, tracer: StartupTracer | None, hub):
+    return GallagherRest(
+        entry.data.get(CONF_HOST),
+        entry.data.get(CONF_API_KEY),
+        tracer=tracer,
+        command_concurrency=entry.options.get(
+            CONF_COMMAND_CONCURRENCY, DEFAULT_COMMAND_CONCURRENCY
+        ),
+        command_timeout=entry.options.get(
+            CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT
+        ),
+        hub=hub,
+        standby_hosts=get_standby_hosts(entry),
     )
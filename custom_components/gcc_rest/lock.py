@@ -1,17 +1,31 @@
 """Support for Binary inputs from a command centre server."""
 from __future__ import annotations
 
+from datetime import timedelta
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from homeassistant.components.lock import LockEntity
 from homeassistant.const import STATE_LOCKED, STATE_UNLOCKED
 
-from .const import DOMAIN, CONF_API_REF, CONF_USE_ACCESS_ZONES
-
+from .const import (
+    DOMAIN,
+    CONF_API_REF,
+    CONF_USE_ACCESS_ZONES,
+    SERVICE_ZONE_OVERRIDE_FOR,
+    ATTR_DURATION,
+    ATTR_MODE,
+)
+
+from .entity import GCCControllerMixin, GCCOptimisticMixin, GCCRestoreMixin
+from .discovery import async_add_new_items
 from .gallagher.GallagherRest import GallagherRest
-from .gallagher.ItemAccessZone import AccessZoneState
+from .gallagher.ItemAccessZone import AccessZoneState, AccessZoneSecureType
 
 import logging
 
@@ -26,6 +40,17 @@ _STATES = {
     AccessZoneState.DUAL_AUTHENTICATION: STATE_LOCKED,
 }
 
+# Zone modes that can be overridden for a set time, and the state each one shows
+_TIMED_MODES = {
+    AccessZoneSecureType.FREE: AccessZoneState.FREE,
+    AccessZoneSecureType.FREE_PIN: AccessZoneState.FREE,
+    AccessZoneSecureType.SECURE: AccessZoneState.SECURE,
+    AccessZoneSecureType.SECURE_PIN: AccessZoneState.SECURE,
+    AccessZoneSecureType.CODE_ONLY: AccessZoneState.CODE_OR_CARD,
+    AccessZoneSecureType.CODE_ONLY_PIN: AccessZoneState.CODE_OR_CARD,
+    AccessZoneSecureType.DUAL_AUTH: AccessZoneState.DUAL_AUTHENTICATION,
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
@@ -39,20 +64,39 @@ async def async_setup_entry(
         _LOGGER.info("Using GCC access zones")
         locks: list[GCCAccessZoneLock] = []
 
-        access_zones = await hass.async_add_executor_job(
-            gallagher.get_available_access_zones
-        )
+        access_zones = gallagher.get_loaded_items("accessZones")
 
         for access_zone in access_zones:
             lock = GCCAccessZoneLock(access_zone, gallagher, entry)
             locks.append(lock)
 
         async_add_entities(locks)
+        async_add_new_items(
+            hass,
+            entry,
+            "accessZones",
+            lambda items: [GCCAccessZoneLock(item, gallagher, entry) for item in items],
+            async_add_entities,
+        )
+
+        platform = entity_platform.async_get_current_platform()
+        platform.async_register_entity_service(
+            SERVICE_ZONE_OVERRIDE_FOR,
+            {
+                vol.Optional(ATTR_MODE, default=str(AccessZoneSecureType.FREE)): vol.In(
+                    [str(mode) for mode in _TIMED_MODES]
+                ),
+                vol.Required(ATTR_DURATION): cv.positive_time_period,
+            },
+            "async_override_for",
+        )
     else:
         _LOGGER.info("Not using GCC inputs, ceasing setup of binary sensors")
 
 
-class GCCAccessZoneLock(LockEntity):
+class GCCAccessZoneLock(
+    GCCControllerMixin, GCCOptimisticMixin, GCCRestoreMixin, LockEntity
+):
     """GCC REST Access Zone Lock Entity."""
 
     def __init__(self, gallagher_data, gallagher: GallagherRest, entry: ConfigEntry):
@@ -71,8 +115,10 @@ class GCCAccessZoneLock(LockEntity):
 
         self._extra_state_attributes = {"status_flags": list(), "zone_count": None}
         self._attr_extra_state_attributes = self._extra_state_attributes
+        self._setup_controller(entry, gallagher_data)
 
         self._attr_supported_features = 0  # No support features
+        self._setup_optimistic(entry, "state", "lock")
 
         gallagher.get_access_zone(self._gallagher_id).register_callback(
             self.proccess_callback
@@ -87,6 +133,8 @@ class GCCAccessZoneLock(LockEntity):
         """Callback processor"""
 
         # print(gcc_update)
+        self._live_update()
+        gcc_update = self._optimistic_filter(gcc_update)
 
         self._state = _STATES[gcc_update["state"]]
         self._is_locked = self._state == STATE_LOCKED
@@ -101,15 +149,35 @@ class GCCAccessZoneLock(LockEntity):
 
         self.schedule_update_ha_state()
 
-    def lock(self, **kwargs):
-        self._gallagher.get_access_zone(self._gallagher_id).set_secure("secure")
+    async def async_lock(self, **kwargs):
+        await self._async_optimistic_command(
+            self._gallagher.get_access_zone(self._gallagher_id).set_secure("secure"),
+            AccessZoneState.SECURE,
+        )
+
+    async def async_unlock(self, **kwargs):
+        await self._async_optimistic_command(
+            self._gallagher.get_access_zone(self._gallagher_id).set_secure("free"),
+            AccessZoneState.FREE,
+        )
 
-    def unlock(self, **kwargs):
-        self._gallagher.get_access_zone(self._gallagher_id).set_secure("free")
+    async def async_override_for(self, mode: str, duration: timedelta):
+        """Override the zone mode, Command Centre reverts it after duration"""
+        await self._async_optimistic_command(
+            self._gallagher.get_access_zone(self._gallagher_id).set_secure(
+                mode, duration=duration.total_seconds()
+            ),
+            _TIMED_MODES[AccessZoneSecureType(mode)],
+        )
 
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added."""
-        await self.async_base_added_to_hass()
+        self._async_watch_controller()
+        await self._async_added_restoring()
+
+    def _restore_state(self, last_state: State) -> None:
+        self._state = last_state.state
+        self._is_locked = self._state == STATE_LOCKED
 
     async def async_base_added_to_hass(self) -> None:
         """Handle entity which will be added."""
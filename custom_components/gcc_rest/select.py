@@ -9,6 +9,7 @@ from homeassistant.components.select import SelectEntity
 
 from .const import DOMAIN, CONF_API_REF, CONF_USE_FENCE_ZONES
 
+from .discovery import async_add_new_items
 from .gallagher.GallagherRest import GallagherRest
 
 
@@ -29,7 +30,7 @@ async def async_setup_entry(
         _LOGGER.info("Using GCC fence zones")
         selects: list[SelectEntity] = []
 
-        fences = await hass.async_add_executor_job(gallagher.get_available_fence_zones)
+        fences = gallagher.get_loaded_items("fenceZones")
 
         for fence in fences:
             select = GCCFenceZoneSelect(fence, gallagher, entry)
@@ -38,6 +39,15 @@ async def async_setup_entry(
         # print(inputs)
 
         async_add_entities(selects)
+        async_add_new_items(
+            hass,
+            entry,
+            "fenceZones",
+            lambda items: [
+                GCCFenceZoneSelect(item, gallagher, entry) for item in items
+            ],
+            async_add_entities,
+        )
     else:
         _LOGGER.info("Not using GCC fence zones, ceasing setup of select entities")
 
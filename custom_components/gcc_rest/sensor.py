@@ -2,12 +2,22 @@
 from __future__ import annotations
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import EntityCategory
 
-from .const import DOMAIN, CONF_API_REF, CONF_USE_FENCE_ZONES
+from .const import (
+    DOMAIN,
+    CONF_API_REF,
+    CONF_USE_FENCE_ZONES,
+    SIGNAL_ALARMS_UPDATED,
+    SIGNAL_OCCUPANCY_UPDATED,
+)
 
+from .entity import GCCControllerMixin, GCCRestoreMixin
+from .discovery import async_add_new_items
 from .gallagher.GallagherRest import GallagherRest
 
 
@@ -15,6 +25,60 @@ import logging
 
 _LOGGER = logging.getLogger(__name__)
 
+# Engine metrics exposed as diagnostic sensors - (metric, name, unit)
+_METRIC_SENSORS = [
+    ("subscription.stalls", "Subscription Stalls", None),
+    ("subscription.reconnects", "Subscription Reconnects", None),
+    ("subscription.poll_timeouts", "Subscription Poll Timeouts", None),
+    ("subscription.seconds_since_last_poll", "Seconds Since Last Poll", "s"),
+    ("subscription.long_poll_timeout", "Long Poll Timeout", "s"),
+    ("subscription.circuit_state", "Subscription Circuit State", None),
+    ("subscription.consecutive_failures", "Subscription Consecutive Failures", None),
+    ("subscription.backoff_delay", "Subscription Backoff Delay", "s"),
+    ("failover.active_host", "Active Command Centre Host", None),
+    ("failover.switches", "Command Centre Failovers", None),
+    ("failover.last_outage_seconds", "Last Failover Outage", "s"),
+    ("features.retries", "Item Type Load Retries", None),
+    ("restore.restored", "Restored Entity States", None),
+    ("controllers.offline", "Controllers Offline", None),
+    ("controllers.dropped_updates", "Offline Controller Updates Skipped", None),
+    ("commands.success", "Commands Succeeded", None),
+    ("commands.failed", "Commands Failed", None),
+    ("commands.timeout", "Commands Timed Out", None),
+    ("commands.superseded", "Commands Superseded", None),
+    ("commands.suppressed", "Commands Suppressed", None),
+    ("events.received", "Events Received", None),
+    ("events.errors", "Event Stream Errors", None),
+    ("alarms.errors", "Alarm Feed Errors", None),
+    ("occupancy.drift", "Occupancy Drift Corrected", None),
+    ("events.buffered", "Events Buffered", None),
+    ("cardholders.cache.hits", "Cardholder Cache Hits", None),
+    ("cardholders.cache.misses", "Cardholder Cache Misses", None),
+    ("cardholders.cached", "Cardholders Cached", None),
+    ("optimistic.rolled_back", "Optimistic States Rolled Back", None),
+]
+
+# Metrics of optional features, only exposed while the feature is enabled - (metric
+# prefix, engine getter returning None when disabled), the first matching prefix applies
+_FEATURE_METRICS = [
+    ("events.buffered", "get_event_buffer"),
+    ("events.", "get_event_stream"),
+    ("alarms.", "get_alarm_tracker"),
+    ("occupancy.", "get_occupancy"),
+    ("cardholders.", "get_cardholder_cache"),
+]
+
+# Engine timings exposed as diagnostic sensors, the state is the p95 - (timing, name)
+_TIMING_SENSORS = [
+    ("commands.latency", "Command Latency"),
+    ("commands.latency.ItemMacro", "Macro Latency"),
+    ("failover.time", "Failover Time"),
+    ("features.recovery", "Item Type Recovery Time"),
+    ("optimistic.confirmation_latency", "Command Confirmation Latency"),
+    ("startup.first_meaningful_state", "Time To First State"),
+    ("restore.stale_duration", "Restored State Age"),
+]
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
@@ -28,7 +92,7 @@ async def async_setup_entry(
         _LOGGER.info("Using GCC fence zones (sensor)")
         sensors: list[GCCFenceZoneSensor] = []
 
-        fences = await hass.async_add_executor_job(gallagher.get_available_fence_zones)
+        fences = gallagher.get_loaded_items("fenceZones")
 
         for fence in fences:
             sensor = GCCFenceZoneSensor(fence, gallagher, entry)
@@ -37,11 +101,65 @@ async def async_setup_entry(
         # print(inputs)
 
         async_add_entities(sensors)
+        async_add_new_items(
+            hass,
+            entry,
+            "fenceZones",
+            lambda items: [
+                GCCFenceZoneSensor(item, gallagher, entry) for item in items
+            ],
+            async_add_entities,
+        )
     else:
         _LOGGER.info("Not using GCC fence zones (sensor)")
 
+    if gallagher.get_occupancy() is not None:
+        async_add_entities(
+            [
+                GCCOccupancySensor(access_zone, gallagher, entry)
+                for access_zone in gallagher.get_loaded_items("accessZones")
+            ]
+        )
+        async_add_new_items(
+            hass,
+            entry,
+            "accessZones",
+            lambda items: [
+                GCCOccupancySensor(item, gallagher, entry) for item in items
+            ],
+            async_add_entities,
+        )
+
+    if gallagher.get_alarm_tracker() is not None:
+        async_add_entities(
+            [
+                GCCActiveAlarmsSensor(gallagher, entry),
+                GCCAlarmSourcesSensor(gallagher, entry),
+            ]
+        )
+
+    async_add_entities(
+        [GCCFeatureStatusSensor(gallagher, entry)]
+        + [
+            GCCMetricSensor(metric, name, unit, gallagher, entry)
+            for metric, name, unit in _METRIC_SENSORS
+            if _is_feature_enabled(metric, gallagher)
+        ]
+        + [
+            GCCTimingSensor(timing, name, gallagher, entry)
+            for timing, name in _TIMING_SENSORS
+        ]
+    )
+
 
-class GCCFenceZoneSensor(SensorEntity):
+def _is_feature_enabled(metric, gallagher: GallagherRest):
+    for prefix, getter in _FEATURE_METRICS:
+        if metric.startswith(prefix):
+            return getattr(gallagher, getter)() is not None
+    return True
+
+
+class GCCFenceZoneSensor(GCCControllerMixin, GCCRestoreMixin, SensorEntity):
     """GCC REST binary sensor."""
 
     def __init__(self, gallagher_data, gallagher: GallagherRest, entry: ConfigEntry):
@@ -75,6 +193,7 @@ class GCCFenceZoneSensor(SensorEntity):
         }
 
         self._attr_extra_state_attributes = self._extra_state_attributes
+        self._setup_controller(entry, gallagher_data)
 
         gallagher.get_fence_zone(self._gallagher_id).register_callback(
             self.proccess_callback
@@ -87,6 +206,7 @@ class GCCFenceZoneSensor(SensorEntity):
 
     def proccess_callback(self, gcc_update):
         """Callback processor"""
+        self._live_update()
         for attr in gcc_update.keys():
             if attr == "voltage":
                 self._extra_state_attributes[attr] = gcc_update[attr]
@@ -97,7 +217,8 @@ class GCCFenceZoneSensor(SensorEntity):
 
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added."""
-        await self.async_base_added_to_hass()
+        self._async_watch_controller()
+        await self._async_added_restoring()
 
     async def async_base_added_to_hass(self) -> None:
         """Handle entity which will be added."""
@@ -105,6 +226,205 @@ class GCCFenceZoneSensor(SensorEntity):
             self._gallagher.get_fence_zone(self._gallagher_id).get_status()
         )
 
-    async def async_get_last_state(self):
-        """Returns item state"""
-        return self._native_value
+    def _restore_state(self, last_state: State) -> None:
+        try:
+            self._native_value = float(last_state.state)
+        except ValueError:
+            self._native_value = None
+
+
+class GCCMetricSensor(SensorEntity):
+    """GCC REST engine metric sensor."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self, metric, name, unit, gallagher: GallagherRest, entry: ConfigEntry
+    ):
+        self._gallagher = gallagher
+        self._metric = metric
+
+        self._attr_name = "{} {}".format("GCC", name)
+        self._attr_unique_id = "{}_{}_metric_{}".format("GCC", entry.entry_id, metric)
+        self._attr_native_unit_of_measurement = unit
+        self._attr_native_value = None
+
+    def update(self) -> None:
+        """Read the metric from the engine"""
+        self._attr_native_value = self._gallagher.get_metric(self._metric)
+
+
+class GCCFeatureStatusSensor(SensorEntity):
+    """GCC REST item types failing to load, the state of every type as attributes."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, gallagher: GallagherRest, entry: ConfigEntry):
+        self._gallagher = gallagher
+
+        self._attr_name = "{} {}".format("GCC", "Item Types Failing")
+        self._attr_unique_id = "{}_{}_features_failed".format("GCC", entry.entry_id)
+        self._attr_native_value = None
+        self._attr_extra_state_attributes = {}
+
+    def update(self) -> None:
+        """Read the item type load states from the engine"""
+        status = self._gallagher.get_feature_status()
+        self._attr_native_value = len(self._gallagher.get_failed_features())
+
+        attributes = {}
+        for item_name, feature in status.items():
+            attributes[item_name] = feature["state"]
+            if feature["error"] is not None:
+                attributes["{}_error".format(item_name)] = feature["error"]
+                attributes["{}_retry_in".format(item_name)] = feature["retry_in"]
+        attributes["ready"] = [
+            item_name for item_name, feature in status.items() if feature["ready"]
+        ]
+        self._attr_extra_state_attributes = attributes
+
+
+class GCCTimingSensor(SensorEntity):
+    """GCC REST engine timing sensor, p95 with the per type breakdown as attributes."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = "ms"
+
+    def __init__(self, timing, name, gallagher: GallagherRest, entry: ConfigEntry):
+        self._gallagher = gallagher
+        self._timing = timing
+
+        self._attr_name = "{} {}".format("GCC", name)
+        self._attr_unique_id = "{}_{}_timing_{}".format("GCC", entry.entry_id, timing)
+        self._attr_native_value = None
+        self._attr_extra_state_attributes = {}
+
+    def update(self) -> None:
+        """Read the timing from the engine"""
+        timings = self._gallagher.get_timings(self._timing)
+
+        summary = timings.get(self._timing)
+        self._attr_native_value = None if summary is None else summary["p95_ms"]
+
+        prefix = self._timing + "."
+        self._attr_extra_state_attributes = {
+            name[len(prefix) :]: timing
+            for name, timing in timings.items()
+            if name.startswith(prefix)
+        }
+
+
+class GCCAlarmSensor(SensorEntity):
+    """Base for sensors pushed by the alarm tracker when the alarm list changes."""
+
+    _attr_should_poll = False
+
+    def __init__(self, gallagher: GallagherRest, entry: ConfigEntry):
+        self._gallagher = gallagher
+        self._entry = entry
+        self._attr_native_value = None
+        self._attr_extra_state_attributes = {}
+
+    async def async_added_to_hass(self) -> None:
+        """Handle entity which will be added."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_ALARMS_UPDATED.format(self._entry.entry_id),
+                self._async_alarms_updated,
+            )
+        )
+        self._async_alarms_updated()
+
+    @callback
+    def _async_alarms_updated(self) -> None:
+        self.update_from_tracker(self._gallagher.get_alarm_tracker())
+        self.async_write_ha_state()
+
+    def update_from_tracker(self, tracker) -> None:
+        """Reads the state from the alarm tracker"""
+
+
+class GCCActiveAlarmsSensor(GCCAlarmSensor):
+    """GCC REST active alarm count, counts per priority and state as attributes."""
+
+    _attr_native_unit_of_measurement = "alarms"
+
+    def __init__(self, gallagher: GallagherRest, entry: ConfigEntry):
+        super().__init__(gallagher, entry)
+        self._attr_name = "{} {}".format("GCC", "Active Alarms")
+        self._attr_unique_id = "{}_{}_alarms_active".format("GCC", entry.entry_id)
+
+    def update_from_tracker(self, tracker) -> None:
+        self._attr_native_value = tracker.get_count()
+        attributes = {
+            "priority_{}".format(priority): count
+            for priority, count in sorted(
+                tracker.get_counts_by_priority().items(), key=lambda x: str(x[0])
+            )
+        }
+        attributes.update(
+            {
+                "state_{}".format(state): count
+                for state, count in tracker.get_counts_by_state().items()
+            }
+        )
+        self._attr_extra_state_attributes = attributes
+
+
+class GCCAlarmSourcesSensor(GCCAlarmSensor):
+    """GCC REST number of items with active alarms, the count per item as attributes."""
+
+    _attr_native_unit_of_measurement = "items"
+
+    def __init__(self, gallagher: GallagherRest, entry: ConfigEntry):
+        super().__init__(gallagher, entry)
+        self._attr_name = "{} {}".format("GCC", "Alarm Sources")
+        self._attr_unique_id = "{}_{}_alarms_sources".format("GCC", entry.entry_id)
+
+    def update_from_tracker(self, tracker) -> None:
+        counts = tracker.get_counts_by_source()
+        self._attr_native_value = len(counts)
+        self._attr_extra_state_attributes = {
+            "{} ({})".format(name or "Unknown", source_id): count
+            for source_id, (name, count) in counts.items()
+        }
+
+
+class GCCOccupancySensor(SensorEntity):
+    """GCC REST access zone occupancy, pushed for each event that changes the zone."""
+
+    _attr_should_poll = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = "people"
+
+    def __init__(self, gallagher_data, gallagher: GallagherRest, entry: ConfigEntry):
+        self._gallagher = gallagher
+        self._gallagher_id = gallagher_data["id"]
+        self._entry = entry
+
+        self._attr_name = "{} {} Occupancy".format("GCC", gallagher_data["name"])
+        self._attr_unique_id = "{}_{}_{}_occupancy".format(
+            "GCC", entry.entry_id, self._gallagher_id
+        )
+        self._attr_native_value = None
+
+    async def async_added_to_hass(self) -> None:
+        """Handle entity which will be added."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_OCCUPANCY_UPDATED.format(
+                    self._entry.entry_id, self._gallagher_id
+                ),
+                self._async_occupancy_updated,
+            )
+        )
+        self._async_occupancy_updated()
+
+    @callback
+    def _async_occupancy_updated(self) -> None:
+        self._attr_native_value = self._gallagher.get_occupancy().get_count(
+            self._gallagher_id
+        )
+        self.async_write_ha_state()
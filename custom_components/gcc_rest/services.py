@@ -0,0 +1,420 @@
+"""Services for the Gallagher Command Centre Integration."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from .const import (
+    DOMAIN,
+    CONF_API_REF,
+    SERVICE_BULK_COMMAND,
+    SERVICE_ACKNOWLEDGE_ALARMS,
+    SERVICE_PROCESS_ALARMS,
+    SERVICE_QUERY_EVENTS,
+    SERVICE_RESCAN,
+    ATTR_COMMAND,
+    ATTR_DIVISION,
+    ATTR_CONTROLLER,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_FORCE,
+    ATTR_TIMEOUT,
+    ATTR_ALARM_IDS,
+    ATTR_PRIORITY,
+    ATTR_SOURCE_ID,
+    ATTR_COMMENT,
+    ATTR_ITEM_ID,
+    ATTR_CARDHOLDER_ID,
+    ATTR_TYPE_ID,
+    ATTR_WITHIN,
+    ATTR_LIMIT,
+)
+
+from .discovery import async_rescan
+from .gallagher.GallagherRest import GallagherRest
+from .gallagher.ItemAccessZone import AccessZoneSecureType
+from .gallagher.ItemFenceZone import FenceZoneCommands
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+BULK_COMMANDS = sorted(
+    {"on", "off", "arm", "disarm", "user1", "isolate", "deisolate", "cancel"}
+    | {str(command) for command in AccessZoneSecureType}
+    | {str(command) for command in FenceZoneCommands}
+)
+
+BULK_COMMAND_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+            vol.Optional(ATTR_DIVISION): cv.string,
+            vol.Optional(ATTR_CONTROLLER): cv.string,
+            vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Required(ATTR_COMMAND): vol.In(BULK_COMMANDS),
+            vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+            vol.Optional(ATTR_TIMEOUT): vol.All(
+                vol.Coerce(float), vol.Range(min=1, max=300)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ENTITY_ID, ATTR_DIVISION, ATTR_CONTROLLER),
+)
+
+ALARM_ACTION_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_ALARM_IDS): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_PRIORITY): vol.Coerce(int),
+            vol.Optional(ATTR_SOURCE_ID): cv.string,
+            vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Optional(ATTR_COMMENT): cv.string,
+            vol.Optional(ATTR_TIMEOUT): vol.All(
+                vol.Coerce(float), vol.Range(min=1, max=300)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ALARM_IDS, ATTR_PRIORITY, ATTR_SOURCE_ID),
+)
+
+QUERY_EVENTS_SCHEMA = vol.Schema(
+    {
+        vol.Exclusive(ATTR_ENTITY_ID, "item"): cv.entity_id,
+        vol.Exclusive(ATTR_ITEM_ID, "item"): cv.string,
+        vol.Optional(ATTR_CARDHOLDER_ID): cv.string,
+        vol.Optional(ATTR_TYPE_ID): cv.string,
+        vol.Optional(ATTR_WITHIN): cv.positive_time_period,
+        vol.Optional(ATTR_LIMIT, default=50): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=1000)
+        ),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
+RESCAN_SCHEMA = vol.Schema({vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string})
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Registers the integration services, once for all config entries"""
+    if hass.services.has_service(DOMAIN, SERVICE_BULK_COMMAND):
+        return
+
+    async def async_bulk_command(call: ServiceCall) -> ServiceResponse:
+        return await _async_bulk_command(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_COMMAND,
+        async_bulk_command,
+        schema=BULK_COMMAND_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_acknowledge_alarms(call: ServiceCall) -> ServiceResponse:
+        return await _async_alarm_action(hass, call, "acknowledge")
+
+    async def async_process_alarms(call: ServiceCall) -> ServiceResponse:
+        return await _async_alarm_action(hass, call, "process")
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ACKNOWLEDGE_ALARMS,
+        async_acknowledge_alarms,
+        schema=ALARM_ACTION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROCESS_ALARMS,
+        async_process_alarms,
+        schema=ALARM_ACTION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    @callback
+    def async_query_events(call: ServiceCall) -> ServiceResponse:
+        return _async_query_events(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_EVENTS,
+        async_query_events,
+        schema=QUERY_EVENTS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_rescan_items(call: ServiceCall) -> ServiceResponse:
+        return await _async_rescan(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RESCAN,
+        async_rescan_items,
+        schema=RESCAN_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Removes the integration services once the last config entry is unloaded"""
+    if hass.data.get(DOMAIN):
+        return
+    for service in (
+        SERVICE_BULK_COMMAND,
+        SERVICE_ACKNOWLEDGE_ALARMS,
+        SERVICE_PROCESS_ALARMS,
+        SERVICE_QUERY_EVENTS,
+        SERVICE_RESCAN,
+    ):
+        hass.services.async_remove(DOMAIN, service)
+
+
+def _resolve_entity(hass: HomeAssistant, entity_id):
+    """Returns the (config entry id, item id) of a Command Centre item entity"""
+    entity = er.async_get(hass).async_get(entity_id)
+    if entity is None or entity.platform != DOMAIN:
+        raise HomeAssistantError("{} is not a gcc_rest entity".format(entity_id))
+
+    prefix = "GCC_{}_".format(entity.config_entry_id)
+    if entity.config_entry_id not in hass.data.get(
+        DOMAIN, {}
+    ) or not entity.unique_id.startswith(prefix):
+        raise HomeAssistantError(
+            "{} is not a Command Centre item entity".format(entity_id)
+        )
+
+    item_id = entity.unique_id[len(prefix) :]
+    if "_" in item_id:
+        # Occupancy, connectivity and diagnostic sensors belong to the entry, not an item
+        raise HomeAssistantError(
+            "{} is not a Command Centre item entity, target the entity of the item "
+            "itself".format(entity_id)
+        )
+    return entity.config_entry_id, item_id
+
+
+def _resolve_targets(hass: HomeAssistant, call: ServiceCall):
+    """Returns a dict of config entry id -> {item id: entity id or None}"""
+    loaded = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id is not None and entry_id not in loaded:
+        raise HomeAssistantError(
+            "Config entry {} is not a loaded gcc_rest entry".format(entry_id)
+        )
+
+    targets = {}
+
+    for entity_id in call.data.get(ATTR_ENTITY_ID, []):
+        entity_entry_id, item_id = _resolve_entity(hass, entity_id)
+        if entry_id is not None and entity_entry_id != entry_id:
+            continue
+        targets.setdefault(entity_entry_id, {}).setdefault(item_id, entity_id)
+
+    division = call.data.get(ATTR_DIVISION)
+    controller = call.data.get(ATTR_CONTROLLER)
+    if division is not None or controller is not None:
+        for candidate_entry_id, storage in loaded.items():
+            if entry_id is not None and candidate_entry_id != entry_id:
+                continue
+            gallagher: GallagherRest = storage[CONF_API_REF]
+            for item in gallagher.get_items(division=division, controller=controller):
+                # Selectors only pick the items that support the command
+                if item.get_command(call.data[ATTR_COMMAND]) is None:
+                    continue
+                targets.setdefault(candidate_entry_id, {}).setdefault(
+                    item.get_item_id(), None
+                )
+
+    return targets
+
+
+async def _async_bulk_command(hass: HomeAssistant, call: ServiceCall):
+    """Sends one command to many items concurrently, returns the per item outcomes"""
+    started = time.monotonic()
+    command = call.data[ATTR_COMMAND]
+    targets = _resolve_targets(hass, call)
+
+    pending = []
+    for entry_id, items in targets.items():
+        gallagher: GallagherRest = hass.data[DOMAIN][entry_id][CONF_API_REF]
+        futures = gallagher.bulk_command(
+            items.keys(),
+            command,
+            timeout=call.data.get(ATTR_TIMEOUT),
+            force=call.data[ATTR_FORCE],
+        )
+        for item_id, future in futures.items():
+            item = gallagher.get_item(item_id)
+            pending.append(
+                (
+                    {
+                        "item_id": item_id,
+                        "name": None if item is None else item.get_name(),
+                        "type": None if item is None else item.__class__.__name__,
+                        "entity_id": items[item_id],
+                    },
+                    future,
+                )
+            )
+
+    outcomes = await asyncio.gather(
+        *(asyncio.wrap_future(future) for _, future in pending)
+    )
+
+    results = []
+    summary = {}
+    for (result, _), outcome in zip(pending, outcomes):
+        result["outcome"] = outcome.value
+        summary[outcome.value] = summary.get(outcome.value, 0) + 1
+        results.append(result)
+
+    wall_time_ms = round((time.monotonic() - started) * 1000, 1)
+    _LOGGER.info(
+        "Bulk command `{}` sent to {} items in {} ms - {}".format(
+            command, len(results), wall_time_ms, summary
+        )
+    )
+
+    return {
+        "command": command,
+        "wall_time_ms": wall_time_ms,
+        "summary": summary,
+        "results": results,
+    }
+
+
+async def _async_alarm_action(hass: HomeAssistant, call: ServiceCall, action):
+    """Acknowledges or processes many alarms concurrently, returns the outcomes"""
+    started = time.monotonic()
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    alarm_ids = call.data.get(ATTR_ALARM_IDS)
+    priority = call.data.get(ATTR_PRIORITY)
+    source_id = call.data.get(ATTR_SOURCE_ID)
+
+    pending = []
+    for candidate_entry_id, storage in hass.data.get(DOMAIN, {}).items():
+        if entry_id is not None and candidate_entry_id != entry_id:
+            continue
+        gallagher: GallagherRest = storage[CONF_API_REF]
+        tracker = gallagher.get_alarm_tracker()
+        if tracker is None:
+            continue
+
+        selected = []
+        for alarm in tracker.get_alarms():
+            if alarm_ids is not None and str(alarm.get("id")) not in alarm_ids:
+                continue
+            if priority is not None and alarm.get("priority") != priority:
+                continue
+            source = alarm.get("source") or {}
+            if source_id is not None and str(source.get("id")) != source_id:
+                continue
+            selected.append(str(alarm.get("id")))
+
+        futures = getattr(tracker, action)(
+            selected,
+            comment=call.data.get(ATTR_COMMENT),
+            timeout=call.data.get(ATTR_TIMEOUT),
+        )
+        pending += list(futures.items())
+
+    outcomes = await asyncio.gather(
+        *(asyncio.wrap_future(future) for _, future in pending)
+    )
+
+    summary = {}
+    results = []
+    for (alarm_id, _), outcome in zip(pending, outcomes):
+        summary[outcome.value] = summary.get(outcome.value, 0) + 1
+        results.append({"alarm_id": alarm_id, "outcome": outcome.value})
+
+    wall_time_ms = round((time.monotonic() - started) * 1000, 1)
+    _LOGGER.info(
+        "Alarm {} sent for {} alarms in {} ms - {}".format(
+            action, len(results), wall_time_ms, summary
+        )
+    )
+
+    return {
+        "action": action,
+        "wall_time_ms": wall_time_ms,
+        "summary": summary,
+        "results": results,
+    }
+
+
+@callback
+def _async_query_events(hass: HomeAssistant, call: ServiceCall):
+    """Queries the recent event buffers, newest first"""
+    started = time.perf_counter()
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    item_id = call.data.get(ATTR_ITEM_ID)
+    if ATTR_ENTITY_ID in call.data:
+        entity_entry_id, item_id = _resolve_entity(hass, call.data[ATTR_ENTITY_ID])
+        entry_id = entry_id or entity_entry_id
+
+    since = None
+    if ATTR_WITHIN in call.data:
+        since = time.time() - call.data[ATTR_WITHIN].total_seconds()
+
+    limit = call.data[ATTR_LIMIT]
+    events = []
+    for candidate_entry_id, storage in hass.data.get(DOMAIN, {}).items():
+        if entry_id is not None and candidate_entry_id != entry_id:
+            continue
+        gallagher: GallagherRest = storage[CONF_API_REF]
+        buffer = gallagher.get_event_buffer()
+        if buffer is None:
+            continue
+        events += buffer.query(
+            item_id=item_id,
+            cardholder_id=call.data.get(ATTR_CARDHOLDER_ID),
+            type_id=call.data.get(ATTR_TYPE_ID),
+            since=since,
+            limit=limit,
+        )
+
+    if entry_id is None:
+        # Merge the newest events of every entry
+        events.sort(key=lambda event: event["time"] or "", reverse=True)
+        events = events[:limit]
+
+    return {
+        "count": len(events),
+        "query_ms": round((time.perf_counter() - started) * 1000, 3),
+        "events": events,
+    }
+
+
+async def _async_rescan(hass: HomeAssistant, call: ServiceCall):
+    """Rescans the items of the loaded entries, returns the items added and removed"""
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    loaded = hass.data.get(DOMAIN, {})
+    if entry_id is not None and entry_id not in loaded:
+        raise HomeAssistantError(
+            "Config entry {} is not a loaded gcc_rest entry".format(entry_id)
+        )
+
+    results = {}
+    for candidate_entry_id in list(loaded.keys()):
+        if entry_id is not None and candidate_entry_id != entry_id:
+            continue
+        entry = hass.config_entries.async_get_entry(candidate_entry_id)
+        if entry is None:
+            continue
+        results[candidate_entry_id] = await async_rescan(hass, entry)
+
+    return {"entries": results}
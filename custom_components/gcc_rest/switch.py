@@ -1,14 +1,29 @@
 """Support for switch outputs from a command centre server."""
 from __future__ import annotations
 
+from datetime import timedelta
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant, State
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from homeassistant.components.switch import SwitchEntity
 
-from .const import DOMAIN, CONF_API_REF, CONF_USE_OUTPUTS
-
+from .const import (
+    DOMAIN,
+    CONF_API_REF,
+    CONF_USE_OUTPUTS,
+    SERVICE_TURN_ON_FOR,
+    SERVICE_TURN_OFF_FOR,
+    ATTR_DURATION,
+)
+
+from .entity import GCCControllerMixin, GCCOptimisticMixin, GCCRestoreMixin
+from .discovery import async_add_new_items
 from .gallagher.GallagherRest import GallagherRest
 
 import logging
@@ -27,7 +42,7 @@ async def async_setup_entry(
         _LOGGER.info("Using GCC outputs")
         switches: list[GCCSwitch] = []
 
-        outputs = await hass.async_add_executor_job(gallagher.get_available_outputs)
+        outputs = gallagher.get_loaded_items("outputs")
 
         for output in outputs:
             switch = GCCSwitch(output, gallagher, entry)
@@ -35,11 +50,32 @@ async def async_setup_entry(
 
         # print(outputs)
         async_add_entities(switches)
+        async_add_new_items(
+            hass,
+            entry,
+            "outputs",
+            lambda items: [GCCSwitch(item, gallagher, entry) for item in items],
+            async_add_entities,
+        )
+
+        platform = entity_platform.async_get_current_platform()
+        platform.async_register_entity_service(
+            SERVICE_TURN_ON_FOR,
+            {vol.Required(ATTR_DURATION): cv.positive_time_period},
+            "async_turn_on_for",
+        )
+        platform.async_register_entity_service(
+            SERVICE_TURN_OFF_FOR,
+            {vol.Required(ATTR_DURATION): cv.positive_time_period},
+            "async_turn_off_for",
+        )
     else:
         _LOGGER.info("Not using GCC output, ceasing setup of switches")
 
 
-class GCCSwitch(SwitchEntity):
+class GCCSwitch(
+    GCCControllerMixin, GCCOptimisticMixin, GCCRestoreMixin, SwitchEntity
+):
 
     """GCC REST swtich."""
 
@@ -63,6 +99,8 @@ class GCCSwitch(SwitchEntity):
         }
 
         self._attr_extra_state_attributes = self._extra_state_attributes
+        self._setup_controller(entry, gallagher_data)
+        self._setup_optimistic(entry, "state", "switch")
 
         gallagher.get_output(self._gallagher_id).register_callback(
             self.proccess_callback
@@ -75,6 +113,8 @@ class GCCSwitch(SwitchEntity):
 
     def proccess_callback(self, gcc_update):
         """Callback processor"""
+        self._live_update()
+        gcc_update = self._optimistic_filter(gcc_update)
         self._is_on = gcc_update["state"]
 
         for attr in gcc_update.keys():
@@ -85,7 +125,8 @@ class GCCSwitch(SwitchEntity):
 
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added."""
-        await self.async_base_added_to_hass()
+        self._async_watch_controller()
+        await self._async_added_restoring()
 
     async def async_base_added_to_hass(self) -> None:
         """Handle entity which will be added."""
@@ -93,13 +134,35 @@ class GCCSwitch(SwitchEntity):
             self._gallagher.get_output(self._gallagher_id).get_status()
         )
 
-    async def async_get_last_state(self):
-        return self._is_on
+    def _restore_state(self, last_state: State) -> None:
+        self._is_on = last_state.state == STATE_ON
 
-    def turn_on(self, **kwargs) -> None:
+    async def async_turn_on(self, **kwargs) -> None:
         """Turn the entity on."""
-        self._gallagher.get_output(self._gallagher_id).on()
+        await self._async_optimistic_command(
+            self._gallagher.get_output(self._gallagher_id).on(), True
+        )
 
-    def turn_off(self, **kwargs):
+    async def async_turn_off(self, **kwargs):
         """Turn the entity off."""
-        self._gallagher.get_output(self._gallagher_id).off()
+        await self._async_optimistic_command(
+            self._gallagher.get_output(self._gallagher_id).off(), False
+        )
+
+    async def async_turn_on_for(self, duration: timedelta) -> None:
+        """Turn the entity on, Command Centre turns it back off after duration"""
+        await self._async_optimistic_command(
+            self._gallagher.get_output(self._gallagher_id).on(
+                duration=duration.total_seconds()
+            ),
+            True,
+        )
+
+    async def async_turn_off_for(self, duration: timedelta) -> None:
+        """Turn the entity off, Command Centre turns it back on after duration"""
+        await self._async_optimistic_command(
+            self._gallagher.get_output(self._gallagher_id).off(
+                duration=duration.total_seconds()
+            ),
+            False,
+        )
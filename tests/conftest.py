@@ -0,0 +1,21 @@
+"""Shared test setup for the Gallagher Command Centre Integration."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The integration package, for `custom_components.gcc_rest` imports
+sys.path.insert(0, ROOT)
+# The client library, importable without Home Assistant as `gallagher`
+sys.path.append(os.path.join(ROOT, "custom_components", "gcc_rest"))
+
+import pytest
+
+from fake_command_centre import FakeCommandCentre
+
+
+@pytest.fixture
+def command_centre():
+    fake = FakeCommandCentre()
+    yield fake
+    fake.close()
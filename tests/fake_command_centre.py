@@ -0,0 +1,151 @@
+"""A minimal Command Centre REST API served on localhost for engine tests."""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FEATURES = ["inputs", "outputs", "alarmZones", "doors", "accessZones", "fenceZones"]
+ITEMS = {
+    "inputs": [{"id": "101", "name": "Front PIR", "connectedController": {"id": "900"}}],
+    "outputs": [{"id": "201", "name": "Gate Relay", "connectedController": {"id": "900"}}],
+    "alarmZones": [],
+    "doors": [{"id": "401", "name": "Front Door", "connectedController": {"id": "901"}}],
+    "accessZones": [],
+    "fenceZones": [],
+}
+FLAGS = {"inputs": ["closed"], "outputs": ["open"], "doors": ["closed", "secure"]}
+POLL_HOLD = 0.2
+
+
+class FakeCommandCentre:
+    """Serves the API root, item lists and details and the item subscription"""
+
+    def __init__(self):
+        self.posts = []
+        # Seconds an item command is held before it is answered
+        self.command_hold = 0
+        # Active alarms, and batches of alarm updates waiting to be polled
+        self.alarms = []
+        self.alarm_updates = []
+        # Cardholders by id, the paths of cardholder requests, and the seconds each is held
+        self.cardholders = {}
+        self.cardholder_requests = []
+        self.cardholder_hold = 0
+        self._server = _QuietServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self.base = "http://127.0.0.1:{}/".format(self._server.server_address[1])
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def href(self, path):
+        return self.base + "api/" + path
+
+    def root(self):
+        features = {name: {name: {"href": self.href(name)}} for name in FEATURES}
+        features["items"] = {"items": {"href": self.href("items")}}
+        return {"version": "8.50.1", "features": features}
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients abort requests on purpose, see GallagherSession.cancel()
+        pass
+
+
+def _handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def send(self, code, body=None):
+            data = json.dumps(body).encode() if body is not None else b""
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = self.path.split("?")[0].rstrip("/")
+            if path == "/api":
+                return self.send(200, fake.root())
+            if path == "/api/items/updates/next":
+                time.sleep(POLL_HOLD)
+                return self.send(
+                    200, {"updates": [], "next": {"href": fake.href("items/updates/next")}}
+                )
+            if path.startswith("/api/cardholders"):
+                return self.send_cardholders(path)
+            if path == "/api/alarms":
+                return self.send(
+                    200,
+                    {
+                        "alarms": fake.alarms,
+                        "updates": {"href": fake.href("alarms/updates")},
+                    },
+                )
+            if path == "/api/alarms/updates":
+                if len(fake.alarm_updates) == 0:
+                    time.sleep(POLL_HOLD)
+                updates = fake.alarm_updates.pop(0) if fake.alarm_updates else []
+                return self.send(
+                    200, {"updates": updates, "next": {"href": fake.href("alarms/updates")}}
+                )
+            match = re.match(r"^/api/(\w+)(?:/(\d+))?$", path)
+            if match and match.group(1) in ITEMS:
+                kind, item_id = match.groups()
+                items = [
+                    dict(item, href=fake.href("{}/{}".format(kind, item["id"])))
+                    for item in ITEMS[kind]
+                ]
+                if item_id is None:
+                    return self.send(200, {"results": items})
+                for item in items:
+                    if item["id"] == item_id:
+                        commands = {
+                            command: {"href": "{}/{}".format(item["href"], command)}
+                            for command in ("on", "off")
+                        }
+                        return self.send(200, dict(item, commands=commands))
+            self.send(404, {})
+
+        def send_cardholders(self, path):
+            fake.cardholder_requests.append(self.path)
+            time.sleep(fake.cardholder_hold)
+            if path == "/api/cardholders":
+                query = parse_qs(urlparse(self.path).query)
+                ids = query["id"][0].split(",") if "id" in query else []
+                results = [fake.cardholders[c] for c in ids if c in fake.cardholders]
+                return self.send(200, {"results": results})
+            cardholder = fake.cardholders.get(path.rsplit("/", 1)[-1])
+            if cardholder is None:
+                return self.send(404, {})
+            self.send(200, cardholder)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode() if length else ""
+            fake.posts.append((self.path, body))
+            if self.path.rstrip("/") == "/api/items/updates":
+                ids = json.loads(body)["itemIds"]
+                updates = [
+                    {"id": item["id"], "statusFlags": FLAGS[kind]}
+                    for kind, items in ITEMS.items()
+                    for item in items
+                    if item["id"] in ids
+                ]
+                return self.send(
+                    200,
+                    {"updates": updates, "next": {"href": fake.href("items/updates/next")}},
+                )
+            time.sleep(fake.command_hold)
+            self.send(204)
+
+    return Handler
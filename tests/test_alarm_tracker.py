@@ -0,0 +1,87 @@
+"""Tests for the active alarm list and its priority and source indexes."""
+import time
+
+import pytest
+
+from gallagher.AlarmTracker import AlarmTracker
+from gallagher.Metrics import Metrics
+
+
+def _alarm(alarm_id, priority, source_id, state="unacknowledged"):
+    return {
+        "id": alarm_id,
+        "priority": priority,
+        "state": state,
+        "source": {"id": source_id, "name": "Item {}".format(source_id)},
+    }
+
+
+@pytest.fixture
+def metrics():
+    return Metrics()
+
+
+@pytest.fixture
+def tracker(command_centre, metrics):
+    tracker = AlarmTracker(command_centre.href("alarms"), "key", metrics=metrics)
+    yield tracker
+    tracker.stop()
+
+
+def _apply(command_centre, metrics, updates):
+    """Queues a batch of alarm updates and waits until the tracker has applied it"""
+    applied = metrics.get_counter("alarms.updates") + len(updates)
+    command_centre.alarm_updates.append(updates)
+    deadline = time.monotonic() + 2
+    while metrics.get_counter("alarms.updates") < applied:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_the_active_list_is_indexed_on_load(command_centre, tracker):
+    command_centre.alarms = [
+        _alarm("1", 9, "101"),
+        _alarm("2", 9, "101"),
+        _alarm("3", 3, "201", state="acknowledged"),
+    ]
+
+    tracker.start()
+
+    assert tracker.wait_until_loaded(2)
+    assert tracker.get_count() == 3
+    assert tracker.get_counts_by_priority() == {9: 2, 3: 1}
+    assert tracker.get_counts_by_source() == {
+        "101": ("Item 101", 2),
+        "201": ("Item 201", 1),
+    }
+    assert tracker.get_counts_by_state() == {"unacknowledged": 2, "acknowledged": 1}
+
+
+def test_updates_move_alarms_between_indexes(command_centre, tracker, metrics):
+    command_centre.alarms = [_alarm("1", 9, "101"), _alarm("2", 3, "201")]
+    tracker.start()
+    assert tracker.wait_until_loaded(2)
+
+    # Updates may only carry the changed fields
+    _apply(command_centre, metrics, [{"id": "1", "priority": 5}])
+
+    assert tracker.get_alarm("1")["source"]["id"] == "101"
+    assert tracker.get_counts_by_priority() == {5: 1, 3: 1}
+
+    _apply(command_centre, metrics, [_alarm("3", 5, "301")])
+
+    assert tracker.get_count() == 3
+    assert tracker.get_counts_by_priority() == {5: 2, 3: 1}
+
+
+def test_processed_alarms_leave_every_index(command_centre, tracker, metrics):
+    command_centre.alarms = [_alarm("1", 9, "101"), _alarm("2", 3, "201")]
+    tracker.start()
+    assert tracker.wait_until_loaded(2)
+
+    _apply(command_centre, metrics, [{"id": "2", "state": "processed"}])
+
+    assert tracker.get_alarm("2") is None
+    assert tracker.get_counts_by_priority() == {9: 1}
+    assert tracker.get_counts_by_source() == {"101": ("Item 101", 1)}
+    assert tracker.get_count() == 1
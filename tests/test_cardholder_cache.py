@@ -0,0 +1,125 @@
+"""Tests for cardholder lookups, single-flight requests and cache expiry."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from gallagher.CardholderCache import CardholderCache
+from gallagher.Metrics import Metrics
+
+
+def _cardholder(cardholder_id, first_name):
+    return {
+        "id": cardholder_id,
+        "firstName": first_name,
+        "lastName": "Smith",
+        "authorised": True,
+    }
+
+
+@pytest.fixture
+def metrics():
+    return Metrics()
+
+
+@pytest.fixture
+def cache(command_centre, metrics):
+    command_centre.cardholders = {
+        "100": _cardholder("100", "Ann"),
+        "200": _cardholder("200", "Bob"),
+    }
+    cache = CardholderCache(
+        command_centre.href("cardholders"), "key", ttl=60, metrics=metrics
+    )
+    yield cache
+    cache.stop()
+
+
+def test_a_cardholder_is_requested_once_then_cached(command_centre, cache, metrics):
+    first = cache.get_cardholder("100")
+    second = cache.get_cardholder(100)
+
+    assert first == second
+    assert first["name"] == "Ann Smith"
+    # Only the fields events are enriched with are kept
+    assert "authorised" not in first
+    assert len(command_centre.cardholder_requests) == 1
+    assert metrics.get_counter("cardholders.cache.misses") == 1
+    assert metrics.get_counter("cardholders.cache.hits") == 1
+
+
+def test_concurrent_lookups_share_one_request(command_centre, cache, metrics):
+    command_centre.cardholder_hold = 0.3
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(cache.get_cardholder, ["100"] * 4))
+
+    assert [result["id"] for result in results] == ["100"] * 4
+    assert len(command_centre.cardholder_requests) == 1
+    assert metrics.get_counter("cardholders.cache.coalesced") == 3
+
+
+def test_unknown_cardholders_are_cached_as_not_found(command_centre, cache):
+    assert cache.get_cardholder("999") is None
+    assert cache.get_cardholder("999") is None
+
+    assert len(command_centre.cardholder_requests) == 1
+
+
+def test_expired_cardholders_are_requested_again(command_centre, metrics):
+    command_centre.cardholders = {"100": _cardholder("100", "Ann")}
+    cache = CardholderCache(
+        command_centre.href("cardholders"), "key", ttl=0.1, metrics=metrics
+    )
+    try:
+        cache.get_cardholder("100")
+        time.sleep(0.15)
+
+        assert cache.get_cached("100") is None
+        command_centre.cardholders["100"] = _cardholder("100", "Anne")
+        assert cache.get_cardholder("100")["name"] == "Anne Smith"
+    finally:
+        cache.stop()
+
+    assert len(command_centre.cardholder_requests) == 2
+    assert metrics.get_counter("cardholders.cache.expired") == 1
+
+
+def test_the_least_recently_used_cardholder_is_evicted(command_centre, metrics):
+    command_centre.cardholders = {
+        c: _cardholder(c, "Name {}".format(c)) for c in ["1", "2", "3"]
+    }
+    cache = CardholderCache(
+        command_centre.href("cardholders"), "key", capacity=2, metrics=metrics
+    )
+    try:
+        cache.get_cardholder("1")
+        cache.get_cardholder("2")
+        cache.get_cardholder("1")
+        cache.get_cardholder("3")
+
+        assert cache.get_cached("1") is not None
+        assert cache.get_cached("2") is None
+        assert cache.get_size() == 2
+    finally:
+        cache.stop()
+
+    assert metrics.get_counter("cardholders.cache.evictions") == 1
+
+
+def test_events_are_enriched_with_one_search_per_batch(command_centre, cache):
+    events = [
+        {"id": "1", "cardholder": {"id": "100"}},
+        {"id": "2", "cardholder": {"id": "200", "name": "Reported name"}},
+        {"id": "3", "cardholder": {"id": "100"}},
+        {"id": "4"},
+    ]
+
+    cache.enrich_events(events)
+
+    assert events[0]["cardholder"]["name"] == "Ann Smith"
+    # Fields reported with the event are kept
+    assert events[1]["cardholder"]["name"] == "Reported name"
+    assert events[1]["cardholder"]["firstName"] == "Bob"
+    assert len(command_centre.cardholder_requests) == 1
+    assert cache.get_cached("200")["lastName"] == "Smith"
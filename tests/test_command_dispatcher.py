@@ -0,0 +1,149 @@
+"""Tests for item command coalescing, deadlines and shutdown."""
+import threading
+import time
+
+import requests
+
+from gallagher.CommandDispatcher import CommandDispatcher, CommandOutcome
+from gallagher.Metrics import Metrics
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _Session:
+    """Records posts, each waits until released when hold is set"""
+
+    def __init__(self, hold=False, status_code=204):
+        self.posts = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.status_code = status_code
+        if not hold:
+            self.release.set()
+
+    def post(self, href, verify, headers, json, timeout):
+        self.posts.append((href, json))
+        self.started.set()
+        if not self.release.wait(timeout[1]):
+            raise requests.exceptions.ReadTimeout()
+        if isinstance(self.status_code, Exception):
+            raise self.status_code
+        return _Response(self.status_code)
+
+
+def test_commands_are_sent_and_counted():
+    metrics = Metrics()
+    dispatcher = CommandDispatcher(_Session(), "key", metrics=metrics)
+
+    future = dispatcher.submit("output_1", "ItemOutput", "on", "https/on")
+
+    assert future.result(2) is CommandOutcome.SUCCESS
+    assert metrics.get_counter("commands.success") == 1
+    assert metrics.get_timing("commands.latency.ItemOutput")["count"] == 1
+    dispatcher.shutdown()
+
+
+def test_a_queued_command_is_superseded_by_a_newer_one():
+    session = _Session(hold=True)
+    metrics = Metrics()
+    dispatcher = CommandDispatcher(session, "key", metrics=metrics)
+
+    active = dispatcher.submit("output_1", "ItemOutput", "on", "https/on")
+    assert session.started.wait(2)
+    queued = dispatcher.submit("output_1", "ItemOutput", "off", "https/off")
+    newest = dispatcher.submit("output_1", "ItemOutput", "on", "https/on")
+
+    assert queued.result(2) is CommandOutcome.SUPERSEDED
+    assert dispatcher.get_pending("output_1") == ("on", None)
+
+    session.release.set()
+    assert active.result(2) is CommandOutcome.SUCCESS
+    assert newest.result(2) is CommandOutcome.SUCCESS
+    # The superseded command was never sent
+    assert [href for href, _ in session.posts] == ["https/on", "https/on"]
+    assert metrics.get_counter("commands.superseded") == 1
+    dispatcher.shutdown()
+
+
+def test_commands_for_other_items_are_not_coalesced():
+    session = _Session(hold=True)
+    dispatcher = CommandDispatcher(session, "key")
+
+    first = dispatcher.submit("output_1", "ItemOutput", "on", "https/1/on")
+    second = dispatcher.submit("output_2", "ItemOutput", "on", "https/2/on")
+    session.release.set()
+
+    assert first.result(2) is CommandOutcome.SUCCESS
+    assert second.result(2) is CommandOutcome.SUCCESS
+    dispatcher.shutdown()
+
+
+def test_a_command_past_its_deadline_times_out():
+    session = _Session(hold=True)
+    dispatcher = CommandDispatcher(session, "key")
+
+    sending = dispatcher.submit("door_1", "ItemDoor", "open", "https/open", timeout=0.2)
+
+    assert sending.result(2) is CommandOutcome.TIMEOUT
+    dispatcher.shutdown()
+
+
+def test_a_command_expiring_while_queued_is_not_sent():
+    session = _Session(hold=True)
+    dispatcher = CommandDispatcher(session, "key")
+
+    active = dispatcher.submit("door_1", "ItemDoor", "open", "https/open")
+    assert session.started.wait(2)
+    queued = dispatcher.submit("door_1", "ItemDoor", "open", "https/open", timeout=0.05)
+    time.sleep(0.1)
+    session.release.set()
+
+    assert active.result(2) is CommandOutcome.SUCCESS
+    assert queued.result(2) is CommandOutcome.TIMEOUT
+    assert len(session.posts) == 1
+    dispatcher.shutdown()
+
+
+def test_a_rejected_command_fails():
+    dispatcher = CommandDispatcher(_Session(status_code=403), "key")
+
+    future = dispatcher.submit("macro_1", "ItemMacro", "run", "https/run")
+
+    assert future.result(2) is CommandOutcome.FAILED
+    dispatcher.shutdown()
+
+
+def test_shutdown_cancels_queued_commands_and_refuses_new_ones():
+    session = _Session(hold=True)
+    metrics = Metrics()
+    dispatcher = CommandDispatcher(session, "key", metrics=metrics)
+
+    active = dispatcher.submit("output_1", "ItemOutput", "on", "https/on")
+    assert session.started.wait(2)
+    queued = dispatcher.submit("output_1", "ItemOutput", "off", "https/off")
+
+    assert dispatcher.shutdown() == 1
+    assert queued.result(2) is CommandOutcome.CANCELLED
+    refused = dispatcher.submit("output_1", "ItemOutput", "on", "https/on")
+    assert refused.result(0) is CommandOutcome.FAILED
+
+    # The in-flight command is aborted by the session, as GallagherRest.stop() does
+    session.status_code = requests.exceptions.ConnectionError("aborted")
+    session.release.set()
+    assert active.result(2) is CommandOutcome.CANCELLED
+    assert len(session.posts) == 1
+    assert metrics.get_counter("commands.cancelled") == 2
+
+
+def test_suppressed_commands_resolve_without_being_sent():
+    session = _Session()
+    metrics = Metrics()
+    dispatcher = CommandDispatcher(session, "key", metrics=metrics)
+
+    assert dispatcher.suppress("output_1", "on").result(0) is CommandOutcome.SUPPRESSED
+    assert session.posts == []
+    assert metrics.get_counter("commands.suppressed") == 1
+    dispatcher.shutdown()
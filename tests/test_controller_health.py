@@ -0,0 +1,95 @@
+"""Tests for controller online state and the dropping of offline item updates."""
+from gallagher.ControllerHealth import CONTROLLER_OFFLINE, ControllerHealth
+from gallagher.Metrics import Metrics
+
+
+def _update(item_id, *flags):
+    return {"id": item_id, "statusFlags": list(flags)}
+
+
+def _health(metrics=None, on_change=None):
+    health = ControllerHealth(metrics=metrics, on_change=on_change)
+    health.rebuild([("101", "900"), ("102", "900"), ("201", "901"), ("301", None)])
+    return health
+
+
+def test_items_are_indexed_by_controller():
+    health = _health()
+
+    assert sorted(health.get_controllers()) == ["900", "901"]
+    assert health.get_items(900) == ["101", "102"]
+    assert health.get_controller("201") == "901"
+    assert health.get_controller("301") is None
+    assert health.is_online("900") is None
+
+
+def test_the_first_report_sets_the_state_without_a_transition():
+    changes = []
+    metrics = Metrics()
+    health = _health(metrics, changes.append)
+
+    kept = health.filter_updates([_update("101", "closed"), _update("201", "open")])
+
+    assert len(kept) == 2
+    assert health.is_online("900") is True
+    assert sorted(changes[0]) == ["900", "901"]
+    assert metrics.get_counter("controllers.transitions") == 0
+    assert metrics.get_gauge("controllers.offline") == 0
+
+
+def test_updates_of_an_offline_controller_are_dropped():
+    changes = []
+    metrics = Metrics()
+    health = _health(metrics, changes.append)
+    health.filter_updates([_update("101", "closed")])
+
+    kept = health.filter_updates(
+        [
+            _update("101", "closed", CONTROLLER_OFFLINE),
+            _update("102", CONTROLLER_OFFLINE),
+            _update("201", "open"),
+            _update("301", CONTROLLER_OFFLINE),
+            {"id": "102", "name": "Rear PIR"},
+        ]
+    )
+
+    assert [update["id"] for update in kept] == ["201", "301", "102"]
+    assert health.is_online("900") is False
+    # Told once per transition, not once per item
+    assert changes[-1] == ["900", "901"]
+    assert metrics.get_counter("controllers.dropped_updates") == 2
+    assert metrics.get_counter("controllers.transitions") == 1
+    assert metrics.get_gauge("controllers.offline") == 1
+
+
+def test_a_controller_is_online_again_once_an_item_reports():
+    changes = []
+    metrics = Metrics()
+    health = _health(metrics, changes.append)
+    health.filter_updates([_update("101", CONTROLLER_OFFLINE)])
+
+    kept = health.filter_updates([_update("102", "closed")])
+
+    assert len(kept) == 1
+    assert health.is_online("900") is True
+    assert changes[-1] == ["900"]
+    assert health.get_status()["900"]["online"] is True
+    assert health.get_status()["900"]["since"] is not None
+    assert metrics.get_gauge("controllers.offline") == 0
+
+
+def test_rebuild_keeps_the_known_state():
+    health = _health()
+    health.set_name("900", "Controller 1")
+    health.filter_updates([_update("101", CONTROLLER_OFFLINE)])
+
+    health.rebuild([("101", "900")])
+
+    assert health.get_status() == {
+        "900": {
+            "name": "Controller 1",
+            "online": False,
+            "items": 1,
+            "since": health.get_status()["900"]["since"],
+        }
+    }
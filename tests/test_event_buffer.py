@@ -0,0 +1,95 @@
+"""Tests for the recent event buffer and its indexes."""
+from datetime import datetime, timezone
+
+from gallagher.EventBuffer import EventBuffer
+from gallagher.Metrics import Metrics
+
+
+def _event(event_id, minute, door=None, cardholder=None, type_id="20001"):
+    event = {
+        "id": str(event_id),
+        "time": "2024-05-01T10:{:02d}:00Z".format(minute),
+        "message": "Event {}".format(event_id),
+        "type": {"id": type_id, "name": "Card event"},
+    }
+    if door is not None:
+        event["door"] = {"id": door, "name": "Door {}".format(door)}
+        event["source"] = {"id": door, "name": "Door {}".format(door)}
+    if cardholder is not None:
+        event["cardholder"] = {"id": cardholder, "name": "Cardholder"}
+    return event
+
+
+def _ids(records):
+    return [record["id"] for record in records]
+
+
+def test_queries_return_the_newest_matching_events_first():
+    buffer = EventBuffer(10)
+    buffer.add_events(
+        [
+            _event(1, 0, door="1", cardholder="100"),
+            _event(2, 1, door="2", cardholder="100"),
+            _event(3, 2, door="1", cardholder="200", type_id="20002"),
+        ]
+    )
+
+    assert _ids(buffer.query()) == ["3", "2", "1"]
+    assert _ids(buffer.query(item_id="1")) == ["3", "1"]
+    assert _ids(buffer.query(cardholder_id=100)) == ["2", "1"]
+    assert _ids(buffer.query(type_id="20002")) == ["3"]
+    assert _ids(buffer.query(item_id="1", cardholder_id="100")) == ["1"]
+    assert _ids(buffer.query(limit=2)) == ["3", "2"]
+
+
+def test_a_record_names_each_item_involved():
+    buffer = EventBuffer(10)
+    buffer.add_events([_event(1, 0, door="1", cardholder="100")])
+
+    record = buffer.query(item_id="1")[0]
+
+    assert record["door"] == {"id": "1", "name": "Door 1"}
+    assert record["cardholder_id"] == "100"
+    assert record["type"] == "Card event"
+
+
+def test_since_excludes_older_events():
+    buffer = EventBuffer(10)
+    buffer.add_events([_event(i, i, door="1") for i in range(5)])
+    since = datetime(2024, 5, 1, 10, 3, tzinfo=timezone.utc).timestamp()
+
+    assert _ids(buffer.query(since=since)) == ["4", "3"]
+    assert _ids(buffer.query(item_id="1", since=since)) == ["4", "3"]
+
+
+def test_the_oldest_events_are_evicted_from_every_index():
+    metrics = Metrics()
+    buffer = EventBuffer(3, metrics=metrics)
+    buffer.add_events(
+        [
+            _event(1, 0, door="1", cardholder="100"),
+            _event(2, 1, door="2"),
+            _event(3, 2, door="2"),
+            _event(4, 3, door="1"),
+        ]
+    )
+
+    assert buffer.get_size() == 3
+    assert _ids(buffer.query()) == ["4", "3", "2"]
+    assert _ids(buffer.query(item_id="1")) == ["4"]
+    assert buffer.query(cardholder_id="100") == []
+    assert metrics.get_gauge("events.buffered") == 3
+
+    buffer.add_events([_event(5, 4, door="3"), _event(6, 5, door="3")])
+
+    assert _ids(buffer.query(item_id="2")) == []
+    assert _ids(buffer.query(type_id="20001")) == ["6", "5", "4"]
+
+
+def test_events_without_references_are_only_found_unfiltered():
+    buffer = EventBuffer(10)
+    buffer.add_events([{"id": "1", "time": "not a time", "message": "System"}])
+
+    assert _ids(buffer.query()) == ["1"]
+    assert _ids(buffer.query(since=0)) == ["1"]
+    assert buffer.query(item_id="1") == []
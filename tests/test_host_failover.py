@@ -0,0 +1,26 @@
+"""Tests for the ordered Command Centre host list."""
+from gallagher.HostFailover import HostFailover
+
+
+def test_set_hosts_keeps_the_active_standby():
+    failover = HostFailover(["https://primary", "https://standby-a"])
+    failover.activate("https://standby-a")
+
+    failover.set_hosts(["https://primary", "https://standby-b", "https://standby-a"])
+
+    assert failover.get_active_host() == "https://standby-a/"
+    assert failover.get_hosts() == [
+        "https://primary/",
+        "https://standby-b/",
+        "https://standby-a/",
+    ]
+
+
+def test_set_hosts_falls_back_to_the_primary_when_the_active_host_is_removed():
+    failover = HostFailover(["https://primary", "https://standby-a"])
+    failover.activate("https://standby-a")
+
+    failover.set_hosts(["https://primary", "https://primary/"])
+
+    assert failover.get_hosts() == ["https://primary/"]
+    assert not failover.is_on_standby()
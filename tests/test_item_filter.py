@@ -0,0 +1,50 @@
+"""Tests for the item name include and exclude rules."""
+import pytest
+
+from gallagher.ItemFilter import ItemFilter, parse_rules
+
+
+def test_include_glob_matches_the_whole_name():
+    item_filter = ItemFilter(include="outputs:Gate*")
+
+    assert item_filter.matches("outputs", "Gate Relay")
+    assert item_filter.matches("outputs", "gate relay")
+    assert not item_filter.matches("outputs", "Main Gate Relay")
+
+
+def test_exclude_glob_matches_the_whole_name():
+    item_filter = ItemFilter(exclude="* PIR")
+
+    assert not item_filter.matches("inputs", "Front PIR")
+    assert item_filter.matches("inputs", "Front PIR Tamper")
+    assert item_filter.matches("inputs", "Back Reed")
+
+
+def test_type_prefix_limits_a_rule_to_its_type():
+    item_filter = ItemFilter(include="inputs:* PIR", exclude="doors:Plant*")
+
+    assert item_filter.matches("inputs", "Front PIR")
+    assert not item_filter.matches("inputs", "Back Reed")
+    # Types without include rules load every item
+    assert item_filter.matches("outputs", "Back Reed")
+    assert not item_filter.matches("doors", "Plant Room")
+    assert item_filter.matches("accessZones", "Plant Room")
+
+
+def test_regex_rules_search_the_name():
+    item_filter = ItemFilter(include="/gate \\d+$/; Lobby", exclude="/spare/")
+
+    assert item_filter.matches("outputs", "North Gate 12")
+    assert item_filter.matches("outputs", "Lobby")
+    assert not item_filter.matches("outputs", "North Gate")
+    assert not item_filter.matches("outputs", "Spare Gate 3")
+
+
+def test_empty_rules():
+    assert ItemFilter().is_empty()
+    assert ItemFilter().matches("inputs", None)
+
+
+def test_invalid_regex_is_rejected():
+    with pytest.raises(ValueError):
+        parse_rules("/gate (/")
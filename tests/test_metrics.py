@@ -0,0 +1,43 @@
+"""Tests for the engine metrics registry."""
+from gallagher.Metrics import Metrics
+
+
+def test_get_value_reads_counters_and_gauges():
+    metrics = Metrics()
+    metrics.increment("commands.success")
+    metrics.increment("commands.success", 2)
+    metrics.set_gauge("controllers.offline", 1)
+
+    assert metrics.get_value("commands.success") == 3
+    assert metrics.get_value("controllers.offline") == 1
+    assert metrics.get_value("commands.failed") is None
+
+
+def test_get_timings_returns_a_timing_and_its_breakdown():
+    metrics = Metrics()
+    metrics.record_timing("commands.latency", 0.1)
+    metrics.record_timing("commands.latency.ItemMacro", 0.3)
+    metrics.record_timing("commands.latency_other", 0.5)
+
+    timings = metrics.get_timings("commands.latency")
+
+    assert sorted(timings) == ["commands.latency", "commands.latency.ItemMacro"]
+    assert timings["commands.latency.ItemMacro"]["p95_ms"] == 300.0
+
+
+def test_timing_summary_follows_new_samples():
+    metrics = Metrics(timing_samples=3)
+    metrics.record_timing("failover.time", 1)
+    assert metrics.get_timing("failover.time")["max_ms"] == 1000
+
+    summary = metrics.get_timing("failover.time")
+    summary["max_ms"] = None
+    metrics.record_timing("failover.time", 2)
+
+    assert metrics.get_timing("failover.time") == {
+        "count": 2,
+        "p50_ms": 1000,
+        "p95_ms": 2000,
+        "p99_ms": 2000,
+        "max_ms": 2000,
+    }
@@ -0,0 +1,97 @@
+"""Tests for access zone occupancy counting and reconciliation."""
+from gallagher.Metrics import Metrics
+from gallagher.OccupancyEngine import OccupancyEngine
+
+
+def _movement(event_id, cardholder, entry=None, exit=None):
+    event = {"id": str(event_id), "cardholder": {"id": cardholder}}
+    if entry is not None:
+        event["entryAccessZone"] = {"id": entry}
+    if exit is not None:
+        event["exitAccessZone"] = {"id": exit}
+    return event
+
+
+def test_movements_move_a_cardholder_between_zones():
+    changes = []
+    engine = OccupancyEngine(zone_ids=["1", "2"], on_change=changes.append)
+
+    entered = engine.handle_events([_movement(1, "100", entry="1")])
+    moved = engine.handle_events([_movement(2, "100", entry="2", exit="1")])
+
+    assert entered == {"1"}
+    assert moved == {"1", "2"}
+
+    assert engine.get_counts() == {"1": 0, "2": 1}
+    assert engine.get_cardholder_zone("100") == "2"
+    assert changes == [{"1"}, {"1", "2"}]
+
+
+def test_the_last_known_zone_is_left_when_the_exit_zone_is_missing():
+    engine = OccupancyEngine(zone_ids=["1", "2"])
+    engine.handle_events(
+        [
+            _movement(1, "100", entry="1"),
+            _movement(2, "200", entry="1"),
+            _movement(3, "100", entry="2"),
+        ]
+    )
+
+    assert engine.get_count("1") == 1
+    assert engine.get_count("2") == 1
+
+
+def test_leaving_every_zone_forgets_the_cardholder():
+    engine = OccupancyEngine(zone_ids=["1"])
+    engine.handle_events(
+        [_movement(1, "100", entry="1"), _movement(2, "100", exit="1")]
+    )
+
+    assert engine.get_count("1") == 0
+    assert engine.get_cardholder_zone("100") is None
+
+
+def test_replayed_and_unrelated_events_are_ignored():
+    metrics = Metrics()
+    engine = OccupancyEngine(zone_ids=["1"], metrics=metrics)
+    movement = _movement(1, "100", entry="1")
+
+    engine.handle_events([movement, {"id": "2", "message": "Door forced"}])
+    assert engine.handle_events([movement]) == set()
+
+    assert engine.get_count("1") == 1
+    assert metrics.get_counter("occupancy.movements") == 1
+    assert metrics.get_counter("occupancy.duplicates") == 1
+
+
+def test_counts_never_go_below_zero_and_untracked_zones_are_skipped():
+    engine = OccupancyEngine(zone_ids=["1"])
+
+    engine.handle_events([_movement(1, "100", entry="9", exit="1")])
+
+    assert engine.get_counts() == {"1": 0}
+    assert engine.get_cardholder_zone("100") == "9"
+
+
+def test_reconcile_corrects_drift():
+    changes = []
+    metrics = Metrics()
+    engine = OccupancyEngine(
+        zone_ids=["1", "2"], metrics=metrics, on_change=changes.append
+    )
+    engine.handle_events(
+        [_movement(1, "100", entry="1"), _movement(2, "200", entry="1")]
+    )
+
+    corrected = engine.reconcile({"1": 5, 2: 0, "3": 7, "4": None})
+
+    assert corrected == {"1"}
+    assert engine.get_counts() == {"1": 5}
+    assert changes[-1] == {"1"}
+    assert metrics.get_counter("occupancy.drift") == 3
+    assert metrics.get_counter("occupancy.corrections") == 1
+    assert metrics.get_counter("occupancy.reconciles") == 1
+
+    # Later movements count on from the corrected count
+    engine.handle_events([_movement(3, "100", exit="1")])
+    assert engine.get_count("1") == 4
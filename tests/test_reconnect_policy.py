@@ -0,0 +1,88 @@
+"""Tests for the subscription back off and circuit breaker."""
+import requests
+
+from gallagher.Metrics import Metrics
+from gallagher.ReconnectPolicy import (
+    CircuitState,
+    FailureType,
+    ReconnectPolicy,
+    classify_failure,
+)
+
+
+def test_back_off_doubles_with_jitter_up_to_the_maximum():
+    policy = ReconnectPolicy(base_delay=1, max_delay=8, failure_threshold=100)
+
+    for ceiling in [1, 2, 4, 8, 8, 8]:
+        delay = policy.record_failure(FailureType.NETWORK)
+        assert ceiling / 2 <= delay <= ceiling
+
+    assert policy.get_consecutive_failures() == 6
+    assert policy.get_state() is CircuitState.CLOSED
+
+
+def test_the_circuit_opens_at_the_failure_threshold():
+    metrics = Metrics()
+    policy = ReconnectPolicy(base_delay=10, failure_threshold=3, metrics=metrics)
+
+    policy.record_failure(FailureType.SERVER)
+    policy.record_failure(FailureType.SERVER)
+    assert policy.get_state() is CircuitState.CLOSED
+    assert not policy.before_attempt()
+
+    policy.record_failure(FailureType.SERVER)
+
+    assert policy.get_state() is CircuitState.OPEN
+    assert policy.time_until_attempt() > 0
+    assert metrics.get_counter("subscription.circuit_opened") == 1
+    assert metrics.get_gauge("subscription.circuit_state") == "open"
+    assert metrics.get_counter("subscription.failures.server") == 3
+
+
+def test_a_half_open_probe_closes_the_circuit_on_success():
+    metrics = Metrics()
+    policy = ReconnectPolicy(failure_threshold=1, metrics=metrics)
+    policy.record_failure(FailureType.NETWORK)
+
+    assert policy.before_attempt()
+    assert policy.get_state() is CircuitState.HALF_OPEN
+    assert policy.time_until_attempt() == 0
+
+    policy.record_success()
+
+    assert policy.is_healthy()
+    assert not policy.before_attempt()
+    assert metrics.get_counter("subscription.circuit_probes") == 1
+    assert metrics.get_gauge("subscription.consecutive_failures") == 0
+
+
+def test_a_failed_probe_opens_the_circuit_again():
+    policy = ReconnectPolicy(failure_threshold=2)
+    policy.record_failure(FailureType.NETWORK)
+    policy.record_failure(FailureType.NETWORK)
+    policy.before_attempt()
+
+    policy.record_failure(FailureType.NETWORK)
+
+    assert policy.get_state() is CircuitState.OPEN
+
+
+def test_a_rejected_api_key_opens_the_circuit_for_the_auth_duration():
+    policy = ReconnectPolicy(auth_open_duration=600, failure_threshold=5)
+
+    delay = policy.record_failure(FailureType.AUTH)
+
+    assert delay == 600
+    assert policy.get_state() is CircuitState.OPEN
+    assert 590 < policy.time_until_attempt() <= 600
+
+
+def test_classify_failure():
+    assert classify_failure(status_code=401) is FailureType.AUTH
+    assert classify_failure(status_code=403) is FailureType.AUTH
+    assert classify_failure(status_code=503) is FailureType.SERVER
+    assert (
+        classify_failure(requests.exceptions.ConnectionError()) is FailureType.NETWORK
+    )
+    assert classify_failure(requests.exceptions.ReadTimeout()) is FailureType.NETWORK
+    assert classify_failure(ValueError("not json")) is FailureType.PROTOCOL
@@ -0,0 +1,39 @@
+"""Tests for the integration services."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.gcc_rest import services
+from custom_components.gcc_rest.const import DOMAIN
+
+
+def _hass_with_entity(unique_id):
+    hass = MagicMock()
+    hass.data = {DOMAIN: {"entry1": {}}}
+    registry = MagicMock()
+    registry.async_get.return_value = SimpleNamespace(
+        platform=DOMAIN, config_entry_id="entry1", unique_id=unique_id
+    )
+    return hass, registry
+
+
+def test_resolve_entity_returns_item_id():
+    hass, registry = _hass_with_entity("GCC_entry1_501")
+    with patch.object(services.er, "async_get", return_value=registry):
+        assert services._resolve_entity(hass, "lock.lobby") == ("entry1", "501")
+
+
+@pytest.mark.parametrize(
+    "unique_id",
+    ["GCC_entry1_501_occupancy", "GCC_entry1_metric_commands.failed"],
+)
+def test_resolve_entity_rejects_non_item_entities(unique_id):
+    hass, registry = _hass_with_entity(unique_id)
+    with patch.object(services.er, "async_get", return_value=registry):
+        with pytest.raises(HomeAssistantError, match="not a Command Centre item"):
+            services._resolve_entity(hass, "sensor.gcc_lobby_occupancy")
@@ -0,0 +1,116 @@
+"""Tests for entries sharing one engine and subscription."""
+import logging
+import time
+
+from gallagher.CommandDispatcher import CommandOutcome
+
+from gallagher.GallagherRest import GallagherRest
+from gallagher.GallagherSession import GallagherSession
+from gallagher.HostFailover import HostFailover
+from gallagher.StartupTracer import StartupTracer
+
+
+def _view(command_centre, hub, tracer):
+    engine = GallagherRest(command_centre.base, "key", tracer=tracer, hub=hub)
+    engine.set_item_inputs(None)
+    engine.set_item_outputs(None)
+    engine.set_item_doors(None)
+    return engine
+
+
+def _spans(tracer):
+    return {span["name"]: span for span in tracer.get_summary()["spans"]}
+
+
+def test_shared_setup_is_traced_per_entry(command_centre):
+    hub = GallagherRest(command_centre.base, "key")
+    first_tracer = StartupTracer()
+    second_tracer = StartupTracer()
+    first = second = None
+    try:
+        first = _view(command_centre, hub, first_tracer)
+        assert first.start()
+        assert first.wait_until_ready(5)
+
+        # Attaches to the running subscription
+        second = _view(command_centre, hub, second_tracer)
+        assert second.start()
+        assert second.wait_until_ready(5)
+
+        for tracer in (first_tracer, second_tracer):
+            spans = _spans(tracer)
+            # A list and a detail request for the one item of each type
+            for item_name in ("inputs", "outputs", "doors"):
+                assert spans["setup_item.{}".format(item_name)]["http_requests"] == 2
+            assert spans["first_subscription"]["http_requests"] >= 1
+            assert tracer.get_summary()["http_requests"] >= 7
+
+        # One subscription for both entries
+        subscribes = [path for path, _ in command_centre.posts if "updates" in path]
+        assert len(subscribes) == 2
+        # Every engine logs through the one handler
+        assert len(logging.getLogger("GallagherRest").handlers) == 1
+    finally:
+        for engine in (first, second, hub):
+            if engine is not None:
+                engine.stop()
+
+
+def test_unloading_an_entry_aborts_its_commands(command_centre):
+    hub = GallagherRest(command_centre.base, "key")
+    first = second = None
+    try:
+        first = _view(command_centre, hub, StartupTracer())
+        second = _view(command_centre, hub, StartupTracer())
+        for engine in (first, second):
+            assert engine.start()
+            assert engine.wait_until_ready(5)
+
+        command_centre.command_hold = 5
+        command = first.get_output("201").command("on", timeout=10)
+        time.sleep(0.5)
+
+        started = time.monotonic()
+        first.stop()
+        first = None
+        outcome = command.result(timeout=2)
+        assert outcome is CommandOutcome.CANCELLED
+        assert time.monotonic() - started < 2
+
+        # The other entry keeps its subscription
+        assert hub.is_ready()
+        assert second.get_output("201").get_status()["state"] is not None
+    finally:
+        for engine in (first, second, hub):
+            if engine is not None:
+                engine.stop()
+
+
+def test_engines_for_other_keys_share_the_host_pool(command_centre):
+    failover = HostFailover([command_centre.base])
+    pool = GallagherSession(failover)
+    first = GallagherRest(command_centre.base, "key-a", failover=failover, pool=pool)
+    second = GallagherRest(command_centre.base, "key-b", failover=failover, pool=pool)
+    try:
+        for engine in (first, second):
+            engine.set_item_inputs(None)
+            engine.set_item_outputs(None)
+            assert engine.start()
+            assert engine.wait_until_ready(5)
+
+        assert first._session.get_adapter(command_centre.base) is pool.get_adapter(
+            command_centre.base
+        )
+        # A subscription per key
+        subscribes = [path for path, _ in command_centre.posts if "updates" in path]
+        assert len(subscribes) == 2
+        assert first.get_metric("failover.active_host") == command_centre.base
+
+        first.stop()
+        # The pool stays open for the other key
+        command = second.get_output("201").command("on", timeout=5)
+        assert command.result(timeout=5) is CommandOutcome.SUCCESS
+    finally:
+        first.stop()
+        second.stop()
+        pool.close()
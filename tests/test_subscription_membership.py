@@ -0,0 +1,96 @@
+"""Tests for adding and dropping items from the live subscription."""
+import json
+import time
+
+from gallagher.GallagherRest import GallagherRest
+
+
+def _engine(command_centre, hub=None):
+    engine = GallagherRest(command_centre.base, "key", hub=hub)
+    engine.set_item_inputs(None)
+    engine.set_item_outputs(None)
+    engine.set_item_doors(None)
+    return engine
+
+
+def _subscriptions(command_centre):
+    """Returns the item ids of every subscription posted so far"""
+    return [
+        sorted(json.loads(body)["itemIds"])
+        for path, body in list(command_centre.posts)
+        if path.rstrip("/") == "/api/items/updates"
+    ]
+
+
+def _wait_for_subscription(command_centre, count):
+    deadline = time.monotonic() + 5
+    while len(_subscriptions(command_centre)) < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    return _subscriptions(command_centre)[count - 1]
+
+
+def test_unsubscribed_items_are_left_out_from_the_start(command_centre):
+    engine = _engine(command_centre)
+    try:
+        engine.set_unsubscribed_items(["101"])
+        assert engine.start()
+        assert engine.wait_until_ready(5)
+
+        assert _subscriptions(command_centre) == [["201", "401"]]
+        assert sorted(engine.get_subscribed_item_ids()) == ["201", "401"]
+    finally:
+        engine.stop()
+
+
+def test_items_are_dropped_and_added_to_the_running_subscription(command_centre):
+    engine = _engine(command_centre)
+    try:
+        assert engine.start()
+        assert engine.wait_until_ready(5)
+        assert _wait_for_subscription(command_centre, 1) == ["101", "201", "401"]
+
+        assert engine.set_item_subscribed("201", False)
+        assert _wait_for_subscription(command_centre, 2) == ["101", "401"]
+
+        # Nothing changes, nothing is posted
+        assert not engine.set_item_subscribed("201", False)
+        assert not engine.set_item_subscribed("101", True)
+
+        assert engine.set_item_subscribed(201, True)
+        assert _wait_for_subscription(command_centre, 3) == ["101", "201", "401"]
+        assert len(_subscriptions(command_centre)) == 3
+    finally:
+        engine.stop()
+
+
+def test_replacing_the_unsubscribed_set_only_resubscribes_on_change():
+    engine = GallagherRest("http://127.0.0.1:9/", "key")
+
+    assert engine.set_unsubscribed_items(["101", 201])
+    assert not engine.set_unsubscribed_items([201, "101"])
+    assert engine.set_unsubscribed_items(None)
+
+
+def test_a_shared_subscription_covers_every_attached_engine_once(command_centre):
+    hub = _engine(command_centre)
+    first = second = None
+    try:
+        first = _engine(command_centre, hub=hub)
+        second = _engine(command_centre, hub=hub)
+        first.set_unsubscribed_items(["401"])
+        for engine in (first, second):
+            assert engine.start()
+            assert engine.wait_until_ready(5)
+
+        assert sorted(hub.get_subscribed_item_ids()) == ["101", "201", "401"]
+
+        second.set_item_subscribed("401", False)
+        deadline = time.monotonic() + 5
+        while _subscriptions(command_centre)[-1] != ["101", "201"]:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    finally:
+        for engine in (first, second, hub):
+            if engine is not None:
+                engine.stop()